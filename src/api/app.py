@@ -1,21 +1,60 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import Any, List, Optional, Sequence
+from contextlib import asynccontextmanager
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+)
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
-from src.core.rag import answer
+from src.core.embedder import embedding_cache_stats, query_cache_stats
+from src.core.llm import aclose_llms, llm_router_stats
+from src.core.rag import (
+    aanswer,
+    aanswer_many,
+    aanswer_stream,
+    answer_cache_stats,
+    singleflight_stats,
+)
+from src.core.retriever import aretrieve_with_scores, semantic_cache_stats
+from src.core.vector_store import close_vector_stores
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+T = TypeVar("T")
+
+# How often a pending request checks whether its client has gone away
+_DISCONNECT_POLL_SECONDS = 0.25
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    # Release pooled clients and their connections on shutdown
+    close_vector_stores()
+    await aclose_llms()
+
+
 app = FastAPI(
     title="Naive RAG API",
     description=("Very small Retrieval Augmented Generation API"),
+    lifespan=lifespan,
 )
 
 
@@ -34,43 +73,246 @@ class QueryResponse(BaseModel):
     sources: List[SourceItem]
 
 
+class RetrievedChunk(BaseModel):
+    id: Optional[str] = Field(default=None, description="Stored chunk ID")
+    content: str
+    source: str = Field(..., description="Original document identifier")
+    chunk: Optional[int] = Field(
+        default=None, description="Chunk index inside the document"
+    )
+    score: float = Field(..., description="Relevance score in [0, 1], higher is closer")
+
+
+class RetrieveResponse(BaseModel):
+    chunks: List[RetrievedChunk]
+
+
+class BatchQueryRequest(BaseModel):
+    questions: List[Annotated[str, Field(min_length=1)]] = Field(
+        ..., min_length=1, max_length=1000, description="Questions answered in one call"
+    )
+    top_k: int = Field(
+        4, ge=1, le=20, description="How many chunks to retrieve per question"
+    )
+
+
+class BatchQueryItem(BaseModel):
+    answer: Optional[str] = None
+    sources: List[SourceItem] = Field(default_factory=list)
+    error: Optional[str] = Field(
+        default=None, description="Set when this question failed"
+    )
+
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryItem]
+
+
+def _source_items(rag_result: dict[str, Any]) -> List[SourceItem]:
+    raw_sources: Any = rag_result.get("sources", [])
+    sources_payload: Sequence[dict[str, Any]]
+    if isinstance(raw_sources, Sequence) and not isinstance(raw_sources, (str, bytes)):
+        sources_payload = [dict(item) for item in raw_sources]
+    else:
+        sources_payload = []
+    return [SourceItem(**item) for item in sources_payload]
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     """Lightweight readiness probe."""
     return {"status": "ok"}
 
 
+@app.get("/stats")
+def stats() -> dict[str, Any]:
+    """Cache, coalescing and LLM routing counters for monitoring."""
+    return {
+        "embedding_cache": embedding_cache_stats(),
+        "query_cache": query_cache_stats(),
+        "semantic_cache": semantic_cache_stats(),
+        "answer_cache": answer_cache_stats(),
+        "singleflight": singleflight_stats(),
+        "llm_router": llm_router_stats(),
+    }
+
+
+async def _unless_disconnected(request: Request, work: Awaitable[T]) -> T:
+    """Await ``work``, cancelling it if the client disconnects first.
+
+    Cancellation reaches the retriever and the LLM call, so an abandoned
+    request stops using provider capacity.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=_DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("Client disconnected, cancelling request")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        task.cancel()
+
+
 @app.post("/query", response_model=QueryResponse)
-def run_query(payload: QueryRequest) -> QueryResponse:
+async def run_query(payload: QueryRequest, request: Request) -> QueryResponse:
     """Run the RAG pipeline for a user question."""
     logger.info(
         "Received query", extra={"question": payload.question, "top_k": payload.top_k}
     )
     try:
-        rag_result = answer(payload.question, k=payload.top_k)
+        rag_result = await _unless_disconnected(
+            request, aanswer(payload.question, k=payload.top_k)
+        )
+    except HTTPException:
+        raise
     except Exception as exc:  # pragma: no cover - defensive guard
         logger.exception("RAG pipeline failed")
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
-    raw_sources: Any = rag_result.get("sources", [])
-    sources_payload: Sequence[dict[str, Any]]
-    if isinstance(raw_sources, Sequence) and not isinstance(raw_sources, (str, bytes)):
-        sources_payload = [dict(item) for item in raw_sources]
-    else:
-        sources_payload = []
-
-    sources = [SourceItem(**item) for item in sources_payload]
-
     answer_text = rag_result.get("answer", "")
     if not isinstance(answer_text, str):
         answer_text = str(answer_text)
 
-    return QueryResponse(answer=answer_text, sources=sources)
+    return QueryResponse(answer=answer_text, sources=_source_items(rag_result))
+
+
+def _frame(item: Dict[str, Any]) -> str:
+    data = {key: value for key, value in item.items() if key != "event"}
+    return f"event: {item['event']}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _sse(
+    first: Dict[str, Any], events: AsyncIterator[Dict[str, Any]]
+) -> AsyncIterator[str]:
+    """Server-Sent Events frames; a failure mid-stream becomes an ``error`` event.
+
+    A client disconnect cancels this generator, which cancels the LLM stream.
+    """
+    try:
+        yield _frame(first)
+        async for item in events:
+            yield _frame(item)
+    except Exception as exc:
+        logger.exception("RAG stream failed")
+        yield _frame({"event": "error", "error": str(exc)})
+
+
+@app.post("/query/stream")
+async def run_query_stream(
+    payload: QueryRequest, request: Request
+) -> StreamingResponse:
+    """Stream the answer as Server-Sent Events.
+
+    ``token`` events carry ``{"text"}`` pieces of the answer as the LLM
+    produces them; a final ``sources`` event carries ``{"sources",
+    "context_tokens"}``. Failures before the first event return 500, later
+    ones an ``error`` event.
+    """
+    logger.info(
+        "Received streaming query",
+        extra={"question": payload.question, "top_k": payload.top_k},
+    )
+    events = aanswer_stream(payload.question, k=payload.top_k)
+    try:
+        # Retrieval and the first token happen here, so setup errors get a status code
+        first = await _unless_disconnected(request, events.__anext__())
+    except HTTPException:
+        await events.aclose()
+        raise
+    except Exception as exc:
+        logger.exception("RAG stream failed")
+        await events.aclose()
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return StreamingResponse(
+        _sse(first, events),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/retrieve", response_model=RetrieveResponse)
+async def run_retrieve(payload: QueryRequest, request: Request) -> RetrieveResponse:
+    """Return the relevant chunks and their scores without calling the LLM.
+
+    ``top_k`` is an upper bound; with ``search_type: adaptive`` fewer chunks
+    come back when the scores drop off.
+    """
+    logger.info(
+        "Received retrieve",
+        extra={"question": payload.question, "top_k": payload.top_k},
+    )
+    try:
+        hits = await _unless_disconnected(
+            request, aretrieve_with_scores(payload.question, k=payload.top_k)
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.exception("Retrieval failed")
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    chunks = []
+    for doc, score in hits:
+        metadata = doc.metadata or {}
+        chunk_value = metadata.get("chunk")
+        chunks.append(
+            RetrievedChunk(
+                id=doc.id,
+                content=doc.page_content,
+                source=str(metadata.get("source", "unknown")),
+                chunk=chunk_value if isinstance(chunk_value, int) else None,
+                score=float(score),
+            )
+        )
+    return RetrieveResponse(chunks=chunks)
+
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def run_query_batch(
+    payload: BatchQueryRequest, request: Request
+) -> BatchQueryResponse:
+    """Answer many questions in one call; failures are reported per item."""
+    logger.info(
+        "Received batch query",
+        extra={"questions": len(payload.questions), "top_k": payload.top_k},
+    )
+    try:
+        rag_results = await _unless_disconnected(
+            request, aanswer_many(payload.questions, k=payload.top_k)
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.exception("Batch RAG pipeline failed")
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    results = []
+    for rag_result in rag_results:
+        if "error" in rag_result:
+            results.append(BatchQueryItem(error=str(rag_result["error"])))
+            continue
+        results.append(
+            BatchQueryItem(
+                answer=str(rag_result.get("answer", "")),
+                sources=_source_items(rag_result),
+            )
+        )
+    return BatchQueryResponse(results=results)
 
 
 __all__ = [
     "app",
+    "BatchQueryItem",
+    "BatchQueryRequest",
+    "BatchQueryResponse",
     "QueryRequest",
     "QueryResponse",
+    "RetrievedChunk",
+    "RetrieveResponse",
     "SourceItem",
 ]
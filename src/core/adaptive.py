@@ -0,0 +1,90 @@
+"""Adaptive-k retrieval: cut the ranked hits where relevance drops off.
+
+A fixed ``k`` pads the prompt with irrelevant chunks whenever fewer than
+``k`` are on topic. Hits here carry relevance scores in ``[0, 1]`` (higher
+is closer, via the store's relevance function) and are cut:
+
+- below ``score_threshold``, and then
+- at the largest drop between consecutive scores, if that drop is at least
+  ``min_gap`` (``[0.82, 0.80, 0.41, 0.39]`` keeps two hits).
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+Scored = List[Tuple[Document, float]]
+
+
+def adaptive_cut(
+    scored: Sequence[Tuple[Document, float]],
+    score_threshold: Optional[float] = None,
+    min_gap: Optional[float] = None,
+    min_k: int = 1,
+) -> Scored:
+    """Apply the threshold and largest-gap cuts to best-first ``scored`` hits.
+
+    The gap cut never leaves fewer than ``min_k`` hits; the threshold may
+    leave none.
+    """
+    kept = [
+        pair for pair in scored if score_threshold is None or pair[1] >= score_threshold
+    ]
+    if min_gap is None or len(kept) <= max(min_k, 1):
+        return kept
+    start = max(min_k, 1) - 1
+    gaps = [kept[i][1] - kept[i + 1][1] for i in range(start, len(kept) - 1)]
+    largest = max(range(len(gaps)), key=gaps.__getitem__)
+    if gaps[largest] >= min_gap:
+        return kept[: start + largest + 1]
+    return kept
+
+
+class AdaptiveRetriever(BaseRetriever):
+    """Similarity retriever returning at most ``k`` hits, cut by relevance."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    store: VectorStore
+    k: int = 4
+    score_threshold: Optional[float] = None
+    min_gap: Optional[float] = None
+    min_k: int = 1
+
+    def scored(self, query: str) -> Scored:
+        """``(document, relevance score)`` pairs after the cuts, best first."""
+        hits = self.store.similarity_search_with_relevance_scores(query, k=self.k)
+        return self._cut(hits)
+
+    async def ascored(self, query: str) -> Scored:
+        """Async variant of :meth:`scored`."""
+        hits = await self.store.asimilarity_search_with_relevance_scores(
+            query, k=self.k
+        )
+        return self._cut(hits)
+
+    def _cut(self, hits: Sequence[Tuple[Document, float]]) -> Scored:
+        hits = sorted(hits, key=lambda pair: pair[1], reverse=True)
+        return adaptive_cut(hits, self.score_threshold, self.min_gap, self.min_k)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in self.scored(query)]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in await self.ascored(query)]
+
+
+__all__ = ["AdaptiveRetriever", "adaptive_cut"]
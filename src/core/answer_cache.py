@@ -0,0 +1,270 @@
+"""Cache of generated answers.
+
+An answer is determined by the question, the chunks packed into the prompt
+and the chat model, so entries are keyed by
+``sha256(model key, normalized question, chunk IDs in prompt order, context
+tokens)``. Chunk IDs include the content hash (see ``with_chunk_ids``), so an
+edited chunk can never produce a hit for an answer built on its old text.
+Entries that reference removed chunks are dropped through
+``add_chunk_listener`` to free their space early.
+
+Two backends share one interface: an in-memory LRU+TTL map (default) and a
+SQLite table that survives restarts and is shared between workers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from langchain_core.documents import Document
+
+from src.core.embedding_cache import normalize_query
+from src.core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+Answer = Dict[str, Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used);
+CREATE TABLE IF NOT EXISTS answer_chunks (
+    chunk_id TEXT NOT NULL,
+    key TEXT NOT NULL REFERENCES answers (key) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS answer_chunks_chunk ON answer_chunks (chunk_id);
+CREATE INDEX IF NOT EXISTS answer_chunks_key ON answer_chunks (key);
+"""
+
+# SQLite limits the number of host parameters per statement
+_SQL_BATCH = 500
+
+
+def chunk_ref(doc: Document) -> str:
+    """Stored chunk ID, or a hash of the text for chunks without one."""
+    if doc.id:
+        return str(doc.id)
+    return "sha256:" + hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def answer_key(
+    question: str, chunk_ids: Sequence[str], model_key: str, context_tokens: int = 0
+) -> str:
+    payload = json.dumps(
+        [model_key, normalize_query(question), list(chunk_ids), context_tokens]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryAnswerCache:
+    """In-process answers with LRU eviction and optional TTL."""
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cache: TTLCache[Tuple[Answer, Tuple[str, ...]]] = TTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds, clock=clock
+        )
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Answer]:
+        item = self._cache.get(key)
+        return None if item is None else dict(item[0])
+
+    def put(self, key: str, answer: Answer, chunk_ids: Sequence[str]) -> None:
+        self._cache.put(key, (dict(answer), tuple(chunk_ids)))
+
+    def invalidate(self, chunk_ids: Iterable[str]) -> int:
+        """Drop answers built on any of ``chunk_ids``; returns how many."""
+        removed = set(chunk_ids)
+        dropped = self._cache.discard_where(
+            lambda item: not removed.isdisjoint(item[1])
+        )
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            **self._cache.stats(),
+            "invalidations": self.invalidations,
+        }
+
+    def close(self) -> None:
+        self._cache.clear()
+
+
+class SQLiteAnswerCache:
+    """Answers in a SQLite file with LRU eviction and optional TTL.
+
+    Expiry uses wall-clock time, since entries outlive the process.
+    """
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 2048,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        row = self._conn.execute("SELECT MAX(last_used) FROM answers").fetchone()
+        self._tick = int(row[0] or 0)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Answer]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (row[1] is None or row[1] >= self._clock()):
+                self._tick += 1
+                self._conn.execute(
+                    "UPDATE answers SET last_used = ? WHERE key = ?", (self._tick, key)
+                )
+                self._conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+            if row is not None:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._conn.commit()
+            self.misses += 1
+            return None
+
+    def put(self, key: str, answer: Answer, chunk_ids: Sequence[str]) -> None:
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._tick += 1
+            # REPLACE deletes the old row, which cascades to its chunk rows
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, value, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(answer), expires_at, self._tick),
+            )
+            self._conn.executemany(
+                "INSERT INTO answer_chunks (chunk_id, key) VALUES (?, ?)",
+                [(chunk, key) for chunk in dict.fromkeys(chunk_ids)],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM answers WHERE key IN "
+            "(SELECT key FROM answers ORDER BY last_used LIMIT ?)",
+            (overflow,),
+        )
+        self.evictions += overflow
+
+    def invalidate(self, chunk_ids: Iterable[str]) -> int:
+        """Drop answers built on any of ``chunk_ids``; returns how many."""
+        ids = list(dict.fromkeys(chunk_ids))
+        dropped = 0
+        with self._lock:
+            for start in range(0, len(ids), _SQL_BATCH):
+                batch = ids[start : start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                cursor = self._conn.execute(
+                    "DELETE FROM answers WHERE key IN (SELECT key FROM answer_chunks "
+                    f"WHERE chunk_id IN ({placeholders}))",
+                    tuple(batch),
+                )
+                dropped += max(cursor.rowcount, 0)
+            self._conn.commit()
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+        return int(count)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+AnswerCache = Union[MemoryAnswerCache, SQLiteAnswerCache]
+
+
+def build_answer_cache(cfg: Dict[str, Any]) -> AnswerCache:
+    """Cache for an ``answer_cache`` config (see configs/answer_cache.yml)."""
+    max_entries = int(cfg.get("max_entries", 2048))
+    ttl_seconds = cfg.get("ttl_seconds")
+    ttl = None if ttl_seconds is None else float(ttl_seconds)
+    backend = cfg.get("backend", "memory")
+    if backend == "sqlite":
+        path = cfg.get("path", "data/cache/answers.sqlite")
+        logger.info(f"Caching answers in {path}")
+        return SQLiteAnswerCache(path, max_entries=max_entries, ttl_seconds=ttl)
+    if backend != "memory":
+        raise ValueError(f"Unknown answer cache backend: {backend}")
+    return MemoryAnswerCache(max_entries=max_entries, ttl_seconds=ttl)
+
+
+__all__ = [
+    "AnswerCache",
+    "MemoryAnswerCache",
+    "SQLiteAnswerCache",
+    "answer_key",
+    "build_answer_cache",
+    "chunk_ref",
+]
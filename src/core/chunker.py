@@ -1,15 +1,15 @@
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-import yaml
 import logging
 
+from src.core.config import load_config
+
 logger = logging.getLogger(__name__)
 
 def chunk_documents(docs: list[Document]) -> list[Document]:
     logger.info(f"Starting to chunk {len(docs)} documents")
     
-    with open("configs/chunking.yml") as f:
-        cfg = yaml.safe_load(f)
+    cfg = load_config("chunking")
     logger.debug(f"Loaded chunking config: chunk_size={cfg['chunk_size']}, chunk_overlap={cfg['chunk_overlap']}")
     
     splitter = RecursiveCharacterTextSplitter(
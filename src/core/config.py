@@ -0,0 +1,176 @@
+"""Process-wide registry for the YAML profiles under ``configs/``.
+
+Every ``src/core`` module reads its settings through :func:`load_config`, so a
+file is opened and parsed once and then served from memory until its mtime
+(or size) changes on disk, or until :func:`reload_configs` is called.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path("configs")
+
+# Files whose top level maps profile names to sections plus a ``default`` key.
+PROFILE_CONFIGS = ("embeddings", "llm", "vector_store")
+
+
+@dataclass(frozen=True)
+class _Entry:
+    signature: Tuple[int, int]
+    data: Dict[str, Any]
+
+
+def _validate_chunking(cfg: Dict[str, Any]) -> None:
+    size = cfg.get("chunk_size")
+    overlap = cfg.get("chunk_overlap")
+    if size is None or overlap is None:
+        return  # missing keys surface as KeyError where they are used
+    if not isinstance(size, int) or size <= 0:
+        raise ValueError("chunking.yml: chunk_size must be a positive integer")
+    if not isinstance(overlap, int) or not 0 <= overlap < size:
+        raise ValueError(
+            "chunking.yml: chunk_overlap must be an integer in [0, chunk_size)"
+        )
+
+
+def _validate_retriever(cfg: Dict[str, Any]) -> None:
+    k = cfg.get("k")
+    if k is not None and (not isinstance(k, int) or k <= 0):
+        raise ValueError("retriever.yml: k must be a positive integer")
+
+
+def _validate_profiles(name: str, cfg: Dict[str, Any]) -> None:
+    for key, section in cfg.items():
+        if key == "default":
+            continue
+        if not isinstance(section, dict):
+            raise ValueError(f"{name}.yml: profile '{key}' must be a mapping")
+    default = cfg.get("default")
+    if default is not None and default not in cfg:
+        raise ValueError(f"{name}.yml: default profile '{default}' is not defined")
+
+
+_VALIDATORS: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "chunking": _validate_chunking,
+    "retriever": _validate_retriever,
+}
+
+
+def _validate(name: str, cfg: Any) -> Dict[str, Any]:
+    if cfg is None:
+        return {}
+    if not isinstance(cfg, dict):
+        raise ValueError(f"{name}.yml must contain a mapping at the top level")
+    if name in PROFILE_CONFIGS:
+        _validate_profiles(name, cfg)
+    validator = _VALIDATORS.get(name)
+    if validator is not None:
+        validator(cfg)
+    return cfg
+
+
+class ConfigRegistry:
+    """Thread-safe, mtime-invalidated cache of parsed config files."""
+
+    def __init__(self, config_dir: Path = CONFIG_DIR) -> None:
+        self._config_dir = Path(config_dir)
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, name: str) -> Path:
+        return self._config_dir / f"{name}.yml"
+
+    def load(self, name: str, required: bool = True) -> Dict[str, Any]:
+        """Return the parsed ``<name>.yml``; the result must be treated as read-only.
+
+        A missing file raises ``FileNotFoundError`` when ``required`` is set and
+        yields an empty mapping otherwise.
+        """
+        path = self.path_for(name)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(name, None)
+            if required:
+                raise
+            return {}
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(name)
+        if entry is not None and entry.signature == signature:
+            return entry.data
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.signature == signature:
+                return entry.data
+            with path.open() as f:
+                data = _validate(name, yaml.safe_load(f))
+            self._entries[name] = _Entry(signature=signature, data=data)
+            logger.debug(f"Loaded config {path}")
+            return data
+
+    def reload(self, name: Optional[str] = None) -> None:
+        """Drop one cached file (or all of them) so the next access re-parses it."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def preload(self) -> None:
+        """Parse and validate every known config file up front (e.g. at startup)."""
+        for name in (*PROFILE_CONFIGS, "chunking", "retriever"):
+            self.load(name, required=False)
+
+
+_registry = ConfigRegistry()
+
+
+def get_registry() -> ConfigRegistry:
+    return _registry
+
+
+def load_config(name: str, required: bool = True) -> Dict[str, Any]:
+    """Return the cached contents of ``configs/<name>.yml``."""
+    return _registry.load(name, required=required)
+
+
+def load_profile(
+    name: str, env_var: str, fallback: str, required: bool = True
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Resolve the active profile of a profile-style config file.
+
+    The profile name comes from ``env_var``, then the file's ``default`` key,
+    then ``fallback``. Returns the name and a shallow copy of its section
+    (``None`` if the profile is not defined) so callers may fill in defaults.
+    """
+    cfg = load_config(name, required=required)
+    profile = os.getenv(env_var, cfg.get("default", fallback))
+    section = cfg.get(profile)
+    return profile, (dict(section) if isinstance(section, dict) else None)
+
+
+def reload_configs(name: Optional[str] = None) -> None:
+    _registry.reload(name)
+
+
+__all__ = [
+    "CONFIG_DIR",
+    "ConfigRegistry",
+    "get_registry",
+    "load_config",
+    "load_profile",
+    "reload_configs",
+]
@@ -0,0 +1,225 @@
+"""Token-budget packing of retrieved chunks into the prompt context.
+
+Retrieved chunks repeat text: ``chunk_documents`` overlaps neighbours by
+``chunk_overlap`` characters, and at large ``k`` consecutive chunks of one
+document often come back together. ``pack_context``
+
+1. merges runs of consecutive chunks (``chunk`` metadata) of the same source
+   into one block, dropping the text a chunk repeats from its predecessor,
+2. adds blocks in retrieval order while they fit the token budget (a first
+   block larger than the budget is truncated), and
+3. reports the token counts before and after packing.
+
+Tokens are counted with ``tiktoken``. When an encoding cannot be loaded
+(unknown model, or no network access to fetch the BPE file) it falls back
+to an estimate of four characters per token.
+"""
+
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+APPROX = "approx"
+DEFAULT_ENCODING = "cl100k_base"
+SEPARATOR = "\n\n"
+# Shorter suffix/prefix matches are coincidences, not chunk overlap
+_MIN_OVERLAP = 8
+
+TokenCounter = Callable[[str], int]
+
+
+class PackedContext(NamedTuple):
+    text: str
+    documents: List[Document]
+    tokens: int
+    raw_tokens: int
+    dropped: int
+
+
+def approx_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+@lru_cache(maxsize=None)
+def token_counter(model: str = "", encoding: str = "") -> TokenCounter:
+    """Token counter for ``encoding``, or for the encoding of ``model``."""
+    if encoding == APPROX:
+        return approx_tokens
+    try:
+        import tiktoken
+
+        if encoding:
+            enc = tiktoken.get_encoding(encoding)
+        else:
+            try:
+                enc = tiktoken.encoding_for_model(model)
+            except KeyError:
+                enc = tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as exc:
+        logger.warning(
+            f"tiktoken encoding unavailable ({exc}); estimating 4 chars per token"
+        )
+        return approx_tokens
+    return lambda text: len(enc.encode(text, disallowed_special=()))
+
+
+def strip_overlap(
+    previous: str, following: str, max_overlap: Optional[int] = None
+) -> str:
+    """``following`` without the longest prefix that ``previous`` ends with."""
+    limit = min(len(previous), len(following))
+    if max_overlap is not None:
+        limit = min(limit, max_overlap)
+    for size in range(limit, _MIN_OVERLAP - 1, -1):
+        if previous.endswith(following[:size]):
+            return following[size:]
+    return following
+
+
+def _join(previous: str, rest: str, stripped: bool) -> str:
+    if not stripped:
+        return previous + "\n" + rest
+    # The splitter trims whitespace, so the separator after the overlap is lost
+    if rest and not rest[0].isspace() and not previous[-1:].isspace():
+        return previous + " " + rest
+    return previous + rest
+
+
+def _merge_run(run: Sequence[Document], max_overlap: Optional[int]) -> str:
+    text = run[0].page_content
+    for doc in run[1:]:
+        rest = strip_overlap(text, doc.page_content, max_overlap)
+        text = _join(text, rest, rest != doc.page_content)
+    return text
+
+
+def _section(metadata: Dict[str, Any]) -> str:
+    """Part of a source that numbers its own chunks (page, loaded document)."""
+    return f"{metadata.get('page', '')}/{metadata.get('source_doc', '')}"
+
+
+def merge_chunks(
+    docs: Sequence[Document], max_overlap: Optional[int] = None
+) -> List[Tuple[str, List[Document]]]:
+    """Blocks of ``(text, member chunks)``, ordered by each block's best-ranked chunk.
+
+    Chunks merge only with their direct neighbours (``chunk`` index ``i`` and
+    ``i + 1`` of the same ``source``, page and loaded document, since the
+    chunker numbers chunks per document); repeated chunks are dropped.
+    """
+    positions: Dict[Tuple[str, str, int], int] = {}
+    loose: List[int] = []
+    for rank, doc in enumerate(docs):
+        metadata = doc.metadata or {}
+        source, chunk = metadata.get("source"), metadata.get("chunk")
+        if source is None or not isinstance(chunk, int):
+            loose.append(rank)
+        else:
+            positions.setdefault((str(source), _section(metadata), chunk), rank)
+
+    blocks: List[Tuple[int, str, List[Document]]] = []
+    keys = sorted(positions)
+    i = 0
+    while i < len(keys):
+        source, section, chunk = keys[i]
+        j = i + 1
+        while j < len(keys) and keys[j] == (source, section, chunk + (j - i)):
+            j += 1
+        ranks = [positions[key] for key in keys[i:j]]
+        run = [docs[rank] for rank in ranks]
+        blocks.append((min(ranks), _merge_run(run, max_overlap), run))
+        i = j
+    blocks.extend((rank, docs[rank].page_content, [docs[rank]]) for rank in loose)
+    blocks.sort(key=lambda block: block[0])
+    return [(text, members) for _, text, members in blocks]
+
+
+def _truncate(text: str, budget: int, count: TokenCounter) -> str:
+    """Longest prefix of ``text`` within ``budget`` tokens (binary search)."""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def _fit(
+    members: List[Document],
+    spare: int,
+    count: TokenCounter,
+    max_overlap: Optional[int],
+    truncate: bool,
+) -> Tuple[str, List[Document]]:
+    """Longest run of leading ``members`` within ``spare`` tokens.
+
+    With ``truncate`` a first chunk that alone exceeds ``spare`` is cut to fit.
+    """
+    for size in range(len(members) - 1, 0, -1):
+        text = _merge_run(members[:size], max_overlap)
+        if count(text) <= spare:
+            return text, members[:size]
+    if truncate and spare > 0:
+        text = _truncate(members[0].page_content, spare, count)
+        if text:
+            return text, members[:1]
+    return "", []
+
+
+def pack_context(
+    docs: Sequence[Document],
+    budget: Optional[int] = None,
+    count: TokenCounter = approx_tokens,
+    max_overlap: Optional[int] = None,
+) -> PackedContext:
+    """Merge, de-overlap and pack ``docs`` (best first) into ``budget`` tokens.
+
+    A block that does not fit the remaining budget is cut back to its
+    longest leading run of chunks that does; only the very first chunk
+    packed may be truncated mid-text. ``budget`` of ``None`` keeps every
+    block.
+    """
+    raw_tokens = count(SEPARATOR.join(doc.page_content for doc in docs))
+    parts: List[str] = []
+    used: List[Document] = []
+    tokens = 0
+    separator_tokens = count(SEPARATOR)
+    blocks = merge_chunks(docs, max_overlap)
+    for text, members in blocks:
+        separator = separator_tokens if parts else 0
+        size = count(text)
+        if budget is not None and tokens + separator + size > budget:
+            spare = budget - tokens - separator
+            text, members = _fit(members, spare, count, max_overlap, truncate=not parts)
+            if not members:
+                continue  # a later, smaller block may still fit
+            size = count(text)
+        parts.append(text)
+        used.extend(members)
+        tokens += separator + size
+    return PackedContext(
+        text=SEPARATOR.join(parts),
+        documents=used,
+        tokens=tokens,
+        raw_tokens=raw_tokens,
+        dropped=len(docs) - len(used),
+    )
+
+
+__all__ = [
+    "APPROX",
+    "PackedContext",
+    "approx_tokens",
+    "merge_chunks",
+    "pack_context",
+    "strip_overlap",
+    "token_counter",
+]
@@ -1,40 +1,144 @@
 import os
-import yaml
 import logging
+from typing import Any, Dict, List, Optional
 
 from langchain_core.embeddings import Embeddings
-from langchain_ollama.embeddings import OllamaEmbeddings
-from langchain_huggingface import HuggingFaceEndpointEmbeddings
+
+from src.core.config import load_config, load_profile
+from src.core.embedding_batch import wrap_with_batching
+from src.core.embedding_cache import (
+    CachedEmbeddings,
+    QueryCachedEmbeddings,
+    wrap_with_cache,
+    wrap_with_query_cache,
+)
+from src.core.lazy import lazy_attr
+from src.core.pool import HandlePool, make_key
 
 logger = logging.getLogger(__name__)
 
+# Provider SDKs are imported on first use only (see src/core/lazy.py)
+_PROVIDERS = {
+    "OllamaEmbeddings": ("langchain_ollama.embeddings", "OllamaEmbeddings"),
+    "HuggingFaceEndpointEmbeddings": (
+        "langchain_huggingface",
+        "HuggingFaceEndpointEmbeddings",
+    ),
+    "HashingEmbeddings": ("src.core.offline", "HashingEmbeddings"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    return lazy_attr(globals(), _PROVIDERS, name)
+
+
+def _provider(name: str) -> Any:
+    return lazy_attr(globals(), _PROVIDERS, name)
+
+
+_EMBEDDERS: HandlePool[Embeddings] = HandlePool("embedder")
+
+_DEFAULT_MODELS = {
+    "ollama": "mxbai-embed-large",
+    "huggingface_hub": "mxbai-embed-large-v1",
+    "hashing": "hashing",
+}
+
 
 def _load_embed_cfg() -> dict:
-    with open("configs/embeddings.yml") as f:
-        cfg = yaml.safe_load(f)
-    profile = os.getenv("EMBED_PROFILE", cfg.get("default", "local"))
-    return cfg[profile]
+    profile, section = load_profile("embeddings", "EMBED_PROFILE", "local")
+    if section is None:
+        raise KeyError(
+            f"profile '{profile}' not found in embeddings.yml. "
+            f"Available keys: {list(load_config('embeddings').keys())}"
+        )
+    return section
+
+
+def embedder_key(cfg: Optional[dict] = None) -> str:
+    """Pool key identifying the embedder built for ``cfg`` (default: active profile)."""
+    return make_key(cfg if cfg is not None else _load_embed_cfg())
 
 
 def get_embedder() -> Embeddings:
+    """Return the shared embedder for the active ``EMBED_PROFILE``."""
     cfg = _load_embed_cfg()
+    return _EMBEDDERS.get(embedder_key(cfg), lambda: _build_embedder(cfg))
+
+
+def close_embedders() -> None:
+    """Release every pooled embedder; the next call to get_embedder rebuilds it."""
+    _EMBEDDERS.close()
+
+
+def _layers(emb: Any) -> List[Any]:
+    layers = []
+    while emb is not None:
+        layers.append(emb)
+        emb = getattr(emb, "inner", None)
+    return layers
+
+
+def embedding_cache_stats() -> List[Dict[str, Any]]:
+    """Hit/miss counters of the persistent embedding cache, per pooled embedder."""
+    return [
+        {"namespace": layer.namespace, **layer.stats()}
+        for emb in _EMBEDDERS.values()
+        for layer in _layers(emb)
+        if isinstance(layer, CachedEmbeddings)
+    ]
+
+
+def query_cache_stats() -> List[Dict[str, Any]]:
+    """Hit/miss counters of the in-memory query embedding cache."""
+    return [
+        {"namespace": layer.namespace, **layer.stats()}
+        for emb in _EMBEDDERS.values()
+        for layer in _layers(emb)
+        if isinstance(layer, QueryCachedEmbeddings)
+    ]
+
+
+def embedder_namespace(cfg: Optional[dict] = None) -> str:
+    """``provider:model`` identifying the vector space of an embeddings profile."""
+    cfg = cfg if cfg is not None else _load_embed_cfg()
+    provider = cfg.get("provider", "ollama")
+    model = cfg.get("model_name", _DEFAULT_MODELS.get(provider, ""))
+    if provider == "hashing":
+        model = f"{model}-{cfg.get('dimension', 384)}"
+    return f"{provider}:{model}"
+
+
+def _build_embedder(cfg: dict) -> Embeddings:
+    namespace = embedder_namespace(cfg)
+    inner = wrap_with_batching(_build_provider(cfg), cfg)
+    inner = wrap_with_cache(inner, cfg, namespace)
+    return wrap_with_query_cache(inner, cfg, namespace)
+
+
+def _build_provider(cfg: dict) -> Embeddings:
     provider = cfg.get("provider", "ollama")
 
     if provider == "ollama":
-        model = cfg.get("model_name", "mxbai-embed-large")
+        model = cfg.get("model_name", _DEFAULT_MODELS["ollama"])
         base_url = cfg.get("base_url", "http://localhost:11434")
         logger.info(f"Using OllamaEmbeddings: {model} ({base_url})")
-        return OllamaEmbeddings(model=model, base_url=base_url)
+        return _provider("OllamaEmbeddings")(model=model, base_url=base_url)
 
     if provider == "huggingface_hub":       
-        model = cfg.get("model_name", "mxbai-embed-large-v1")
+        model = cfg.get("model_name", _DEFAULT_MODELS["huggingface_hub"])
         token = os.getenv(cfg.get("api_key_env", "HF_TOKEN"))
         if not token:
             raise EnvironmentError("HF token missing. Set HF_TOKEN env var.")
         logger.info(f"Using HuggingFaceEndopointEmbeddings: {model}")
-        return HuggingFaceEndpointEmbeddings(
+        return _provider("HuggingFaceEndpointEmbeddings")(
             repo_id=model,
             huggingfacehub_api_token=token
         )
 
+    if provider == "hashing":
+        dimension = int(cfg.get("dimension", 384))
+        logger.info(f"Using HashingEmbeddings: dimension={dimension}")
+        return _provider("HashingEmbeddings")(dimension=dimension)
+
     raise ValueError(f"Unknown embeddings provider: {provider}")
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""Batched, concurrent ``embed_documents`` for large ingests.
+
+Splits a call into ``batch_size`` slices, embeds them over a bounded thread
+pool of ``max_concurrency`` workers, preserves input order and retries only
+the batches that failed (up to ``max_retries`` times with backoff).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embeddings wrapper that fans ``embed_documents`` out in ordered batches."""
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        batch_size: int = 64,
+        max_concurrency: int = 4,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+    ) -> None:
+        if batch_size <= 0 or max_concurrency <= 0 or max_retries < 0:
+            raise ValueError(
+                "batch_size and max_concurrency must be positive, max_retries >= 0"
+            )
+        self.inner = inner
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix="embed"
+                )
+            return self._executor
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                vectors = self.inner.embed_documents(batch)
+                if len(vectors) != len(batch):
+                    raise ValueError(
+                        f"Embedder returned {len(vectors)} vectors "
+                        f"for {len(batch)} texts"
+                    )
+                return vectors
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                logger.warning(
+                    f"Embedding batch of {len(batch)} failed; "
+                    f"retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = [
+            texts[start : start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        if len(batches) <= 1 or self.max_concurrency == 1:
+            return [vec for batch in batches for vec in self._embed_batch(batch)]
+
+        logger.info(
+            f"Embedding {len(texts)} texts in {len(batches)} batches "
+            f"(concurrency={self.max_concurrency})"
+        )
+        # Executor.map yields results in submission order
+        results = self._pool().map(self._embed_batch, batches)
+        return [vec for batch_vectors in results for vec in batch_vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.inner.aembed_query(text)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+def wrap_with_batching(inner: Embeddings, cfg: dict) -> Embeddings:
+    """Wrap ``inner`` when an embeddings profile sets ``batch_size``."""
+    if not cfg.get("batch_size"):
+        return inner
+    return BatchedEmbeddings(
+        inner,
+        batch_size=int(cfg["batch_size"]),
+        max_concurrency=int(cfg.get("max_concurrency", 4)),
+        max_retries=int(cfg.get("max_retries", 2)),
+        retry_backoff=float(cfg.get("retry_backoff", 0.5)),
+    )
+
+
+__all__ = ["BatchedEmbeddings", "wrap_with_batching"]
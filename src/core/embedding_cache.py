@@ -0,0 +1,303 @@
+"""Embedding caches.
+
+Document vectors are keyed by ``sha256(provider, model_name, text)`` and
+stored as float32 blobs in SQLite, so re-ingesting unchanged chunks never
+calls the embedding service again. The cache is bounded by ``max_entries`` and
+evicts least-recently-used vectors first.
+
+Query vectors are kept in an in-memory LRU+TTL cache keyed by the normalized
+question, so repeated questions skip the embedding round-trip entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from src.core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+# SQLite limits the number of host parameters per statement
+_SQL_BATCH = 500
+
+
+def cache_key(namespace: str, text: str) -> str:
+    return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _encode(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+def _chunks(items: Sequence[str], size: int = _SQL_BATCH) -> Iterable[Sequence[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class EmbeddingStore:
+    """SQLite table of vectors with size-bounded LRU eviction."""
+
+    def __init__(self, path: str | Path, max_entries: int = 200_000) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        row = self._conn.execute("SELECT MAX(last_used) FROM embeddings").fetchone()
+        self._tick = int(row[0] or 0)
+
+    def _next_tick(self) -> int:
+        self._tick += 1
+        return self._tick
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+        with self._lock:
+            for batch in _chunks(keys):
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    tuple(batch),
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = _decode(blob)
+            if found:
+                tick = self._next_tick()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(tick, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, items: Mapping[str, Sequence[float]]) -> None:
+        if not items:
+            return
+        with self._lock:
+            tick = self._next_tick()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) "
+                "VALUES (?, ?, ?)",
+                [(key, _encode(vector), tick) for key, vector in items.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (overflow,),
+        )
+        logger.debug(f"Evicted {overflow} cached embeddings from {self.path}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return int(count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the inner embedder."""
+
+    def __init__(
+        self, inner: Embeddings, store: EmbeddingStore, namespace: str
+    ) -> None:
+        self.inner = inner
+        self.store = store
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [cache_key(self.namespace, text) for text in texts]
+        cached = self.store.get_many(list(dict.fromkeys(keys)))
+
+        # Embed each distinct missing text once, even if it repeats in the batch
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.store.put_many(fresh)
+            cached.update(fresh)
+
+        with self._stats_lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return [list(cached[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        # Questions never enter the persistent store, it holds chunk vectors
+        return embed_queries(self.inner, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.inner.aembed_query(text)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.store)}
+
+    def close(self) -> None:
+        self.store.close()
+        close_inner = getattr(self.inner, "close", None)
+        if callable(close_inner):
+            close_inner()
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case so trivially different questions share a key."""
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """Embeddings wrapper with an in-memory LRU+TTL cache for ``embed_query``."""
+
+    def __init__(
+        self, inner: Embeddings, cache: TTLCache[List[float]], namespace: str
+    ) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.namespace = namespace
+
+    def _key(self, text: str) -> str:
+        return f"{self.namespace}\0{normalize_query(text)}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self.cache.put(key, vector)
+        return list(vector)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vector = self.cache.get(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                found[key] = vector
+        if missing:
+            vectors = embed_queries(self.inner, list(missing.values()))
+            for key, vector in zip(missing.keys(), vectors):
+                self.cache.put(key, vector)
+                found[key] = vector
+        return [list(found[key]) for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = await self.inner.aembed_query(text)
+            self.cache.put(key, vector)
+        return list(vector)
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    def close(self) -> None:
+        self.cache.clear()
+        close_inner = getattr(self.inner, "close", None)
+        if callable(close_inner):
+            close_inner()
+
+
+def embed_queries(emb: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Embed many questions in one batch.
+
+    Goes through the query cache when ``emb`` has one and skips the persistent
+    document cache, so questions never evict chunk vectors.
+    """
+    if isinstance(emb, (CachedEmbeddings, QueryCachedEmbeddings)):
+        return emb.embed_queries(texts)
+    return emb.embed_documents(texts)
+
+
+def wrap_with_cache(inner: Embeddings, cfg: dict, namespace: str) -> Embeddings:
+    """Wrap ``inner`` according to an embeddings profile's ``cache`` section."""
+    cache_cfg: Optional[dict] = cfg.get("cache")
+    if not cache_cfg or not cache_cfg.get("enabled", True):
+        return inner
+    store = EmbeddingStore(
+        cache_cfg.get("path", "data/cache/embeddings.sqlite"),
+        max_entries=int(cache_cfg.get("max_entries", 200_000)),
+    )
+    logger.info(f"Caching embeddings for {namespace} in {store.path}")
+    return CachedEmbeddings(inner, store, namespace)
+
+
+def wrap_with_query_cache(inner: Embeddings, cfg: dict, namespace: str) -> Embeddings:
+    """Wrap ``inner`` according to an embeddings profile's ``query_cache`` section."""
+    query_cfg: Optional[dict] = cfg.get("query_cache")
+    if not query_cfg or not query_cfg.get("enabled", True):
+        return inner
+    cache: TTLCache[List[float]] = TTLCache(
+        max_entries=int(query_cfg.get("max_entries", 1024)),
+        ttl_seconds=query_cfg.get("ttl_seconds", 3600),
+    )
+    return QueryCachedEmbeddings(inner, cache, namespace)
+
+
+__all__ = [
+    "CachedEmbeddings",
+    "EmbeddingStore",
+    "QueryCachedEmbeddings",
+    "cache_key",
+    "embed_queries",
+    "normalize_query",
+    "wrap_with_cache",
+    "wrap_with_query_cache",
+]
@@ -0,0 +1,579 @@
+"""Exact brute-force vector store over a memory-mapped float32 matrix.
+
+Layout of ``persist_dir``:
+
+- ``vectors.npy``: ``(capacity, dimension)`` float32 matrix of L2-normalized
+  vectors, opened with ``mmap_mode``; only the first ``count`` rows are live.
+- ``records.jsonl``: one ``{"id", "text", "metadata"}`` line per live row.
+- ``manifest.json``: ``{"dimension", "count", "vectors", "records"}``, the
+  last two naming the current vector and record files; rewritten atomically
+  last, so it is the commit point of every write.
+
+Search is one matrix-vector product plus ``argpartition``. Appends write into
+spare capacity (growing by doubling) and past the committed record lines;
+record lines left behind by an interrupted append are truncated on open.
+Deletes compact into new ``vectors.<generation>.npy`` and
+``records.<generation>.jsonl`` files that the manifest then switches to, so a
+crash leaves the previous files and manifest intact, and concurrent readers
+keep a consistent snapshot.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST = "manifest.json"
+_VECTORS = "vectors.npy"
+_RECORDS = "records.jsonl"
+_MIN_CAPACITY = 1024
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate the Chroma-style filters used in this repo ($eq, $in, $and)."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(payload))
+    os.replace(tmp, path)
+
+
+class StoreView(NamedTuple):
+    """Consistent read snapshot; ``index`` carries subclass search state."""
+
+    size: int
+    vectors: Optional[np.ndarray]
+    records: List[Dict[str, Any]]
+    index: Any = None
+
+
+class FlatVectorStore(VectorStore):
+    """LangChain ``VectorStore`` doing exact cosine search with NumPy."""
+
+    def __init__(self, persist_dir: str | Path, embedding: Embeddings) -> None:
+        self.persist_dir = Path(persist_dir)
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self._embedding = embedding
+        self._lock = threading.RLock()
+        self._dimension: Optional[int] = None
+        self._count = 0
+        self._vectors: Optional[np.memmap] = None
+        self._records: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._files = {"vectors": _VECTORS, "records": _RECORDS}
+        self._records_end = 0  # byte size of the committed records file
+        self._load()
+
+    # ------------------------------------------------------------------ storage
+
+    def _path(self, name: str) -> Path:
+        return self.persist_dir / name
+
+    def _load(self) -> None:
+        manifest_path = self._path(_MANIFEST)
+        if not manifest_path.exists():
+            return
+        manifest = json.loads(manifest_path.read_text())
+        self._dimension = int(manifest["dimension"])
+        self._count = int(manifest["count"])
+        # Stores written before generation files name neither
+        self._files = {
+            "vectors": str(manifest.get("vectors", _VECTORS)),
+            "records": str(manifest.get("records", _RECORDS)),
+        }
+        self._vectors = np.load(self._path(self._files["vectors"]), mmap_mode="r+")
+        records: List[Dict[str, Any]] = []
+        end = 0
+        with self._path(self._files["records"]).open("r+b") as handle:
+            for line in handle:
+                if len(records) == self._count:
+                    break
+                records.append(json.loads(line))
+                end += len(line)
+            if len(records) != self._count:
+                raise ValueError(
+                    f"{self.persist_dir}: {self._files['records']} has "
+                    f"{len(records)} rows, "
+                    f"manifest expects {self._count}"
+                )
+            # Lines past the manifest count belong to an unfinished append; drop
+            # them so the next append does not commit them in its place
+            if handle.seek(0, os.SEEK_END) > end:
+                logger.warning(
+                    f"{self.persist_dir}: discarding uncommitted records past row "
+                    f"{self._count}"
+                )
+                handle.truncate(end)
+        self._records = records
+        self._records_end = end
+        self._rows = {record["id"]: row for row, record in enumerate(records)}
+        self._remove_orphans()
+        logger.info(f"Opened flat store {self.persist_dir} ({self._count} vectors)")
+
+    def _remove_orphans(self) -> None:
+        """Delete generation files of a compaction that never reached the manifest."""
+        current = set(self._files.values())
+        for pattern in ("vectors.*.npy", "records.*.jsonl"):
+            for path in self.persist_dir.glob(pattern):
+                if path.name not in current:
+                    path.unlink(missing_ok=True)
+
+    def _write_manifest(self) -> None:
+        _write_json_atomic(
+            self._path(_MANIFEST),
+            {"dimension": self._dimension, "count": self._count, **self._files},
+        )
+
+    def _new_matrix(
+        self, capacity: int, rows: np.ndarray, name: Optional[str] = None
+    ) -> np.memmap:
+        """Write ``rows`` into a fresh memory-mapped file and swap it in.
+
+        Without ``name`` the current vector file is replaced, which keeps it
+        consistent with the manifest as long as its live rows are unchanged.
+        """
+        assert self._dimension is not None
+        name = name or self._files["vectors"]
+        tmp = self._path(name + ".tmp")
+        matrix = np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=np.float32, shape=(capacity, self._dimension)
+        )
+        matrix[: len(rows)] = rows
+        matrix.flush()
+        os.replace(tmp, self._path(name))
+        return matrix
+
+    def _ensure_capacity(self, needed: int) -> None:
+        current = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= current:
+            return
+        capacity = max(_MIN_CAPACITY, current)
+        while capacity < needed:
+            capacity *= 2
+        live = (
+            np.empty((0, self._dimension or 0), dtype=np.float32)
+            if self._vectors is None
+            else self._vectors[: self._count]
+        )
+        self._vectors = self._new_matrix(capacity, live)
+
+    def _after_append(self, start: int, matrix: np.ndarray) -> None:
+        """Hook for index subclasses: rows ``start:start+len(matrix)`` were added."""
+
+    def _after_compact(self, keep: np.ndarray) -> None:
+        """Hook for index subclasses: only old rows in ``keep`` survived, in order."""
+
+    def _index_state(self) -> Any:
+        """Search state captured with each snapshot (none for exact search)."""
+        return None
+
+    def _snapshot(self) -> StoreView:
+        # Writers replace (never shrink in place) vectors/records, so a view stays
+        # valid after the lock is released; appends only add rows past ``count``.
+        with self._lock:
+            return StoreView(
+                self._count, self._vectors, self._records, self._index_state()
+            )
+
+    # ------------------------------------------------------------------ writes
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_vectors(
+        self,
+        vectors: Sequence[Sequence[float]] | np.ndarray,
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+        ids: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[str]:
+        """Append precomputed vectors; existing ids are replaced (upsert)."""
+        if len(texts) == 0:
+            return []
+        matrix = normalize_rows(
+            np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+        )
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(texts)
+        resolved_ids = [
+            (ids[i] if ids is not None and ids[i] else None) or str(uuid.uuid4())
+            for i in range(len(texts))
+        ]
+
+        with self._lock:
+            if self._dimension is None:
+                self._dimension = int(matrix.shape[1])
+            elif matrix.shape[1] != self._dimension:
+                raise ValueError(
+                    f"Vector dimension {matrix.shape[1]} does not match store "
+                    f"dimension {self._dimension}"
+                )
+            existing = [i for i in resolved_ids if i in self._rows]
+            if existing:
+                self._delete_ids(existing)
+
+            start = self._count
+            self._ensure_capacity(start + len(texts))
+            assert self._vectors is not None
+            self._vectors[start : start + len(texts)] = matrix
+            self._vectors.flush()
+
+            new_records: List[Dict[str, Any]] = [
+                {"id": doc_id, "text": text, "metadata": dict(meta or {})}
+                for doc_id, text, meta in zip(resolved_ids, texts, metadatas)
+            ]
+            payload = "".join(json.dumps(record) + "\n" for record in new_records)
+            self._records_end = self._append_records(payload.encode("utf-8"))
+            for offset, record in enumerate(new_records):
+                self._records.append(record)
+                self._rows[record["id"]] = start + offset
+            self._count = start + len(texts)
+            self._after_append(start, matrix)
+            self._write_manifest()
+        return resolved_ids
+
+    def _append_records(self, payload: bytes) -> int:
+        """Write ``payload`` after the committed record lines; returns the new end.
+
+        Anything past the committed end is the tail of a failed append and is
+        overwritten rather than appended to.
+        """
+        path = self._path(self._files["records"])
+        with path.open("r+b" if path.exists() else "w+b") as handle:
+            handle.seek(self._records_end)
+            handle.truncate()
+            handle.write(payload)
+            return self._records_end + len(payload)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_vectors(vectors, texts, metadatas, ids)
+
+    def _delete_ids(self, ids: Iterable[str]) -> int:
+        doomed = np.array(
+            sorted({self._rows[i] for i in ids if i in self._rows}), dtype=np.int64
+        )
+        if not doomed.size:
+            return 0
+        alive = np.ones(self._count, dtype=bool)
+        alive[doomed] = False
+        keep = np.flatnonzero(alive)
+        assert self._vectors is not None
+        live = (
+            self._vectors[keep]
+            if keep.size
+            else np.empty((0, self._dimension or 0), np.float32)
+        )
+        records = [self._records[row] for row in keep]
+
+        # New files under fresh names; the manifest switches to them below
+        previous = dict(self._files)
+        generation = uuid.uuid4().hex[:12]
+        files = {
+            "vectors": f"vectors.{generation}.npy",
+            "records": f"records.{generation}.jsonl",
+        }
+        capacity = max(_MIN_CAPACITY, self._vectors.shape[0])
+        vectors = self._new_matrix(capacity, live, files["vectors"])
+        payload = "".join(json.dumps(record) + "\n" for record in records).encode()
+        self._path(files["records"]).write_bytes(payload)
+
+        self._vectors = vectors
+        self._files = files
+        self._records = records
+        self._rows = {record["id"]: row for row, record in enumerate(records)}
+        self._records_end = len(payload)
+        self._count = len(records)
+        self._after_compact(keep)
+        self._write_manifest()
+        for kind, name in previous.items():
+            if name != files[kind]:
+                self._path(name).unlink(missing_ok=True)
+        return int(doomed.size)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete by ``ids`` and/or a Chroma-style ``where`` metadata filter."""
+        where = kwargs.get("where")
+        with self._lock:
+            targets = set(ids or [])
+            if where:
+                targets.update(
+                    record["id"]
+                    for record in self._records
+                    if matches_where(record["metadata"], where)
+                )
+            removed = self._delete_ids(targets)
+        if removed:
+            logger.info(f"Deleted {removed} vectors from {self.persist_dir}")
+        return True
+
+    # ------------------------------------------------------------------ reads
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _document(record: Dict[str, Any]) -> Document:
+        return Document(
+            id=record["id"],
+            page_content=record["text"],
+            metadata=dict(record["metadata"]),
+        )
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("metadatas", "documents"),
+    ) -> Dict[str, Any]:
+        """Chroma-compatible ``get`` returning parallel lists."""
+        with self._lock:
+            count, vectors, records = self._count, self._vectors, self._records
+            if ids is not None:
+                rows = [self._rows[i] for i in ids if i in self._rows]
+            else:
+                rows = list(range(count))
+        if where:
+            rows = [
+                row for row in rows if matches_where(records[row]["metadata"], where)
+            ]
+        start = offset or 0
+        rows = rows[start : start + limit if limit is not None else None]
+
+        result: Dict[str, Any] = {"ids": [records[row]["id"] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [records[row]["text"] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [dict(records[row]["metadata"]) for row in rows]
+        if "embeddings" in include:
+            result["embeddings"] = (
+                np.asarray(vectors[rows])
+                if vectors is not None and rows
+                else np.empty((0, 0))
+            )
+        return result
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self._lock:
+            records = self._records
+            rows = [self._rows[i] for i in ids if i in self._rows]
+        return [self._document(records[row]) for row in rows]
+
+    def _candidate_rows(
+        self, records: List[Dict[str, Any]], count: int, where: Optional[Dict[str, Any]]
+    ) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        return np.array(
+            [
+                row
+                for row in range(count)
+                if matches_where(records[row]["metadata"], where)
+            ],
+            dtype=np.int64,
+        )
+
+    def search_vectors(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """Top-k ``(row, cosine similarity)`` pairs for each row of ``queries``."""
+        return self._search(self._snapshot(), queries, k, filter)
+
+    def _search(
+        self,
+        view: StoreView,
+        queries: np.ndarray,
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        queries = np.atleast_2d(queries)
+        if view.vectors is None or view.size == 0:
+            return [[] for _ in range(len(queries))]
+        queries = normalize_rows(queries)
+        rows = self._candidate_rows(view.records, view.size, filter)
+        matrix = view.vectors[: view.size] if rows is None else view.vectors[rows]
+        scores = queries @ matrix.T
+        results: List[List[Tuple[int, float]]] = []
+        for query_scores in scores:
+            best = top_k(query_scores, k)
+            picked = best if rows is None else rows[best]
+            results.append(
+                [(int(row), float(query_scores[i])) for row, i in zip(picked, best)]
+            )
+        return results
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Returns ``(document, cosine distance)``; lower is closer, like Chroma."""
+        view = self._snapshot()
+        hits = self._search(view, np.asarray([embedding], dtype=np.float32), k, filter)[
+            0
+        ]
+        return [(self._document(view.records[row]), 1.0 - score) for row, score in hits]
+
+    def similarity_search_by_vectors_with_score(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """Batched ``similarity_search_by_vector_with_score``: one matrix product."""
+        if len(embeddings) == 0:
+            return []
+        view = self._snapshot()
+        hits = self._search(view, np.asarray(embeddings, dtype=np.float32), k, filter)
+        return [
+            [
+                (self._document(view.records[row]), 1.0 - score)
+                for row, score in query_hits
+            ]
+            for query_hits in hits
+        ]
+
+    def similarity_search_by_vector_with_vectors(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Tuple[Document, float]], np.ndarray]:
+        """``(document, cosine distance)`` hits plus their stored unit vectors."""
+        view = self._snapshot()
+        hits = self._search(view, np.asarray([embedding], dtype=np.float32), k, filter)[
+            0
+        ]
+        if view.vectors is None or not hits:
+            return [], np.empty((0, len(embedding)), dtype=np.float32)
+        rows = np.fromiter((row for row, _ in hits), dtype=np.int64, count=len(hits))
+        pairs = [
+            (self._document(view.records[row]), 1.0 - score) for row, score in hits
+        ]
+        return pairs, np.asarray(view.vectors[rows])
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        embedding = self._embedding.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k, filter)
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_by_vector_with_score(
+                embedding, k, filter
+            )
+        ]
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._cosine_relevance_score_fn
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "FlatVectorStore":
+        store = cls(kwargs.pop("persist_directory"), embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+
+__all__ = ["FlatVectorStore", "StoreView", "matches_where", "normalize_rows", "top_k"]
@@ -0,0 +1,86 @@
+"""Hybrid retrieval: BM25 and vector search fused with reciprocal-rank fusion.
+
+Both rankers run concurrently and each returns ``fetch_k`` candidates; a
+chunk's fused score is ``sum(1 / (rrf_k + rank))`` over the rankings it
+appears in, so exact keyword hits (error codes, identifiers) surface even
+when their embeddings are not the nearest.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+from src.core.lexical_index import LexicalIndex
+
+logger = logging.getLogger(__name__)
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid")
+        return _EXECUTOR
+
+
+def _doc_key(doc: Document) -> Tuple[Any, ...]:
+    if doc.id:
+        return (doc.id,)
+    return (doc.metadata.get("source"), doc.metadata.get("chunk"), doc.page_content)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]], rrf_k: int = 60, k: Optional[int] = None
+) -> List[Tuple[Document, float]]:
+    """Fuse ranked lists; returns ``(document, fused score)`` best first."""
+    scores: Dict[Tuple[Any, ...], float] = {}
+    docs: Dict[Tuple[Any, ...], Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(docs[key], score) for key, score in ordered[:k]]
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever running vector and BM25 search in parallel, fused with RRF."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    store: VectorStore
+    lexical: LexicalIndex
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        fetch_k = max(self.fetch_k, self.k)
+        vector = _executor().submit(self.store.similarity_search, query, k=fetch_k)
+        lexical = _executor().submit(self.lexical.search, query, fetch_k)
+        keyword_hits = [doc for doc, _ in lexical.result()]
+        fused = reciprocal_rank_fusion(
+            [vector.result(), keyword_hits], rrf_k=self.rrf_k, k=self.k
+        )
+        logger.debug(
+            f"Hybrid retrieval fused {len(keyword_hits)} keyword hits into top-{self.k}"
+        )
+        return [doc for doc, _ in fused]
+
+
+__all__ = ["HybridRetriever", "reciprocal_rank_fusion"]
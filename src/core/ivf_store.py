@@ -0,0 +1,313 @@
+"""Approximate IVF (inverted-file) index on top of the flat NumPy store.
+
+Vectors, records and the manifest are stored exactly as in
+:mod:`src.core.flat_store`; the index adds
+
+- ``centroids.npy``: ``(nlist, dimension)`` coarse quantizer trained with
+  spherical k-means on a sample of the stored vectors.
+- ``assignments.npy``: list id of every live row.
+- ``index.json``: ``{"trained_count"}``, the vector count at the last
+  training, so the retrain schedule survives a reopen.
+
+In memory every list keeps its row ids and a contiguous copy of its vectors,
+so a query scores ``nprobe`` small dense blocks instead of the whole matrix.
+New vectors are assigned to their nearest centroid; the quantizer is retrained
+once the collection has grown ``retrain_growth`` times since the last training
+(or explicitly via :meth:`IVFVectorStore.train`). Until the first training the
+store answers with exact search.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.core.flat_store import (
+    FlatVectorStore,
+    StoreView,
+    _write_json_atomic,
+    matches_where,
+    normalize_rows,
+    top_k,
+)
+
+logger = logging.getLogger(__name__)
+
+_CENTROIDS = "centroids.npy"
+_ASSIGNMENTS = "assignments.npy"
+_INDEX = "index.json"
+_ASSIGN_BLOCK = 65536
+
+
+def _save_atomic(path: Path, array: np.ndarray) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as handle:
+        np.save(handle, array)
+    os.replace(tmp, path)
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest (max cosine) centroid per row, computed in bounded blocks."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK):
+        block = vectors[start : start + _ASSIGN_BLOCK]
+        out[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def kmeans(
+    vectors: np.ndarray, nlist: int, iterations: int = 20, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means over L2-normalized ``vectors``; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(vectors, centroids)
+        counts = np.bincount(labels, minlength=nlist)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        # reduceat over the label-sorted rows: one pass instead of np.add.at
+        sums[~empty] = np.add.reduceat(vectors[order], starts[~empty], axis=0)
+        if empty.any():
+            # Re-seed empty lists with random points so every list stays useful
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFVectorStore(FlatVectorStore):
+    """``FlatVectorStore`` with a k-means coarse quantizer and ``nprobe`` search.
+
+    ``nlist`` defaults to ``4 * sqrt(n)`` at training time. Training samples at
+    most ``train_size`` vectors and waits until ``min_train_size`` are stored.
+    """
+
+    def __init__(
+        self,
+        persist_dir: str | Path,
+        embedding: Embeddings,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        min_train_size: int = 10000,
+        train_size: int = 100000,
+        retrain_growth: float = 2.0,
+        iterations: int = 20,
+        seed: int = 0,
+    ) -> None:
+        if nprobe <= 0 or min_train_size <= 0 or retrain_growth <= 1.0:
+            raise ValueError(
+                "nprobe and min_train_size must be positive, retrain_growth > 1"
+            )
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.train_size = train_size
+        self.retrain_growth = retrain_growth
+        self.iterations = iterations
+        self.seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._list_rows: List[np.ndarray] = []
+        self._list_vectors: List[np.ndarray] = []
+        self._trained_count = 0
+        super().__init__(persist_dir, embedding)
+        self._load_index()
+
+    # ------------------------------------------------------------------ index
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def _load_index(self) -> None:
+        path = self._path(_CENTROIDS)
+        if not path.exists() or self._count == 0:
+            return
+        self._centroids = np.load(path)
+        assignments_path = self._path(_ASSIGNMENTS)
+        assignments = np.load(assignments_path) if assignments_path.exists() else None
+        if assignments is None or len(assignments) != self._count:
+            logger.warning(f"{self.persist_dir}: IVF assignments stale, reassigning")
+            assert self._vectors is not None
+            assignments = assign(self._vectors[: self._count], self._centroids)
+            _save_atomic(assignments_path, assignments)
+        self._assignments = assignments.astype(np.int32)
+        index_path = self._path(_INDEX)
+        # Indexes trained before index.json existed restart the schedule here
+        self._trained_count = (
+            int(json.loads(index_path.read_text())["trained_count"])
+            if index_path.exists()
+            else self._count
+        )
+        self._rebuild_lists()
+        logger.info(
+            f"Opened IVF index {self.persist_dir} "
+            f"(nlist={len(self._centroids)}, nprobe={self.nprobe})"
+        )
+
+    def _rebuild_lists(self) -> None:
+        assert self._centroids is not None and self._vectors is not None
+        order = np.argsort(self._assignments, kind="stable")
+        bounds = np.searchsorted(
+            self._assignments[order], np.arange(len(self._centroids) + 1)
+        )
+        live = self._vectors[: self._count]
+        self._list_rows = [
+            order[bounds[i] : bounds[i + 1]] for i in range(len(bounds) - 1)
+        ]
+        self._list_vectors = [
+            np.ascontiguousarray(live[rows]) for rows in self._list_rows
+        ]
+
+    def train(self, nlist: Optional[int] = None) -> None:
+        """(Re)train the quantizer on the stored vectors and rebuild all lists."""
+        with self._lock:
+            if self._count == 0 or self._vectors is None:
+                return
+            live = self._vectors[: self._count]
+            rng = np.random.default_rng(self.seed)
+            if self._count > self.train_size:
+                picked = np.sort(
+                    rng.choice(self._count, self.train_size, replace=False)
+                )
+                sample = np.asarray(live[picked])
+            else:
+                sample = np.asarray(live)
+            nlist = nlist or self.nlist or max(1, int(4 * math.sqrt(self._count)))
+            centroids = kmeans(sample, nlist, self.iterations, self.seed)
+            self._centroids = centroids
+            self._assignments = assign(live, centroids)
+            self._trained_count = self._count
+            self._rebuild_lists()
+            _save_atomic(self._path(_CENTROIDS), centroids)
+            _save_atomic(self._path(_ASSIGNMENTS), self._assignments)
+            _write_json_atomic(
+                self._path(_INDEX), {"trained_count": self._trained_count}
+            )
+        logger.info(
+            f"Trained IVF index {self.persist_dir}: {len(centroids)} lists "
+            f"over {self._count} vectors"
+        )
+
+    def _needs_training(self) -> bool:
+        if self._centroids is None:
+            return self._count >= self.min_train_size
+        return self._count >= self._trained_count * self.retrain_growth
+
+    def _after_append(self, start: int, matrix: np.ndarray) -> None:
+        if self._needs_training():
+            self.train()
+            return
+        if self._centroids is None:
+            return
+        labels = assign(matrix, self._centroids)
+        rows = np.arange(start, start + len(matrix))
+        # New outer lists and arrays (never in-place): snapshots taken by
+        # concurrent searches hold the old lists and must not see new rows
+        list_rows, list_vectors = list(self._list_rows), list(self._list_vectors)
+        for label in np.unique(labels):
+            picked = labels == label
+            list_rows[label] = np.concatenate([list_rows[label], rows[picked]])
+            list_vectors[label] = np.concatenate([list_vectors[label], matrix[picked]])
+        self._list_rows, self._list_vectors = list_rows, list_vectors
+        self._assignments = np.concatenate([self._assignments, labels])
+        _save_atomic(self._path(_ASSIGNMENTS), self._assignments)
+
+    def _after_compact(self, keep: np.ndarray) -> None:
+        if self._centroids is None:
+            return
+        self._assignments = self._assignments[keep]
+        if self._count == 0:
+            self._centroids = None
+            self._list_rows, self._list_vectors = [], []
+            for name in (_CENTROIDS, _ASSIGNMENTS, _INDEX):
+                self._path(name).unlink(missing_ok=True)
+            return
+        self._rebuild_lists()
+        _save_atomic(self._path(_ASSIGNMENTS), self._assignments)
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = [len(rows) for rows in self._list_rows]
+        return {
+            "vectors": self._count,
+            "trained": self.is_trained,
+            "nlist": len(sizes),
+            "nprobe": self.nprobe,
+            "largest_list": max(sizes, default=0),
+            "empty_lists": sum(1 for size in sizes if size == 0),
+        }
+
+    # ------------------------------------------------------------------ search
+
+    def _index_state(self) -> Any:
+        if self._centroids is None:
+            return None
+        return self._centroids, self._list_rows, self._list_vectors
+
+    def search_vectors(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """Like the flat search, but only scans the ``nprobe`` closest lists."""
+        return self._search(self._snapshot(), queries, k, filter, nprobe)
+
+    def _search(
+        self,
+        view: StoreView,
+        queries: np.ndarray,
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        if view.index is None:
+            return super()._search(view, queries, k, filter)
+        centroids, list_rows, list_vectors = view.index
+
+        queries = normalize_rows(np.atleast_2d(queries))
+        allowed = None
+        if filter:
+            records = view.records
+            allowed = np.fromiter(
+                (
+                    matches_where(records[row]["metadata"], filter)
+                    for row in range(view.size)
+                ),
+                dtype=bool,
+                count=view.size,
+            )
+        probes = min(nprobe or self.nprobe, len(centroids))
+        results: List[List[Tuple[int, float]]] = []
+        for query, coarse in zip(queries, queries @ centroids.T):
+            row_blocks, score_blocks = [], []
+            for label in top_k(coarse, probes):
+                rows, block = list_rows[label], list_vectors[label]
+                if allowed is not None:
+                    mask = allowed[rows]
+                    rows, block = rows[mask], block[mask]
+                if len(rows):
+                    row_blocks.append(rows)
+                    score_blocks.append(block @ query)
+            if not row_blocks:
+                results.append([])
+                continue
+            rows = np.concatenate(row_blocks)
+            scores = np.concatenate(score_blocks)
+            best = top_k(scores, k)
+            results.append([(int(rows[i]), float(scores[i])) for i in best])
+        return results
+
+
+__all__ = ["IVFVectorStore", "assign", "kmeans"]
@@ -0,0 +1,46 @@
+"""Deferred imports for provider classes.
+
+Provider SDKs (OpenAI, HuggingFace, Gemini, Ollama, Chroma, document loaders)
+dominate cold-start time, so modules list them in a table and resolve them
+only when a profile actually selects them::
+
+    _LAZY = {"ChatOpenAI": ("langchain_openai", "ChatOpenAI")}
+
+    def __getattr__(name):
+        return lazy_attr(globals(), _LAZY, name)
+
+Code inside the module calls ``lazy_attr(globals(), _LAZY, "ChatOpenAI")``.
+Resolved objects are stored in the module namespace, so later lookups are a
+dict hit and ``unittest.mock.patch("module.ChatOpenAI")`` keeps working.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Any, Dict, Mapping, Tuple
+
+# Optional providers resolve to None when their package is not installed.
+OPTIONAL = "optional"
+
+LazyTable = Mapping[str, Tuple[str, ...]]
+
+
+def lazy_attr(namespace: Dict[str, Any], table: LazyTable, name: str) -> Any:
+    if name in namespace:
+        return namespace[name]
+    try:
+        module_name, attr, *flags = table[name]
+    except KeyError:
+        module = namespace.get("__name__", "module")
+        raise AttributeError(f"module {module!r} has no attribute {name!r}") from None
+    try:
+        value = getattr(importlib.import_module(module_name), attr)
+    except ImportError:
+        if OPTIONAL not in flags:
+            raise
+        value = None
+    namespace[name] = value
+    return value
+
+
+__all__ = ["OPTIONAL", "lazy_attr"]
@@ -0,0 +1,131 @@
+"""Incrementally maintained BM25 keyword index (SQLite FTS5).
+
+Chunks live in a plain ``chunks`` table keyed by chunk ID; an external-content
+FTS5 table kept in sync by triggers holds the inverted index, so adds and
+deletes update postings in place instead of rebuilding anything. Identifiers
+such as ``ERR_CONN_RESET`` or ``E1234`` stay single tokens.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    text,
+    content='chunks',
+    content_rowid='rowid',
+    tokenize="unicode61 remove_diacritics 2 tokenchars '_'"
+);
+CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts (rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts (chunks_fts, rowid, text)
+    VALUES ('delete', old.rowid, old.text);
+END;
+"""
+
+# SQLite limits the number of host parameters per statement
+_SQL_BATCH = 500
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(query: str) -> str:
+    """FTS5 ``MATCH`` string OR-ing the query's terms (no user-facing syntax)."""
+    terms = dict.fromkeys(term.casefold() for term in _TERM.findall(query))
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class LexicalIndex:
+    """BM25 search over chunk texts, updated per chunk on add and delete."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _delete(self, ids: Sequence[str]) -> None:
+        for start in range(0, len(ids), _SQL_BATCH):
+            batch = ids[start : start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(
+                f"DELETE FROM chunks WHERE id IN ({placeholders})", tuple(batch)
+            )
+
+    def upsert(self, docs: Iterable[Document]) -> None:
+        rows = [
+            (doc.id, doc.page_content, json.dumps(doc.metadata or {}))
+            for doc in docs
+            if doc.id
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._delete([row[0] for row in rows])
+            self._conn.executemany(
+                "INSERT INTO chunks (id, text, metadata) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def delete(self, ids: Iterable[str]) -> None:
+        unique = list(dict.fromkeys(ids))
+        if not unique:
+            return
+        with self._lock:
+            self._delete(unique)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Top-``k`` chunks by BM25; scores are positive, higher is better."""
+        expression = match_expression(query)
+        if not expression or k <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.id, c.text, c.metadata, bm25(chunks_fts) AS score "
+                "FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY score LIMIT ?",
+                (expression, k),
+            ).fetchall()
+        # SQLite's bm25() is negated so that ascending order is best first
+        return [
+            (Document(id=chunk, page_content=text, metadata=json.loads(meta)), -score)
+            for chunk, text, meta, score in rows
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return int(count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+__all__ = ["LexicalIndex", "match_expression"]
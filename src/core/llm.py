@@ -1,32 +1,49 @@
+import asyncio
+import hashlib
 import logging
 import os
-from typing import Any, Optional, cast
+from typing import Any, Dict, List, Optional, Set
 
-import yaml
-from langchain_huggingface import ChatHuggingFace
-from langchain_openai import ChatOpenAI
+from src.core.config import load_config, load_profile
+from src.core.lazy import OPTIONAL, lazy_attr
+from src.core.pool import HandlePool, make_key
 
-try:  # pragma: no cover - optional dependency
-    from langchain_google_genai import ChatGoogleGenerativeAI as _ChatGoogleGenerativeAI
-except ImportError:  # pragma: no cover - optional dependency
-    _ChatGoogleGenerativeAI = None
+logger = logging.getLogger(__name__)
 
-ChatGoogleGenerativeAI = cast(Any, _ChatGoogleGenerativeAI)
+# Provider SDKs are imported on first use only (see src/core/lazy.py)
+_PROVIDERS = {
+    "ChatOpenAI": ("langchain_openai", "ChatOpenAI"),
+    "ChatHuggingFace": ("langchain_huggingface", "ChatHuggingFace"),
+    "ChatGoogleGenerativeAI": (
+        "langchain_google_genai",
+        "ChatGoogleGenerativeAI",
+        OPTIONAL,
+    ),
+    "EchoChatModel": ("src.core.offline", "EchoChatModel"),
+    "build_router": ("src.core.llm_router", "build_router"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    return lazy_attr(globals(), _PROVIDERS, name)
 
-logger = logging.getLogger(__name__)
 
+def _provider(name: str) -> Any:
+    return lazy_attr(globals(), _PROVIDERS, name)
 
-def _load_llm_cfg() -> dict:
-    """Load LLM profile from YAML with safe defaults."""
-    try:
-        with open("configs/llm.yml") as f:
-            cfg = yaml.safe_load(f) or {}
-    except FileNotFoundError:
-        cfg = {}
 
-    default_profile = cfg.get("default", "openai")
-    profile = os.getenv("LLM_PROFILE", default_profile)
-    section = cfg.get(profile, {})
+def _load_llm_cfg(profile: Optional[str] = None) -> dict:
+    """Load LLM profile from YAML with safe defaults.
+
+    ``profile`` selects a named profile instead of the active one (used for
+    the routes of a router profile).
+    """
+    if profile is None:
+        profile, loaded = load_profile("llm", "LLM_PROFILE", "openai", required=False)
+    else:
+        named = load_config("llm", required=False).get(profile)
+        loaded = dict(named) if isinstance(named, dict) else None
+    section = loaded if loaded is not None else {}
 
     # Provide minimal defaults for OpenAI
     if profile == "openai":
@@ -42,20 +59,128 @@ def _load_llm_cfg() -> dict:
     return section
 
 
-def get_llm(model: Optional[str] = None):
+def llm_max_concurrency() -> int:
+    """Parallel generation requests for batch answering (``max_concurrency``)."""
+    return max(1, int(_load_llm_cfg().get("max_concurrency", 4)))
+
+
+def llm_context_settings() -> Dict[str, Any]:
+    """Prompt-context budget of the active profile (see configs/llm.yml).
+
+    ``context_tokens`` is ``None`` when the profile sets no budget;
+    ``tokenizer`` is a tiktoken encoding name, ``approx``, or empty to pick
+    the encoding from ``model_name``.
+    """
+    cfg = _load_llm_cfg()
+    budget = cfg.get("context_tokens")
+    return {
+        "context_tokens": None if budget is None else int(budget),
+        "model_name": str(cfg.get("model_name") or ""),
+        "tokenizer": str(cfg.get("tokenizer") or ""),
+    }
+
+
+def llm_cache_key() -> str:
+    """Identity of the active chat model settings, for caching its answers."""
+    return make_key(_load_llm_cfg())
+
+
+_POOL_KEYS = ("pool_size", "max_keepalive", "keepalive_expiry")
+
+
+def _pool_settings(cfg: dict) -> Dict[str, Any]:
+    """HTTP connection pool settings of a profile (see configs/llm.yml).
+
+    Only the OpenAI client accepts injected httpx clients. Gemini talks gRPC
+    over the channel of its cached client, and Hugging Face uses the
+    process-wide session of ``huggingface_hub``.
+    """
+    return {
+        "pool_size": int(cfg.get("pool_size", 20)),
+        "max_keepalive": int(cfg.get("max_keepalive", 10)),
+        "keepalive_expiry": float(cfg.get("keepalive_expiry", 30.0)),
+    }
+
+
+# Keeps async-client closes scheduled by a sync close() alive until they finish
+_CLOSING: Set["asyncio.Task[None]"] = set()
+
+
+class _SharedHttpClients:
+    """Sync and async httpx clients sharing one pool configuration."""
+
+    def __init__(
+        self, pool_size: int, max_keepalive: int, keepalive_expiry: float
+    ) -> None:
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.client = httpx.Client(limits=limits)
+        self.async_client = httpx.AsyncClient(limits=limits)
+
+    def close(self) -> None:
+        """Close both clients from sync code.
+
+        Inside a running event loop the async client's close is scheduled on
+        that loop instead, since it cannot be awaited here.
+        """
+        self.client.close()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.async_client.aclose())
+        else:
+            task = loop.create_task(self.async_client.aclose())
+            _CLOSING.add(task)
+            task.add_done_callback(_CLOSING.discard)
+
+    async def aclose(self) -> None:
+        await self.async_client.aclose()
+        self.client.close()
+
+
+_HTTP_CLIENTS: HandlePool[_SharedHttpClients] = HandlePool("LLM HTTP client")
+_LLMS: HandlePool[Any] = HandlePool("chat model", closer=lambda _: None)
+
+
+def _http_clients(cfg: dict) -> _SharedHttpClients:
+    settings = _pool_settings(cfg)
+    return _HTTP_CLIENTS.get(make_key(settings), lambda: _SharedHttpClients(**settings))
+
+
+def _fingerprint(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()[:12]
+
+
+def get_llm(model: Optional[str] = None, profile: Optional[str] = None):
     """Return a simple chat LLM based on config/env.
 
+    Clients are cached per (provider, model, pool settings, credentials), so
+    repeated calls reuse the same client and its HTTP connections.
+
     Supports providers:
     - openai: requires OPENAI_API_KEY
     - huggingface: requires HF_TOKEN
+    - gemini: requires GOOGLE_API_KEY
+    - echo: offline stub for benchmarks, no credentials
+    - router: hedges and fails over between the profiles in ``routes``
+      (see src/core/llm_router.py)
     """
-    cfg = _load_llm_cfg()
+    cfg = _load_llm_cfg(profile)
     provider = cfg.get("provider", "openai")
     # Priority: explicit arg > config
     candidate_model = model or cfg.get("model_name")
     if not isinstance(candidate_model, str) or not candidate_model:
         raise ValueError("LLM model name must be a non-empty string in configuration")
     model_name = candidate_model
+    if provider != "openai" and any(key in cfg for key in _POOL_KEYS):
+        logger.warning(
+            f"Ignoring HTTP pool settings for {provider!r}: they apply to OpenAI only"
+        )
 
     if provider == "openai":
         api_key = os.getenv("OPENAI_API_KEY")
@@ -63,16 +188,30 @@ def get_llm(model: Optional[str] = None):
             raise EnvironmentError(
                 "OPENAI_API_KEY missing. Set it in your environment."
             )
-        logger.info(f"Using OpenAI Chat model: {model_name}")
-        # ChatOpenAI reads api key from env; we pass model only
-        return ChatOpenAI(model=model_name)
+
+        def build() -> Any:
+            logger.info(f"Using OpenAI Chat model: {model_name}")
+            shared = _http_clients(cfg)
+            # ChatOpenAI reads api key from env; connections come from the shared pool
+            return _provider("ChatOpenAI")(
+                model=model_name,
+                http_client=shared.client,
+                http_async_client=shared.async_client,
+            )
+
+        key = make_key(provider, model_name, _pool_settings(cfg), _fingerprint(api_key))
+        return _LLMS.get(key, build)
 
     if provider == "huggingface":
         token = os.getenv("HF_TOKEN")
         if not token:
             raise EnvironmentError("HF_TOKEN missing. Set it in your environment.")
-        logger.info(f"Using HuggingFace Chat model: {model_name}")
-        return ChatHuggingFace(repo_id=model_name, token=token)
+
+        def build() -> Any:
+            logger.info(f"Using HuggingFace Chat model: {model_name}")
+            return _provider("ChatHuggingFace")(repo_id=model_name, token=token)
+
+        return _LLMS.get(make_key(provider, model_name, _fingerprint(token)), build)
 
     if provider == "gemini":
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -80,12 +219,79 @@ def get_llm(model: Optional[str] = None):
             raise EnvironmentError(
                 "GOOGLE_API_KEY missing. Set it in your environment."
             )
-        logger.info(f"Using Gemini Chat model: {model_name}")
-        if ChatGoogleGenerativeAI is None:
+        chat_cls = _provider("ChatGoogleGenerativeAI")
+        if chat_cls is None:
             raise ImportError(
                 "langchain-google-genai not installed. Add it to dependencies."
             )
-        # ChatGoogleGenerativeAI reads GOOGLE_API_KEY from env
-        return ChatGoogleGenerativeAI(model=model_name)
+
+        def build() -> Any:
+            logger.info(f"Using Gemini Chat model: {model_name}")
+            # ChatGoogleGenerativeAI reads GOOGLE_API_KEY from env
+            return chat_cls(model=model_name)
+
+        return _LLMS.get(make_key(provider, model_name, _fingerprint(api_key)), build)
+
+    if provider == "echo":
+
+        def build() -> Any:
+            logger.info(f"Using offline echo chat model: {model_name}")
+            return _provider("EchoChatModel")(
+                model_name=model_name,
+                latency=float(cfg.get("latency", 0.0)),
+                tokens_per_second=float(cfg.get("tokens_per_second", 0.0)),
+                max_tokens=int(cfg.get("max_tokens", 64)),
+            )
+
+        settings = {
+            k: cfg.get(k) for k in ("latency", "tokens_per_second", "max_tokens")
+        }
+        return _LLMS.get(make_key(provider, model_name, settings), build)
+
+    if provider == "router":
+        names = [str(name) for name in cfg.get("routes") or []]
+
+        def build() -> Any:
+            routes = []
+            for name in names:
+                if _load_llm_cfg(name).get("provider") == "router":
+                    logger.warning(f"LLM router skips nested router profile {name!r}")
+                    continue
+                try:
+                    routes.append((name, get_llm(profile=name)))
+                except Exception as exc:
+                    logger.warning(f"LLM router skips profile {name!r}: {exc}")
+            if not routes:
+                raise ValueError("LLM router has no usable routes")
+            logger.info(
+                f"Using LLM router over: {', '.join(name for name, _ in routes)}"
+            )
+            return _provider("build_router")(routes, cfg)
+
+        routed = {name: _load_llm_cfg(name) for name in names}
+        return _LLMS.get(make_key(provider, model_name, cfg, routed), build)
 
     raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def llm_router_stats() -> List[Dict[str, Any]]:
+    """Per-route latency, hedging and circuit state of the cached routers."""
+    return [
+        llm.stats()
+        for llm in _LLMS.values()
+        if getattr(llm, "_llm_type", None) == "router"
+    ]
+
+
+def close_llms() -> None:
+    """Drop cached chat clients and close their shared sync and async HTTP pools."""
+    _LLMS.close()
+    _HTTP_CLIENTS.close()
+
+
+async def aclose_llms() -> None:
+    """Async variant of :func:`close_llms` that awaits the async HTTP clients' close."""
+    _LLMS.close()
+    for shared in _HTTP_CLIENTS.values():
+        await shared.aclose()
+    _HTTP_CLIENTS.refresh()
@@ -0,0 +1,587 @@
+"""Chat model router: per-call timeouts, hedged requests and circuit breaking.
+
+A ``provider: router`` profile in configs/llm.yml lists other profiles as
+``routes`` in priority order. A call goes to the first route whose circuit
+is closed:
+
+- If it has not answered after the route's hedge delay, the same request
+  is also sent to the next route. The delay is the ``hedge_percentile`` of
+  the route's recent latencies (``hedge_delay`` until ``hedge_min_samples``
+  calls were observed). The first response wins; the other request is
+  cancelled (async) or its result discarded (sync).
+- A route that fails or exceeds ``timeout`` is replaced by the next one.
+- After ``failure_threshold`` consecutive failures a route's circuit opens
+  for ``reset_timeout`` seconds, then lets one probe request through.
+
+Streams hedge on the first chunk, and ``timeout`` bounds the wait for it;
+once a stream has produced a chunk it is not switched.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, BaseMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 10 ms .. ~2 min, each bucket 1.5x the previous one
+_BOUNDS = tuple(0.01 * 1.5**i for i in range(24))
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=32, thread_name_prefix="llm-router"
+            )
+        return _EXECUTOR
+
+
+class LatencyHistogram:
+    """Bucketed latencies (seconds) with interpolated percentiles.
+
+    Counts halve every ``decay_every`` observations, so percentiles follow
+    recent latency rather than the whole process lifetime.
+    """
+
+    def __init__(
+        self, bounds: Sequence[float] = _BOUNDS, decay_every: int = 1000
+    ) -> None:
+        self.bounds = tuple(bounds)
+        self.decay_every = decay_every
+        self._counts = [0.0] * (len(self.bounds) + 1)
+        self._observed = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = next(
+            (i for i, bound in enumerate(self.bounds) if seconds <= bound),
+            len(self.bounds),
+        )
+        with self._lock:
+            self._counts[index] += 1
+            self._observed += 1
+            if self._observed % self.decay_every == 0:
+                self._counts = [count / 2 for count in self._counts]
+
+    @property
+    def count(self) -> int:
+        return self._observed
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Latency below which ``q`` percent of calls finished; None without data."""
+        with self._lock:
+            if self._observed < max(min_samples, 1):
+                return None
+            counts = list(self._counts)
+        rank = sum(counts) * min(max(q, 0.0), 100.0) / 100.0
+        cumulative = 0.0
+        for i, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"count": self._observed}
+        for q in (50, 95, 99):
+            value = self.percentile(q)
+            out[f"p{q}_ms"] = None if value is None else round(value * 1000, 1)
+        return out
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe)."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+
+    def _refresh(self) -> None:
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def available(self) -> bool:
+        """Whether :meth:`allow` would currently let a request through."""
+        with self._lock:
+            self._refresh()
+            return self._state == self.CLOSED or (
+                self._state == self.HALF_OPEN and not self._probing
+            )
+
+    def allow(self) -> bool:
+        """Admit a request; in half-open state only one probe at a time."""
+        with self._lock:
+            self._refresh()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """A request admitted by :meth:`allow` ended without an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self.trips += 1
+
+
+class Route:
+    """One chat model behind the router, with its latency and health state."""
+
+    def __init__(
+        self,
+        name: str,
+        model: BaseChatModel,
+        timeout: float = 30.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.name = name
+        self.model = model
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        # "invoke": whole responses; "stream": time to the first chunk
+        self.latency = {"invoke": LatencyHistogram(), "stream": LatencyHistogram()}
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "circuit": self.breaker.state,
+            "trips": self.breaker.trips,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "latency": self.latency["invoke"].snapshot(),
+            "first_chunk": self.latency["stream"].snapshot(),
+        }
+
+
+def _as_result(message: BaseMessage) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _chunk_text(chunk: BaseMessageChunk) -> str:
+    return chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+
+
+class RouterChatModel(BaseChatModel):
+    """Chat model that spreads each call over ``routes`` (see module docstring)."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    routes: List[Route]
+    hedge_percentile: float = 95.0
+    hedge_min_samples: int = 20
+    hedge_delay: float = 2.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "router"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedge_percentile": self.hedge_percentile,
+            "routes": [route.stats() for route in self.routes],
+        }
+
+    def _candidates(self) -> Tuple[List[Route], bool]:
+        """Routes to try in order, and whether their circuits are bypassed."""
+        healthy = [route for route in self.routes if route.breaker.available()]
+        if healthy:
+            return healthy, False
+        logger.warning("All LLM routes have open circuits; trying them anyway")
+        return list(self.routes), True
+
+    def _next_route(
+        self, queue: List[Route], forced: bool, hedge: bool
+    ) -> Optional[Route]:
+        while queue:
+            route = queue.pop(0)
+            if forced or route.breaker.allow():
+                route.requests += 1
+                route.hedges += int(hedge)
+                return route
+        return None
+
+    def _hedge_after(self, route: Route, kind: str) -> float:
+        observed = route.latency[kind].percentile(
+            self.hedge_percentile, self.hedge_min_samples
+        )
+        return self.hedge_delay if observed is None else observed
+
+    # Sync path: requests run on a shared thread pool; losers cannot be
+    # interrupted, so their late results are discarded.
+
+    def _timed(
+        self, route: Route, kind: str, start: Callable[[Route], T], deadline: float
+    ) -> T:
+        began = time.monotonic()
+        try:
+            result = start(route)
+        except Exception:
+            if time.monotonic() < deadline:  # else already counted as a timeout
+                route.failures += 1
+                route.breaker.record_failure()
+            raise
+        route.latency[kind].observe(time.monotonic() - began)
+        if time.monotonic() < deadline:
+            route.breaker.record_success()
+        return result
+
+    def _race(
+        self,
+        kind: str,
+        start: Callable[[Route], T],
+        discard: Optional[Callable[[T], None]] = None,
+    ) -> T:
+        queue, forced = self._candidates()
+        running: Dict["Future[T]", Tuple[Route, float]] = {}
+        error: Optional[BaseException] = None
+        hedge_at: Optional[float] = None
+
+        def launch(hedge: bool) -> None:
+            nonlocal hedge_at
+            route = self._next_route(queue, forced, hedge)
+            if route is None:
+                hedge_at = None
+                return
+            deadline = time.monotonic() + route.timeout
+            future = _executor().submit(self._timed, route, kind, start, deadline)
+            running[future] = (route, deadline)
+            hedge_at = (
+                time.monotonic() + self._hedge_after(route, kind) if queue else None
+            )
+
+        def abandon(future: "Future[T]", route: Route) -> None:
+            def done(f: "Future[T]") -> None:
+                if f.cancelled():  # never started, so no outcome was recorded
+                    route.breaker.release()
+                elif discard is not None and f.exception() is None:
+                    discard(f.result())
+
+            future.add_done_callback(done)
+
+        launch(hedge=False)
+        while running:
+            wake = min(
+                [deadline for _, deadline in running.values()]
+                + [hedge_at or float("inf")]
+            )
+            done, _ = wait(
+                list(running),
+                timeout=max(wake - time.monotonic(), 0.0),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                route, _ = running.pop(future)
+                if future.exception() is None:
+                    route.wins += 1
+                    for other, (loser, _) in running.items():
+                        other.cancel()
+                        abandon(other, loser)
+                    return future.result()
+                error = future.exception()
+                logger.warning(f"LLM route {route.name!r} failed: {error}")
+            now = time.monotonic()
+            for future, (route, deadline) in list(running.items()):
+                if now >= deadline:
+                    del running[future]
+                    route.timeouts += 1
+                    route.failures += 1
+                    route.breaker.record_failure()
+                    abandon(future, route)
+                    error = TimeoutError(
+                        f"LLM route {route.name!r} timed out after {route.timeout}s"
+                    )
+                    logger.warning(str(error))
+            if not running:
+                launch(hedge=False)  # failover
+            elif hedge_at is not None and now >= hedge_at:
+                launch(hedge=True)
+        raise error or RuntimeError("No LLM route available")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._race(
+            "invoke", lambda route: route.model.invoke(messages, stop=stop, **kwargs)
+        )
+        return _as_result(message)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        def start(
+            route: Route,
+        ) -> Tuple[Iterator[BaseMessageChunk], Optional[BaseMessageChunk]]:
+            chunks = iter(route.model.stream(messages, stop=stop, **kwargs))
+            return chunks, next(chunks, None)
+
+        def discard(opened: Tuple[Iterator[BaseMessageChunk], Any]) -> None:
+            close = getattr(opened[0], "close", None)
+            if callable(close):
+                close()
+
+        chunks, first = self._race("stream", start, discard)
+        if first is None:
+            return
+        for chunk in _prepend(first, chunks):
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(_chunk_text(chunk), chunk=generation)
+            yield generation
+
+    # Async path: losing requests are cancelled.
+
+    async def _atimed(
+        self, route: Route, kind: str, start: Callable[[Route], Awaitable[T]]
+    ) -> T:
+        began = time.monotonic()
+        try:
+            result = await asyncio.wait_for(start(route), route.timeout)
+        except asyncio.CancelledError:
+            route.breaker.release()
+            raise
+        except asyncio.TimeoutError:
+            route.timeouts += 1
+            route.failures += 1
+            route.breaker.record_failure()
+            raise TimeoutError(
+                f"LLM route {route.name!r} timed out after {route.timeout}s"
+            )
+        except Exception:
+            route.failures += 1
+            route.breaker.record_failure()
+            raise
+        route.latency[kind].observe(time.monotonic() - began)
+        route.breaker.record_success()
+        return result
+
+    async def _arace(
+        self,
+        kind: str,
+        start: Callable[[Route], Awaitable[T]],
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> T:
+        queue, forced = self._candidates()
+        running: Dict["asyncio.Task[T]", Route] = {}
+        error: Optional[BaseException] = None
+        hedge_after: Optional[float] = None
+
+        def launch(hedge: bool) -> None:
+            nonlocal hedge_after
+            route = self._next_route(queue, forced, hedge)
+            if route is None:
+                hedge_after = None
+                return
+            running[asyncio.ensure_future(self._atimed(route, kind, start))] = route
+            hedge_after = self._hedge_after(route, kind) if queue else None
+
+        launch(hedge=False)
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    list(running),
+                    timeout=hedge_after,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    launch(hedge=True)
+                    continue
+                for task in done:
+                    route = running.pop(task)
+                    if task.exception() is None:
+                        route.wins += 1
+                        return task.result()
+                    error = task.exception()
+                    logger.warning(f"LLM route {route.name!r} failed: {error}")
+                if not running:
+                    launch(hedge=False)  # failover
+        finally:
+            for task in running:
+                if task.done() and not task.cancelled() and task.exception() is None:
+                    if discard is not None:
+                        await discard(task.result())
+                else:
+                    task.cancel()
+        raise error or RuntimeError("No LLM route available")
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async def start(route: Route) -> BaseMessage:
+            return await route.model.ainvoke(messages, stop=stop, **kwargs)
+
+        return _as_result(await self._arace("invoke", start))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async def start(
+            route: Route,
+        ) -> Tuple[AsyncIterator[BaseMessageChunk], Optional[BaseMessageChunk]]:
+            chunks = route.model.astream(messages, stop=stop, **kwargs).__aiter__()
+            return chunks, await _anext(chunks)
+
+        async def discard(opened: Tuple[AsyncIterator[BaseMessageChunk], Any]) -> None:
+            close = getattr(opened[0], "aclose", None)
+            if callable(close):
+                await close()
+
+        chunks, first = await self._arace("stream", start, discard)
+        if first is None:
+            return
+        pending: Optional[BaseMessageChunk] = first
+        while pending is not None:
+            generation = ChatGenerationChunk(message=pending)
+            if run_manager:
+                await run_manager.on_llm_new_token(
+                    _chunk_text(pending), chunk=generation
+                )
+            yield generation
+            pending = await _anext(chunks)
+
+
+async def _anext(chunks: AsyncIterator[T]) -> Optional[T]:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def _prepend(first: T, rest: Iterator[T]) -> Iterator[T]:
+    yield first
+    yield from rest
+
+
+def build_router(
+    routes: Sequence[Tuple[str, BaseChatModel]], cfg: Dict[str, Any]
+) -> RouterChatModel:
+    """Router over ``(profile name, chat model)`` pairs (``provider: router``)."""
+    timeout = float(cfg.get("timeout", 30.0))
+    return RouterChatModel(
+        routes=[
+            Route(
+                name,
+                model,
+                timeout=timeout,
+                breaker=CircuitBreaker(
+                    failure_threshold=int(cfg.get("failure_threshold", 5)),
+                    reset_timeout=float(cfg.get("reset_timeout", 30.0)),
+                ),
+            )
+            for name, model in routes
+        ],
+        hedge_percentile=float(cfg.get("hedge_percentile", 95.0)),
+        hedge_min_samples=int(cfg.get("hedge_min_samples", 20)),
+        hedge_delay=float(cfg.get("hedge_delay", 2.0)),
+    )
+
+
+__all__ = [
+    "CircuitBreaker",
+    "LatencyHistogram",
+    "Route",
+    "RouterChatModel",
+    "build_router",
+]
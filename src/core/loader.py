@@ -1,15 +1,38 @@
 import os
 import logging
-from typing import Union
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    UnstructuredFileLoader,
-)
+from typing import TYPE_CHECKING, Any, Union
+
 from langchain_core.documents import Document
 
+from src.core.lazy import lazy_attr
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from langchain_community.document_loaders import (
+        PyPDFLoader,
+        TextLoader,
+        UnstructuredFileLoader,
+    )
+
 logger = logging.getLogger(__name__)
 
+# Loaders are imported when a file of their type is loaded (see src/core/lazy.py)
+_LOADERS = {
+    "PyPDFLoader": ("langchain_community.document_loaders", "PyPDFLoader"),
+    "TextLoader": ("langchain_community.document_loaders", "TextLoader"),
+    "UnstructuredFileLoader": (
+        "langchain_community.document_loaders",
+        "UnstructuredFileLoader",
+    ),
+}
+
+
+def __getattr__(name: str) -> Any:
+    return lazy_attr(globals(), _LOADERS, name)
+
+
+def _loader(name: str) -> Any:
+    return lazy_attr(globals(), _LOADERS, name)
+
 
 def load_documents(path: str) -> list[Document]:
     if not os.path.exists(path):
@@ -21,16 +44,16 @@ def load_documents(path: str) -> list[Document]:
 
     logger.info(f"Loading document: {path} (size: {file_size} bytes, type: {ext})")
 
-    loader: Union[PyPDFLoader, TextLoader, UnstructuredFileLoader]
+    loader: Union["PyPDFLoader", "TextLoader", "UnstructuredFileLoader"]
     if ext == ".pdf":
         logger.debug("Using PyPDFLoader for PDF file")
-        loader = PyPDFLoader(path)
+        loader = _loader("PyPDFLoader")(path)
     elif ext in (".txt", ".md"):
         logger.debug(f"Using TextLoader for {ext} file")
-        loader = TextLoader(path)
+        loader = _loader("TextLoader")(path)
     else:
         logger.debug(f"Using UnstructuredFileLoader for {ext} file")
-        loader = UnstructuredFileLoader(path)
+        loader = _loader("UnstructuredFileLoader")(path)
 
     try:
         docs = loader.load()
@@ -0,0 +1,165 @@
+"""Maximal marginal relevance (MMR) over candidates fetched with their vectors.
+
+LangChain's Chroma ``mmr`` search runs the similarity query and then scores
+candidates pairwise in Python. Here the candidates' vectors come back from
+the same query: flat/IVF stores return their stored rows, and Chroma returns
+``include=["embeddings"]``. Greedy selection then keeps a running
+"max similarity to anything selected" vector, so each pick costs one
+``(fetch_k, dim)`` matrix-vector product.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+from src.core.flat_store import normalize_rows
+from src.core.sharded_store import search_by_vector
+
+Candidates = Tuple[List[Tuple[Document, float]], np.ndarray]
+
+
+def mmr_select(
+    query: Sequence[float] | np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """Greedy MMR; returns candidate row indices in selection order.
+
+    Each step picks ``argmax(lambda * sim(query, c) - (1 - lambda) * max
+    sim(c, selected))`` over cosine similarities, as LangChain does.
+    """
+    count = len(candidates)
+    if count == 0 or k <= 0:
+        return []
+    matrix = normalize_rows(np.asarray(candidates, dtype=np.float32).reshape(count, -1))
+    target = normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+    similarity = matrix @ target
+    relevance = lambda_mult * similarity
+
+    first = int(np.argmax(similarity))
+    picks = [first]
+    redundancy = matrix @ matrix[first]
+    available = np.ones(count, dtype=bool)
+    available[first] = False
+    for _ in range(min(k, count) - 1):
+        scores = relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picks.append(best)
+        available[best] = False
+        np.maximum(redundancy, matrix @ matrix[best], out=redundancy)
+    return picks
+
+
+def _chroma_candidates(
+    store: Any, embedding: Sequence[float], k: int, filter: Optional[Dict[str, Any]]
+) -> Candidates:
+    result = store._collection.query(
+        query_embeddings=[list(embedding)],
+        n_results=k,
+        where=filter,
+        include=["documents", "metadatas", "distances", "embeddings"],
+    )
+    ids = result["ids"][0]
+    pairs = [
+        (
+            Document(id=chunk, page_content=text or "", metadata=meta or {}),
+            float(distance),
+        )
+        for chunk, text, meta, distance in zip(
+            ids, result["documents"][0], result["metadatas"][0], result["distances"][0]
+        )
+    ]
+    vectors = result["embeddings"][0] if ids else []
+    return pairs, np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+
+
+def search_with_vectors(
+    store: VectorStore,
+    embedding: Sequence[float],
+    k: int,
+    filter: Optional[Dict[str, Any]] = None,
+) -> Candidates:
+    """Top-``k`` ``(document, distance)`` pairs plus a matrix of their vectors."""
+    shards = getattr(store, "shards", None)
+    if shards is not None:
+        parts = store._fan_out(  # type: ignore[attr-defined]
+            lambda shard: search_with_vectors(shard, embedding, k, filter)
+        )
+        pairs = [pair for part_pairs, _ in parts for pair in part_pairs]
+        if not pairs:
+            return [], np.empty((0, len(embedding)), dtype=np.float32)
+        vectors = np.concatenate(
+            [part_vectors for _, part_vectors in parts if len(part_vectors)]
+        )
+        order = np.argsort([distance for _, distance in pairs], kind="stable")[:k]
+        return [pairs[i] for i in order], vectors[order]
+    if hasattr(store, "similarity_search_by_vector_with_vectors"):
+        return store.similarity_search_by_vector_with_vectors(embedding, k, filter)
+    if hasattr(store, "_collection"):
+        return _chroma_candidates(store, embedding, k, filter)
+    # Unknown store: re-embed the candidate texts
+    pairs = search_by_vector(store, list(embedding), k, filter)
+    embeddings = store.embeddings
+    if embeddings is None or not pairs:
+        return pairs, np.empty((0, len(embedding)), dtype=np.float32)
+    texts = [doc.page_content for doc, _ in pairs]
+    return pairs, np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+
+def max_marginal_relevance_search(
+    store: VectorStore,
+    embedding: Sequence[float],
+    k: int = 4,
+    fetch_k: int = 20,
+    lambda_mult: float = 0.5,
+    filter: Optional[Dict[str, Any]] = None,
+) -> List[Document]:
+    """``k`` diverse documents out of the ``fetch_k`` nearest to ``embedding``.
+
+    Like LangChain's Chroma MMR, the picks are returned nearest first.
+    """
+    pairs, vectors = search_with_vectors(store, embedding, max(fetch_k, k), filter)
+    picks = mmr_select(embedding, vectors, k, lambda_mult)
+    return [pairs[i][0] for i in sorted(picks)]
+
+
+class MMRRetriever(BaseRetriever):
+    """Retriever that diversifies the ``fetch_k`` nearest chunks down to ``k``."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    store: VectorStore
+    k: int = 4
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embeddings = self.store.embeddings
+        if embeddings is None:
+            raise ValueError("MMR retrieval needs a store with an embedding function")
+        return max_marginal_relevance_search(
+            self.store,
+            embeddings.embed_query(query),
+            self.k,
+            self.fetch_k,
+            self.lambda_mult,
+        )
+
+
+__all__ = [
+    "MMRRetriever",
+    "max_marginal_relevance_search",
+    "mmr_select",
+    "search_with_vectors",
+]
@@ -0,0 +1,170 @@
+"""Deterministic, network-free providers for tests and benchmarks.
+
+- ``HashingEmbeddings`` (``provider: hashing`` in configs/embeddings.yml):
+  signed feature hashing of word unigrams and bigrams into a fixed-size,
+  L2-normalized NumPy vector.
+- ``EchoChatModel`` (``provider: echo`` in configs/llm.yml): a chat model that
+  answers with the question and the start of the context, with configurable
+  first-token latency and token rate so pipeline timings stay realistic.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=65536)
+def _feature(token: str, dimension: int) -> Tuple[int, float]:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimension, 1.0 if (value >> 63) & 1 else -1.0
+
+
+class HashingEmbeddings(Embeddings):
+    """Stateless feature-hashing embedder; identical text gives identical vectors."""
+
+    def __init__(self, dimension: int = 384) -> None:
+        if dimension <= 0:
+            raise ValueError("dimension must be positive")
+        self.dimension = dimension
+
+    def _vector(self, text: str) -> np.ndarray:
+        words = _TOKEN.findall(text.casefold())
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        if not tokens:
+            return np.zeros(self.dimension, dtype=np.float32)
+        features = [_feature(token, self.dimension) for token in tokens]
+        index = np.fromiter(
+            (i for i, _ in features), dtype=np.int64, count=len(features)
+        )
+        signs = np.fromiter(
+            (s for _, s in features), dtype=np.float64, count=len(features)
+        )
+        vector = np.bincount(index, weights=signs, minlength=self.dimension)
+        vector = vector.astype(np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text).tolist()
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(message.content) for message in messages)
+
+
+class EchoChatModel(BaseChatModel):
+    """Local stub chat model with simulated latency.
+
+    ``latency`` is the delay before the first token (seconds) and
+    ``tokens_per_second`` the generation rate (0 disables the delay).
+    """
+
+    model_name: str = "echo"
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    max_tokens: int = 64
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _reply_tokens(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = _prompt_text(messages)
+        question = ""
+        context = prompt
+        if "Question:" in prompt:
+            head, _, tail = prompt.rpartition("Question:")
+            question = tail.split("\n", 1)[0].strip()
+            context = head
+        if "Context:" in context:
+            context = context.split("Context:", 1)[1]
+        words = context.split()
+        budget = max(self.max_tokens - len(question.split()) - 1, 0)
+        text = " ".join(part for part in ["Echo:", question, *words[:budget]] if part)
+        # Keep whitespace attached so streamed chunks concatenate to the full text
+        return re.findall(r"\S+\s*", text)
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._reply_tokens(messages)
+        time.sleep(self.latency + self._token_delay() * len(tokens))
+        message = AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._reply_tokens(messages)
+        await asyncio.sleep(self.latency + self._token_delay() * len(tokens))
+        message = AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        delay = self._token_delay()
+        for token in self._reply_tokens(messages):
+            if delay:
+                time.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        delay = self._token_delay()
+        for token in self._reply_tokens(messages):
+            if delay:
+                await asyncio.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+__all__ = ["EchoChatModel", "HashingEmbeddings"]
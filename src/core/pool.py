@@ -0,0 +1,82 @@
+"""Process-wide pools of long-lived client handles.
+
+Embedders, vector stores and chat models are expensive to build (HTTP clients,
+SQLite connections, index loads), so they are created once per configuration
+and shared by every request. Pools are safe to use from FastAPI's threadpool.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable pool key from config sections and other plain values."""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+def _close_quietly(handle: Any) -> None:
+    close = getattr(handle, "close", None)
+    if not callable(close):
+        return
+    try:
+        close()
+    except Exception:
+        logger.exception("Failed to close pooled handle %r", handle)
+
+
+class HandlePool(Generic[T]):
+    """Keyed cache of handles with explicit refresh and close hooks."""
+
+    def __init__(self, name: str, closer: Callable[[T], None] = _close_quietly) -> None:
+        self.name = name
+        self._closer = closer
+        self._handles: Dict[Hashable, T] = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, factory: Callable[[], T]) -> T:
+        handle = self._handles.get(key)
+        if handle is not None:
+            return handle
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                logger.info(f"Creating pooled {self.name} handle")
+                handle = factory()
+                self._handles[key] = handle
+            return handle
+
+    def peek(self, key: Hashable) -> Optional[T]:
+        return self._handles.get(key)
+
+    def values(self) -> List[T]:
+        with self._lock:
+            return list(self._handles.values())
+
+    def refresh(self, key: Optional[Hashable] = None) -> None:
+        """Drop one handle (or all) so the next ``get`` rebuilds it."""
+        with self._lock:
+            if key is None:
+                dropped: List[T] = list(self._handles.values())
+                self._handles.clear()
+            else:
+                handle = self._handles.pop(key, None)
+                dropped = [] if handle is None else [handle]
+        for handle in dropped:
+            self._closer(handle)
+
+    def close(self) -> None:
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+
+__all__ = ["HandlePool", "make_key"]
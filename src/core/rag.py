@@ -1,10 +1,35 @@
+import asyncio
 import logging
-from typing import Any, Dict, List, TypedDict
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+    Union,
+)
 
 from langchain_core.documents import Document
 
-from src.core.retriever import get_retriever
-from src.core.llm import get_llm
+from src.core.answer_cache import AnswerCache, answer_key, build_answer_cache, chunk_ref
+from src.core.config import load_config
+from src.core.context import PackedContext, pack_context, token_counter
+from src.core.embedding_cache import normalize_query
+from src.core.llm import (
+    get_llm,
+    llm_cache_key,
+    llm_context_settings,
+    llm_max_concurrency,
+)
+from src.core.pool import HandlePool, make_key
+from src.core.retriever import get_retriever, retrieve_many
+from src.core.singleflight import AsyncSingleFlight, SingleFlight
+from src.core.vector_store import add_chunk_listener, vector_store_key
 
 logger = logging.getLogger(__name__)
 
@@ -36,28 +61,391 @@ def _build_prompt(context: str, question: str) -> str:
     )
 
 
-def answer(query: str, k: int = 4) -> Dict[str, Any]:
-    """Minimal RAG call: Retriever -> Prompt -> LLM -> Answer + Sources.
+def _context(docs: List[Document]) -> PackedContext:
+    """Pack ``docs`` into the LLM profile's ``context_tokens`` budget."""
+    settings = llm_context_settings()
+    overlap = load_config("chunking", required=False).get("chunk_overlap")
+    packed = pack_context(
+        docs,
+        budget=settings["context_tokens"],
+        count=token_counter(settings["model_name"], settings["tokenizer"]),
+        # Neighbouring chunks share up to chunk_overlap characters (plus a separator)
+        max_overlap=None if overlap is None else 2 * int(overlap),
+    )
+    logger.info(
+        f"Context: {packed.tokens} tokens from {len(packed.documents)} of "
+        f"{len(docs)} chunks (unpacked {packed.raw_tokens} tokens)"
+    )
+    return packed
+
+
+_NO_ANSWER = "No relevant information found."
+
+_ANSWER_CACHES: HandlePool[AnswerCache] = HandlePool("answer cache")
+
+Remember = Callable[[Dict[str, Any]], None]
+
+
+def _invalidate_answers(chunk_ids: List[str]) -> None:
+    for cache in _ANSWER_CACHES.values():
+        dropped = cache.invalidate(chunk_ids)
+        if dropped:
+            logger.info(f"Dropped {dropped} cached answers built on removed chunks")
+
+
+def _answer_cache() -> Optional[AnswerCache]:
+    cfg = load_config("answer_cache", required=False)
+    if not cfg or not cfg.get("enabled", True):
+        return None
+    add_chunk_listener(_invalidate_answers)
+    return _ANSWER_CACHES.get(make_key(cfg), lambda: build_answer_cache(cfg))
+
+
+def answer_cache_stats() -> List[Dict[str, Any]]:
+    """Hit/miss counters of the generated-answer cache."""
+    return [cache.stats() for cache in _ANSWER_CACHES.values()]
+
+
+def clear_answer_cache() -> None:
+    """Drop every cached answer."""
+    for cache in _ANSWER_CACHES.values():
+        cache.clear()
+
+
+# Concurrent identical questions share one pipeline run (see singleflight.py)
+_FLIGHTS: SingleFlight[Dict[str, Any]] = SingleFlight("answer")
+_ASYNC_FLIGHTS: AsyncSingleFlight[Dict[str, Any]] = AsyncSingleFlight("aanswer")
+
+
+def _flight_key(query: str, k: int) -> str:
+    return make_key(normalize_query(query), k, llm_cache_key(), vector_store_key())
+
+
+def singleflight_stats() -> List[Dict[str, Any]]:
+    """Executions and coalesced callers of ``answer``/``aanswer``."""
+    return [_FLIGHTS.stats(), _ASYNC_FLIGHTS.stats()]
+
 
-    Returns a dict: {"answer": str, "sources": [{"source": str, "chunk": int}]}
+def _skip(result: Dict[str, Any]) -> None:
+    return None
+
+
+def _cached_answer(
+    question: str, packed: PackedContext
+) -> Tuple[Optional[Dict[str, Any]], Remember]:
+    """Cached result for ``question`` over ``packed``, and a callback storing a new one.
+
+    Cache failures are logged and treated as misses.
+    """
+    cache = _answer_cache()
+    if cache is None:
+        return None, _skip
+    refs = [chunk_ref(doc) for doc in packed.documents]
+    key = answer_key(question, refs, llm_cache_key(), packed.tokens)
+
+    def remember(result: Dict[str, Any]) -> None:
+        try:
+            cache.put(key, result, refs)
+        except Exception:
+            logger.exception("Storing answer in cache failed")
+
+    try:
+        hit = cache.get(key)
+    except Exception:
+        logger.exception("Answer cache lookup failed")
+        hit = None
+    if hit is not None:
+        logger.info("Answer cache hit")
+    return hit, remember
+
+
+def _prepare(
+    question: str, docs: List[Document]
+) -> Tuple[PackedContext, Optional[Dict[str, Any]], Remember]:
+    """Packed context, cached answer (or None) and the callback storing a new one.
+
+    Token counting and cache I/O block, so async callers run this in a thread.
     """
+    packed = _context(docs)
+    cached, remember = _cached_answer(question, packed)
+    return packed, cached, remember
+
+
+def _retrieve(query: str, k: int) -> List[Document]:
     retriever = get_retriever(k=k)
     logger.info(f"Retrieving top-{k} documents for query: {query!r}")
     # Prefer modern LangChain retriever API; fall back if needed
     if hasattr(retriever, "invoke"):
-        docs = retriever.invoke(query)
-    else:  # pragma: no cover - legacy path
-        docs = retriever.get_relevant_documents(query)
+        return retriever.invoke(query)
+    return retriever.get_relevant_documents(query)  # pragma: no cover - legacy path
+
 
+async def _aretrieve(query: str, k: int) -> List[Document]:
+    # Building the retriever reads config and may open the store on first use
+    retriever = await asyncio.to_thread(get_retriever, k=k)
+    logger.info(f"Retrieving top-{k} documents for query: {query!r}")
+    return await retriever.ainvoke(query)
+
+
+def _answer_result(resp: Any, packed: PackedContext) -> Dict[str, Any]:
+    return {
+        "answer": getattr(resp, "content", str(resp)),
+        "sources": _format_sources(packed.documents),
+        "context_tokens": packed.tokens,
+    }
+
+
+def answer(query: str, k: int = 4) -> Dict[str, Any]:
+    """Minimal RAG call: Retriever -> Prompt -> LLM -> Answer + Sources.
+
+    Retrieved chunks are packed into the LLM profile's token budget (see
+    ``src/core/context.py``); sources list the chunks that made it into
+    the prompt.
+
+    Concurrent calls with the same normalized question, ``k`` and profiles
+    share one execution and its result.
+
+    Returns a dict: {"answer": str, "sources": [{"source": str, "chunk": int}],
+    "context_tokens": int}
+    """
+    return _FLIGHTS.do(_flight_key(query, k), lambda: _answer(query, k))
+
+
+def _answer(query: str, k: int) -> Dict[str, Any]:
+    docs = _retrieve(query, k)
     if not docs:
-        return {"answer": "No relevant information found.", "sources": []}
+        return {"answer": _NO_ANSWER, "sources": []}
 
-    context = "\n\n".join(d.page_content for d in docs)
-    prompt = _build_prompt(context, query)
+    logger.info(f"Using {len(docs)} retrieved chunks as context")
+    packed, cached, remember = _prepare(query, docs)
+    if cached is not None:
+        return cached
+    prompt = _build_prompt(packed.text, query)
 
     llm = get_llm()
     logger.info("Querying LLM with retrieved context")
     resp = llm.invoke(prompt)
-    text = getattr(resp, "content", str(resp))
+    result = _answer_result(resp, packed)
+    remember(result)
+    return result
+
+
+async def aanswer(query: str, k: int = 4) -> Dict[str, Any]:
+    """Async variant of :func:`answer` (``ainvoke`` on retriever and chat model).
+
+    Identical concurrent calls are coalesced the same way; the shared run is
+    cancelled only when every caller waiting on it has been cancelled.
+    """
+    return await _ASYNC_FLIGHTS.do(_flight_key(query, k), lambda: _aanswer(query, k))
+
+
+async def _aanswer(query: str, k: int) -> Dict[str, Any]:
+    docs = await _aretrieve(query, k)
+    if not docs:
+        return {"answer": _NO_ANSWER, "sources": []}
+
+    logger.info(f"Using {len(docs)} retrieved chunks as context")
+    packed, cached, remember = await asyncio.to_thread(_prepare, query, docs)
+    if cached is not None:
+        return cached
+    prompt = _build_prompt(packed.text, query)
+
+    llm = await asyncio.to_thread(get_llm)
+    logger.info("Querying LLM with retrieved context")
+    resp = await llm.ainvoke(prompt)
+    result = _answer_result(resp, packed)
+    await asyncio.to_thread(remember, result)
+    return result
+
+
+def _token_event(piece: Any) -> Optional[Dict[str, Any]]:
+    text = getattr(piece, "content", piece)
+    if not text:
+        return None
+    return {"event": "token", "text": text if isinstance(text, str) else str(text)}
+
+
+def _sources_event(packed: Optional[PackedContext]) -> Dict[str, Any]:
+    if packed is None:
+        return {"event": "sources", "sources": []}
+    return {
+        "event": "sources",
+        "sources": _format_sources(packed.documents),
+        "context_tokens": packed.tokens,
+    }
+
+
+def answer_stream(query: str, k: int = 4) -> Iterator[Dict[str, Any]]:
+    """Streaming variant of :func:`answer`.
+
+    Yields ``{"event": "token", "text": str}`` for every piece of the answer
+    as the chat model streams it, then one ``{"event": "sources", "sources":
+    [...], "context_tokens": int}``. Retrieval runs when iteration starts.
+    """
+    docs = _retrieve(query, k)
+    if not docs:
+        yield {"event": "token", "text": _NO_ANSWER}
+        yield _sources_event(None)
+        return
+
+    packed, cached, remember = _prepare(query, docs)
+    if cached is not None:
+        yield {"event": "token", "text": cached.get("answer", "")}
+        yield _sources_event(packed)
+        return
+    prompt = _build_prompt(packed.text, query)
+    logger.info("Streaming LLM answer with retrieved context")
+    pieces: List[str] = []
+    for piece in get_llm().stream(prompt):
+        event = _token_event(piece)
+        if event:
+            pieces.append(event["text"])
+            yield event
+    remember(_answer_result("".join(pieces), packed))
+    yield _sources_event(packed)
+
 
-    return {"answer": text, "sources": _format_sources(docs)}
+async def aanswer_stream(
+    query: str, k: int = 4
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Async variant of :func:`answer_stream` (``ainvoke``/``astream``).
+
+    Closing the generator (e.g. when the client disconnects) cancels the
+    in-flight LLM stream.
+    """
+    docs = await _aretrieve(query, k)
+    if not docs:
+        yield {"event": "token", "text": _NO_ANSWER}
+        yield _sources_event(None)
+        return
+
+    packed, cached, remember = await asyncio.to_thread(_prepare, query, docs)
+    if cached is not None:
+        yield {"event": "token", "text": cached.get("answer", "")}
+        yield _sources_event(packed)
+        return
+    prompt = _build_prompt(packed.text, query)
+    logger.info("Streaming LLM answer with retrieved context")
+    pieces: List[str] = []
+    llm = await asyncio.to_thread(get_llm)
+    async for piece in llm.astream(prompt):
+        event = _token_event(piece)
+        if event:
+            pieces.append(event["text"])
+            yield event
+    await asyncio.to_thread(remember, _answer_result("".join(pieces), packed))
+    yield _sources_event(packed)
+
+
+Retrieved = Sequence[Union[List[Document], Exception]]
+Pending = List[Tuple[int, PackedContext, Remember]]
+
+
+def _batch_prompts(
+    questions: List[str], retrieved: Retrieved
+) -> Tuple[List[Dict[str, Any]], Pending, List[str]]:
+    results: List[Dict[str, Any]] = [{} for _ in questions]
+    pending: Pending = []
+    for i, docs in enumerate(retrieved):
+        if isinstance(docs, Exception):
+            results[i] = {"error": str(docs)}
+        elif not docs:
+            results[i] = {"answer": _NO_ANSWER, "sources": []}
+        else:
+            packed, cached, remember = _prepare(questions[i], docs)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, packed, remember))
+    prompts = [_build_prompt(packed.text, questions[i]) for i, packed, _ in pending]
+    return results, pending, prompts
+
+
+def _batch_results(
+    results: List[Dict[str, Any]], pending: Pending, responses: Sequence[Any]
+) -> List[Dict[str, Any]]:
+    for (i, packed, remember), resp in zip(pending, responses):
+        if isinstance(resp, Exception):
+            results[i] = {"error": str(resp)}
+        else:
+            results[i] = _answer_result(resp, packed)
+            remember(results[i])
+    failed = sum("error" in item for item in results)
+    if failed:
+        logger.warning(f"Batch answering: {failed} of {len(results)} questions failed")
+    return results
+
+
+def answer_many(
+    questions: Sequence[str], k: int = 4, max_concurrency: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Batch RAG over many questions.
+
+    Questions are embedded in one call and searched as one multi-query
+    request (see ``retrieve_many``); prompts are generated with the chat
+    model's ``batch`` with at most ``max_concurrency`` requests in flight
+    (default: the LLM profile's ``max_concurrency``).
+
+    Returns one dict per question, in order: ``{"answer", "sources"}``, or
+    ``{"error": str}`` when that question failed.
+    """
+    questions = list(questions)
+    if not questions:
+        return []
+    concurrency = max_concurrency or llm_max_concurrency()
+    try:
+        retrieved = retrieve_many(questions, k=k, max_concurrency=concurrency)
+    except Exception as exc:
+        logger.exception("Batch retrieval failed")
+        return [{"error": str(exc)} for _ in questions]
+
+    results, pending, prompts = _batch_prompts(questions, retrieved)
+    if not pending:
+        return results
+    logger.info(f"Generating {len(prompts)} answers, max_concurrency={concurrency}")
+    try:
+        responses = get_llm().batch(
+            prompts, config={"max_concurrency": concurrency}, return_exceptions=True
+        )
+    except Exception as exc:
+        logger.exception("Batch generation failed")
+        responses = [exc] * len(prompts)
+    return _batch_results(results, pending, responses)
+
+
+async def aanswer_many(
+    questions: Sequence[str], k: int = 4, max_concurrency: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Async variant of :func:`answer_many`.
+
+    The multi-query retrieval runs in a worker thread; generation uses the
+    chat model's ``abatch``.
+    """
+    questions = list(questions)
+    if not questions:
+        return []
+    concurrency = max_concurrency or llm_max_concurrency()
+    try:
+        retrieved = await asyncio.to_thread(
+            retrieve_many, questions, k=k, max_concurrency=concurrency
+        )
+    except Exception as exc:
+        logger.exception("Batch retrieval failed")
+        return [{"error": str(exc)} for _ in questions]
+
+    # Context packing and answer-cache I/O block, so they run in threads too
+    results, pending, prompts = await asyncio.to_thread(
+        _batch_prompts, questions, retrieved
+    )
+    if not pending:
+        return results
+    logger.info(f"Generating {len(prompts)} answers, max_concurrency={concurrency}")
+    try:
+        llm = await asyncio.to_thread(get_llm)
+        responses = await llm.abatch(
+            prompts, config={"max_concurrency": concurrency}, return_exceptions=True
+        )
+    except Exception as exc:
+        logger.exception("Batch generation failed")
+        responses = [exc] * len(prompts)
+    return await asyncio.to_thread(_batch_results, results, pending, responses)
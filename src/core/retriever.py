@@ -1,26 +1,107 @@
+import asyncio
 import logging
-import yaml
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
 
+from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
 
-from src.core.vector_store import load_vector_store
+from src.core.adaptive import AdaptiveRetriever
+from src.core.config import load_config
+from src.core.embedding_cache import embed_queries
+from src.core.hybrid import HybridRetriever
+from src.core.pool import HandlePool, make_key
+from src.core.sharded_store import search_by_vectors
+from src.core.vector_store import (
+    add_store_listener,
+    load_lexical_index,
+    load_vector_store,
+    store_version_reader,
+    vector_store_key,
+)
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from langchain_core.vectorstores import VectorStore
+
+    from src.core.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+_SEMANTIC_CACHES: HandlePool["SemanticCache"] = HandlePool("semantic cache")
 
-def _load_retriever_cfg() -> dict:
-    try:
-        with open("configs/retriever.yml") as f:
-            cfg = yaml.safe_load(f) or {}
-    except FileNotFoundError:
-        cfg = {}
 
+def _load_retriever_cfg() -> dict:
+    cfg = dict(load_config("retriever", required=False))
     cfg.setdefault("search_type", "similarity")
     cfg.setdefault("k", 4)
     return cfg
 
 
+def _semantic_cache(cache_cfg: dict) -> "SemanticCache":
+    # NumPy-backed; imported on first use to keep API cold start lean
+    from src.core.semantic_cache import SemanticCache
+
+    def build() -> "SemanticCache":
+        cache = SemanticCache(
+            threshold=float(cache_cfg.get("threshold", 0.95)),
+            max_entries=int(cache_cfg.get("max_entries", 1024)),
+            ttl_seconds=cache_cfg.get("ttl_seconds"),
+        )
+        add_store_listener(cache.clear)
+        return cache
+
+    return _SEMANTIC_CACHES.get(make_key(cache_cfg), build)
+
+
+def semantic_cache_stats() -> List[Dict[str, Any]]:
+    """Hit/miss counters of the retrieval-result cache."""
+    return [cache.stats() for cache in _SEMANTIC_CACHES.values()]
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _adaptive_retriever(
+    db: "VectorStore", cfg: dict, top_k: int, cut: bool
+) -> AdaptiveRetriever:
+    if not cut:
+        return AdaptiveRetriever(store=db, k=top_k)
+    return AdaptiveRetriever(
+        store=db,
+        k=top_k,
+        score_threshold=_optional_float(cfg.get("score_threshold")),
+        min_gap=_optional_float(cfg.get("min_gap")),
+        min_k=int(cfg.get("min_k", 1)),
+    )
+
+
+def _base_retriever(
+    db: "VectorStore", cfg: dict, search_type: str, top_k: int
+) -> BaseRetriever:
+    if search_type == "adaptive":
+        return _adaptive_retriever(db, cfg, top_k, cut=True)
+    fetch_k = int(cfg.get("fetch_k", max(4 * top_k, 20)))
+    if search_type == "hybrid":
+        return HybridRetriever(
+            store=db,
+            lexical=load_lexical_index(),
+            k=top_k,
+            fetch_k=fetch_k,
+            rrf_k=int(cfg.get("rrf_k", 60)),
+        )
+    if search_type == "mmr":
+        # NumPy-backed; imported on first use to keep API cold start lean
+        from src.core.mmr import MMRRetriever
+
+        return MMRRetriever(
+            store=db,
+            k=top_k,
+            fetch_k=fetch_k,
+            lambda_mult=float(cfg.get("lambda_mult", 0.5)),
+        )
+    return db.as_retriever(search_type=search_type, search_kwargs={"k": top_k})
+
+
 def get_retriever(k: Optional[int] = None) -> BaseRetriever:
     cfg = _load_retriever_cfg()
     search_type = cfg.get("search_type", "similarity")
@@ -28,4 +109,78 @@ def get_retriever(k: Optional[int] = None) -> BaseRetriever:
 
     db = load_vector_store()
     logger.info(f"Creating retriever: type={search_type}, k={top_k}")
-    return db.as_retriever(search_type=search_type, search_kwargs={"k": top_k})
+    retriever = _base_retriever(db, cfg, search_type, top_k)
+
+    cache_cfg = cfg.get("semantic_cache") or {}
+    if not cache_cfg or not cache_cfg.get("enabled", True):
+        return retriever
+    from src.core.semantic_cache import SemanticCachedRetriever
+
+    settings = {key: value for key, value in cfg.items() if key != "semantic_cache"}
+    return SemanticCachedRetriever(
+        inner=retriever,
+        store=db,
+        cache=_semantic_cache(cache_cfg),
+        scope=make_key(vector_store_key(), settings, top_k),
+        version=store_version_reader(),
+    )
+
+
+def _scored_retriever(k: Optional[int]) -> AdaptiveRetriever:
+    cfg = _load_retriever_cfg()
+    top_k = int(k) if k is not None else int(cfg.get("k", 4))
+    cut = cfg.get("search_type") == "adaptive"
+    return _adaptive_retriever(load_vector_store(), cfg, top_k, cut)
+
+
+def retrieve_with_scores(
+    question: str, k: Optional[int] = None
+) -> List[Tuple[Document, float]]:
+    """Up to ``k`` vector-similarity hits with relevance scores in [0, 1].
+
+    With ``search_type: adaptive`` the configured threshold/gap cuts apply,
+    so the result matches what ``answer()`` puts into the prompt.
+    """
+    return _scored_retriever(k).scored(question)
+
+
+async def aretrieve_with_scores(
+    question: str, k: Optional[int] = None
+) -> List[Tuple[Document, float]]:
+    """Async variant of :func:`retrieve_with_scores`."""
+    # Config reads and the first store open block, so they run in a thread
+    retriever = await asyncio.to_thread(_scored_retriever, k)
+    return await retriever.ascored(question)
+
+
+def retrieve_many(
+    questions: Sequence[str], k: Optional[int] = None, max_concurrency: int = 4
+) -> Sequence[Union[List[Document], Exception]]:
+    """Top-k chunks for every question, in order.
+
+    For plain ``similarity`` search all questions are embedded in one batch,
+    through the query cache but never the persistent document cache, and
+    searched as one multi-query request. Other search types run the configured
+    retriever per question with at most ``max_concurrency`` in flight; a
+    failed item holds its exception.
+    """
+    cfg = _load_retriever_cfg()
+    top_k = int(k) if k is not None else int(cfg.get("k", 4))
+    questions = list(questions)
+    if not questions:
+        return []
+
+    db = load_vector_store()
+    if (
+        cfg.get("search_type", "similarity") == "similarity"
+        and db.embeddings is not None
+    ):
+        logger.info(f"Batch retrieval: {len(questions)} questions, k={top_k}")
+        vectors = embed_queries(db.embeddings, questions)
+        hits = search_by_vectors(db, vectors, top_k)
+        return [[doc for doc, _ in query_hits] for query_hits in hits]
+
+    retriever = get_retriever(k=top_k)
+    return retriever.batch(
+        questions, config={"max_concurrency": max_concurrency}, return_exceptions=True
+    )
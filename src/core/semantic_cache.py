@@ -0,0 +1,261 @@
+"""Semantic cache of retrieval results keyed by query-embedding similarity.
+
+Paraphrased questions ("how do I reset my password" / "password reset
+steps") embed to nearly the same vector. The cache keeps the unit embeddings
+of recent queries in a ``(max_entries, dim)`` matrix together with the chunk
+IDs each one retrieved. A new query whose cosine similarity to a cached one
+reaches ``threshold`` reuses those IDs, so it costs one matrix-vector product
+and an ID lookup instead of a similarity search.
+
+Entries are scoped (store, embedder and retriever settings) and the whole
+cache is dropped on any ingest, delete or store refresh: in-process through
+``add_store_listener``, and for writes by other processes when the store's
+version stamp differs from the one last seen (checked on every lookup).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+from src.core.store_io import get_documents
+
+logger = logging.getLogger(__name__)
+
+
+def _unit(vector: Sequence[float] | np.ndarray) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm > 0 else array
+
+
+class SemanticCache:
+    """Chunk-ID lists looked up by nearest cached query embedding.
+
+    ``ttl_seconds`` of ``None`` (or <= 0) disables expiry. ``generation``
+    increases on every ``clear``; pass the value read before retrieving to
+    ``put`` so results computed across an invalidation are not stored.
+    ``sync`` clears the cache when the store version it is given changes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._values: List[Optional[List[str]]] = [None] * max_entries
+        # -inf marks a free slot; expired slots are reused like free ones
+        self._expires = np.full(max_entries, -np.inf)
+        self._used = np.zeros(max_entries, dtype=np.int64)
+        self._scopes = np.full(max_entries, -1, dtype=np.int64)
+        self._scope_codes: Dict[str, int] = {}
+        self._tick = 0
+        self.generation = 0
+        self._version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _similarities(
+        self, query: np.ndarray, scope: str, now: float
+    ) -> Optional[np.ndarray]:
+        code = self._scope_codes.get(scope)
+        if (
+            self._vectors is None
+            or code is None
+            or query.shape[0] != self._vectors.shape[1]
+        ):
+            return None
+        live = (self._scopes == code) & (self._expires >= now)
+        if not live.any():
+            return None
+        similarities = self._vectors @ query
+        similarities[~live] = -np.inf
+        return similarities
+
+    def lookup(
+        self, vector: Sequence[float] | np.ndarray, scope: str = ""
+    ) -> Optional[List[str]]:
+        query = _unit(vector)
+        with self._lock:
+            similarities = self._similarities(query, scope, self._clock())
+            if similarities is not None:
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._tick += 1
+                    self._used[best] = self._tick
+                    self.hits += 1
+                    return list(self._values[best] or [])
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        vector: Sequence[float] | np.ndarray,
+        scope: str,
+        ids: Sequence[str],
+        generation: Optional[int] = None,
+    ) -> bool:
+        """Store ``ids`` for ``vector``; returns False if invalidated meanwhile."""
+        query = _unit(vector)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self._vectors = np.zeros(
+                    (self.max_entries, query.shape[0]), dtype=np.float32
+                )
+                self._expires[:] = -np.inf
+            now = self._clock()
+            similarities = self._similarities(query, scope, now)
+            if similarities is not None and similarities.max() >= self.threshold:
+                # Refresh the near-duplicate instead of storing a second copy
+                slot = int(np.argmax(similarities))
+            else:
+                free = np.flatnonzero(self._expires < now)
+                if free.size:
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._used))
+                    self.evictions += 1
+            self._tick += 1
+            self._vectors[slot] = query
+            self._values[slot] = list(ids)
+            self._scopes[slot] = self._scope_codes.setdefault(
+                scope, len(self._scope_codes)
+            )
+            self._expires[slot] = now + self.ttl_seconds if self.ttl_seconds else np.inf
+            self._used[slot] = self._tick
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        self._expires[:] = -np.inf
+        self._values = [None] * self.max_entries
+        self._scope_codes.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def sync(self, version: str) -> None:
+        """Clear the cache if the store ``version`` differs from the last one seen."""
+        with self._lock:
+            if version == self._version:
+                return
+            if self._version is not None:
+                logger.debug("Store version changed, clearing the semantic cache")
+                self._clear()
+            self._version = version
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(np.count_nonzero(self._expires >= self._clock()))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self),
+        }
+
+
+class SemanticCachedRetriever(BaseRetriever):
+    """Wraps a retriever; near-duplicate queries reuse the cached chunk IDs."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseRetriever
+    store: VectorStore
+    cache: SemanticCache
+    scope: str = ""
+    # Reads the store's cross-process version stamp (see vector_store.py)
+    version: Optional[Callable[[], str]] = None
+
+    def _lookup(self, vector: Sequence[float]) -> Optional[List[str]]:
+        if self.version is not None:
+            self.cache.sync(self.version())
+        return self.cache.lookup(vector, self.scope)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embeddings = self.store.embeddings
+        if embeddings is None:
+            return self.inner.invoke(query)
+        # Pooled embedders cache query vectors, so the inner retriever's
+        # own embed_query call for the same text is a dictionary hit
+        vector = embeddings.embed_query(query)
+        ids = self._lookup(vector)
+        if ids is not None:
+            docs = get_documents(self.store, ids)
+            if len(docs) == len(ids):
+                logger.debug(f"Semantic cache hit: {len(ids)} chunks")
+                return docs
+
+        generation = self.cache.generation
+        docs = self.inner.invoke(query, config={"callbacks": run_manager.get_child()})
+        self._remember(vector, docs, generation)
+        return docs
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embeddings = self.store.embeddings
+        if embeddings is None:
+            return await self.inner.ainvoke(query)
+        vector = await embeddings.aembed_query(query)
+        ids = self._lookup(vector)
+        if ids is not None:
+            docs = await asyncio.to_thread(get_documents, self.store, ids)
+            if len(docs) == len(ids):
+                logger.debug(f"Semantic cache hit: {len(ids)} chunks")
+                return docs
+
+        generation = self.cache.generation
+        docs = await self.inner.ainvoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+        self._remember(vector, docs, generation)
+        return docs
+
+    def _remember(
+        self, vector: Sequence[float], docs: List[Document], generation: int
+    ) -> None:
+        chunk_ids = [doc.id for doc in docs]
+        if all(chunk_ids):
+            self.cache.put(
+                vector, self.scope, [str(chunk) for chunk in chunk_ids], generation
+            )
+
+
+__all__ = ["SemanticCache", "SemanticCachedRetriever"]
@@ -0,0 +1,313 @@
+"""Vector store split into N shard collections with parallel fan-out.
+
+Chunks are routed to a shard by a stable hash of their ``source`` metadata, so
+all chunks of one document live together and per-source operations touch one
+shard. Queries embed the question once, search every shard concurrently on a
+thread pool and merge the per-shard top-k lists with a heap.
+
+Shard 0 is the unsharded collection itself, so an existing collection becomes
+shard 0 of a sharded profile; ``python -m src.tools.rebalance`` moves chunks
+when the shard count changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def shard_name(collection: str, index: int) -> str:
+    """Collection name of shard ``index``; shard 0 keeps the base name."""
+    return collection if index == 0 else f"{collection}-shard{index}"
+
+
+def shard_for(source: str, shards: int) -> int:
+    """Stable (process-independent) shard number for a source path."""
+    digest = hashlib.sha256(source.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shards
+
+
+def search_by_vector(
+    store: VectorStore, embedding: List[float], k: int, filter: Optional[dict] = None
+) -> List[Tuple[Document, float]]:
+    """``(document, distance)`` pairs from a store for a precomputed query vector."""
+    if hasattr(store, "similarity_search_by_vector_with_score"):
+        return store.similarity_search_by_vector_with_score(
+            embedding, k=k, filter=filter
+        )
+    # langchain_chroma names it differently but also returns raw distances
+    return store.similarity_search_by_vector_with_relevance_scores(  # type: ignore[attr-defined]
+        embedding, k=k, filter=filter
+    )
+
+
+def search_by_vectors(
+    store: VectorStore,
+    embeddings: Sequence[Sequence[float]],
+    k: int,
+    filter: Optional[dict] = None,
+) -> List[List[Tuple[Document, float]]]:
+    """``(document, distance)`` lists per query vector, batched where possible."""
+    if not embeddings:
+        return []
+    if hasattr(store, "similarity_search_by_vectors_with_score"):
+        return store.similarity_search_by_vectors_with_score(embeddings, k, filter)
+    collection = getattr(store, "_collection", None)
+    if collection is not None:
+        # langchain_chroma has no multi-query method; the collection does
+        result = collection.query(
+            query_embeddings=[list(map(float, vector)) for vector in embeddings],
+            n_results=k,
+            where=filter,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                (
+                    Document(id=chunk, page_content=text or "", metadata=meta or {}),
+                    float(distance),
+                )
+                for chunk, text, meta, distance in zip(ids, texts, metas, distances)
+            ]
+            for ids, texts, metas, distances in zip(
+                result["ids"],
+                result["documents"],
+                result["metadatas"],
+                result["distances"],
+            )
+        ]
+    return [search_by_vector(store, list(vector), k, filter) for vector in embeddings]
+
+
+class ShardedVectorStore(VectorStore):
+    """Routes writes by source hash and fans reads out over all shards."""
+
+    def __init__(
+        self, shards: Sequence[VectorStore], max_workers: Optional[int] = None
+    ) -> None:
+        if not shards:
+            raise ValueError("ShardedVectorStore needs at least one shard")
+        self.shards = list(shards)
+        self.max_workers = max_workers or len(self.shards)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="shard"
+                )
+            return self._executor
+
+    def _fan_out(self, fn: Callable[[VectorStore], Any]) -> List[Any]:
+        """Run ``fn`` on every shard concurrently; results in shard order."""
+        if len(self.shards) == 1:
+            return [fn(self.shards[0])]
+        return list(self._pool().map(fn, self.shards))
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.shards[0].embeddings
+
+    def shard_for(self, source: str) -> int:
+        return shard_for(source, len(self.shards))
+
+    # ------------------------------------------------------------------ writes
+
+    def add_documents(self, documents: List[Document], **kwargs: Any) -> List[str]:
+        routed: Dict[int, List[Tuple[int, Document]]] = {}
+        for position, doc in enumerate(documents):
+            shard = self.shard_for(str(doc.metadata.get("source", "")))
+            routed.setdefault(shard, []).append((position, doc))
+
+        def add(item: Tuple[int, List[Tuple[int, Document]]]) -> List[Tuple[int, str]]:
+            shard, batch = item
+            ids = self.shards[shard].add_documents([doc for _, doc in batch], **kwargs)
+            return list(zip((position for position, _ in batch), ids))
+
+        ids: List[str] = [""] * len(documents)
+        for placed in self._pool().map(add, routed.items()):
+            for position, doc_id in placed:
+                ids[position] = doc_id
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        docs = [
+            Document(
+                id=ids[i] if ids else None, page_content=text, metadata=metadatas[i]
+            )
+            for i, text in enumerate(texts)
+        ]
+        return self.add_documents(docs, **kwargs)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        # IDs do not encode their shard, so every shard gets the same request
+        self._fan_out(lambda shard: shard.delete(ids=ids, **kwargs))
+        return True
+
+    # ------------------------------------------------------------------ reads
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("metadatas", "documents"),
+    ) -> Dict[str, Any]:
+        """Concatenated Chroma-style ``get`` over all shards (in shard order)."""
+        include = list(include)
+        parts = self._fan_out(
+            lambda shard: shard.get(ids=ids, where=where, include=include)  # type: ignore[attr-defined]
+        )
+        merged: Dict[str, Any] = {"ids": []}
+        for key in ("documents", "metadatas", "embeddings"):
+            if key in include:
+                merged[key] = []
+        for part in parts:
+            merged["ids"].extend(part["ids"])
+            for key in merged:
+                if key != "ids" and part.get(key) is not None:
+                    merged[key].extend(list(part[key]))
+        start = offset or 0
+        stop = start + limit if limit is not None else None
+        return {key: values[start:stop] for key, values in merged.items()}
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        found = [
+            doc for docs in self._fan_out(lambda s: s.get_by_ids(ids)) for doc in docs
+        ]
+        by_id = {doc.id: doc for doc in found}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None
+    ) -> List[Tuple[Document, float]]:
+        """Per-shard top-k merged by distance (lower is closer)."""
+        per_shard = self._fan_out(
+            lambda shard: search_by_vector(shard, embedding, k, filter)
+        )
+        merged = heapq.merge(*per_shard, key=lambda pair: pair[1])
+        return list(islice(merged, k))
+
+    def similarity_search_by_vectors_with_score(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+        filter: Optional[dict] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """One multi-query search per shard, merged per query."""
+        per_shard = self._fan_out(
+            lambda shard: search_by_vectors(shard, embeddings, k, filter)
+        )
+        return [
+            list(
+                islice(
+                    heapq.merge(*(hits[i] for hits in per_shard), key=lambda p: p[1]), k
+                )
+            )
+            for i in range(len(embeddings))
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        embeddings = self.embeddings
+        if embeddings is None:
+            raise ValueError("Sharded search needs shards with an embedding function")
+        return self.similarity_search_by_vector_with_score(
+            embeddings.embed_query(query), k, filter
+        )
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_by_vector_with_score(
+                embedding, k, filter
+            )
+        ]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self.shards[0]._select_relevance_score_fn()
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        profile: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> "ShardedVectorStore":
+        """Open the shard collections of ``profile`` and add ``texts`` to them.
+
+        ``profile`` is a ``vector_store.yml`` section (the active one by
+        default); every shard uses ``embedding``.
+        """
+        # vector_store builds sharded stores itself, so import it lazily
+        from src.core.vector_store import (
+            _build_single_store,
+            _load_vs_cfg,
+            shard_configs,
+        )
+
+        profile = profile if profile is not None else _load_vs_cfg()
+        store = cls(
+            [_build_single_store(cfg, embedding) for cfg in shard_configs(profile)],
+            max_workers=profile.get("max_workers"),
+        )
+        store.add_texts(texts, metadatas, ids=ids, **kwargs)
+        return store
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        for shard in self.shards:
+            close = getattr(shard, "close", None)
+            if callable(close):
+                close()
+
+
+__all__ = [
+    "ShardedVectorStore",
+    "search_by_vector",
+    "search_by_vectors",
+    "shard_for",
+    "shard_name",
+]
@@ -0,0 +1,121 @@
+"""Single-flight coalescing of identical concurrent calls.
+
+While a call for ``key`` is in flight, further calls with the same key wait
+for it and receive its result (or exception) instead of starting their own
+execution. Nothing is cached: once the call finishes, the next one runs
+again. All callers of one execution receive the same result object.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[T]):
+    """Thread-safe single-flight group for blocking calls."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, _Call[T]] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[return-value]
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+class _AsyncCall(Generic[T]):
+    def __init__(self, task: "asyncio.Future[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight(Generic[T]):
+    """Single-flight group for coroutines on one event loop.
+
+    The shared execution runs as its own task, so a cancelled caller (e.g. a
+    disconnected client) does not cancel it for the others; it is cancelled
+    only when every caller waiting on it is gone.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, _AsyncCall[T]] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _AsyncCall(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _AsyncCall[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+__all__ = ["AsyncSingleFlight", "SingleFlight"]
@@ -0,0 +1,253 @@
+"""Columnar binary snapshots of a vector store.
+
+A snapshot directory holds
+
+- ``vectors.npy``: ``(count, dimension)`` float32 matrix.
+- ``ids``, ``texts``, ``metadata`` columns, each as ``<name>.bin`` (UTF-8
+  values back to back; metadata as JSON) plus ``<name>.offsets.npy``
+  (``count + 1`` int64 byte offsets).
+- ``manifest.json``: format version, count, dimension, embedder namespace and
+  the size and sha256 of every file.
+
+Exports stream pages out of the store into pre-sized memory-mapped files.
+Imports verify the checksums, memory-map the columns and bulk-insert them
+with the stored vectors, so a new replica never calls the embedding service.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.vectorstores import VectorStore
+
+from src.core.store_io import iter_records, write_records
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "naive-rag-snapshot"
+VERSION = 1
+MANIFEST = "manifest.json"
+VECTORS = "vectors.npy"
+COLUMNS = ("ids", "texts", "metadata")
+
+
+class SnapshotError(ValueError):
+    """Raised for missing, corrupt or incompatible snapshots."""
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _ColumnWriter:
+    """Appends variable-length UTF-8 values and records their byte offsets."""
+
+    def __init__(self, directory: Path, name: str, count: int) -> None:
+        self.name = name
+        self._blob: BinaryIO = (directory / f"{name}.bin").open("wb")
+        self._offsets = np.zeros(count + 1, dtype=np.int64)
+        self._offsets_path = directory / f"{name}.offsets.npy"
+        self._row = 0
+
+    def extend(self, values: List[str]) -> None:
+        for value in values:
+            encoded = value.encode("utf-8")
+            self._blob.write(encoded)
+            self._offsets[self._row + 1] = self._offsets[self._row] + len(encoded)
+            self._row += 1
+
+    def close(self) -> None:
+        self._blob.close()
+        np.save(self._offsets_path, self._offsets[: self._row + 1])
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot directory."""
+
+    def __init__(self, directory: str | Path, verify: bool = True) -> None:
+        self.directory = Path(directory)
+        manifest_path = self.directory / MANIFEST
+        if not manifest_path.exists():
+            raise SnapshotError(f"No snapshot manifest in {self.directory}")
+        self.manifest: Dict[str, Any] = json.loads(manifest_path.read_text())
+        if (
+            self.manifest.get("format") != FORMAT
+            or self.manifest.get("version") != VERSION
+        ):
+            raise SnapshotError(
+                f"Unsupported snapshot format {self.manifest.get('format')!r} "
+                f"v{self.manifest.get('version')}"
+            )
+        if verify:
+            self.verify()
+        self.count = int(self.manifest["count"])
+        self.vectors = np.load(self.directory / VECTORS, mmap_mode="r")
+        self._blobs = {
+            name: np.memmap(self.directory / f"{name}.bin", dtype=np.uint8, mode="r")
+            if (self.directory / f"{name}.bin").stat().st_size
+            else np.zeros(0, dtype=np.uint8)
+            for name in COLUMNS
+        }
+        self._offsets = {
+            name: np.load(self.directory / f"{name}.offsets.npy") for name in COLUMNS
+        }
+
+    def verify(self) -> None:
+        for name, expected in self.manifest["files"].items():
+            path = self.directory / name
+            if not path.exists():
+                raise SnapshotError(f"Snapshot file missing: {name}")
+            if (
+                path.stat().st_size != expected["bytes"]
+                or file_sha256(path) != expected["sha256"]
+            ):
+                raise SnapshotError(f"Checksum mismatch for snapshot file {name}")
+
+    def _column(self, name: str, start: int, stop: int) -> List[str]:
+        offsets, blob = self._offsets[name], self._blobs[name]
+        return [
+            bytes(blob[offsets[row] : offsets[row + 1]]).decode("utf-8")
+            for row in range(start, stop)
+        ]
+
+    def pages(self, page_size: int = 5000) -> Iterator[Dict[str, Any]]:
+        for start in range(0, self.count, page_size):
+            stop = min(start + page_size, self.count)
+            yield {
+                "ids": self._column("ids", start, stop),
+                "documents": self._column("texts", start, stop),
+                "metadatas": [
+                    json.loads(raw) for raw in self._column("metadata", start, stop)
+                ],
+                "embeddings": self.vectors[start:stop],
+            }
+
+
+def export_snapshot(
+    store: VectorStore,
+    directory: str | Path,
+    embedder: str = "",
+    page_size: int = 1000,
+) -> Dict[str, Any]:
+    """Write every record of ``store`` to a new snapshot directory.
+
+    Returns the manifest.
+    """
+    target = Path(directory)
+    target.mkdir(parents=True, exist_ok=True)
+    if (target / MANIFEST).exists():
+        raise SnapshotError(f"{target} already contains a snapshot")
+    start_time = time.perf_counter()
+
+    total = len(store.get(include=[])["ids"])  # type: ignore[attr-defined]
+    writers = {name: _ColumnWriter(target, name, total) for name in COLUMNS}
+    vectors: Optional[np.memmap] = None
+    row = 0
+    try:
+        for page in iter_records(store, page_size):
+            batch = np.asarray(page["embeddings"], dtype=np.float32)
+            if row + len(batch) > total:
+                raise SnapshotError("Store grew during export; stop writers and retry")
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    target / VECTORS,
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(total, batch.shape[1]),
+                )
+            vectors[row : row + len(batch)] = batch
+            writers["ids"].extend(page["ids"])
+            writers["texts"].extend(page["documents"])
+            writers["metadata"].extend(
+                [json.dumps(meta, sort_keys=True) for meta in page["metadatas"]]
+            )
+            row += len(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    if row != total:
+        raise SnapshotError(
+            f"Exported {row} of {total} records; store changed during export"
+        )
+    if vectors is None:
+        np.save(target / VECTORS, np.zeros((0, 0), dtype=np.float32))
+        dimension = 0
+    else:
+        vectors.flush()
+        dimension = int(vectors.shape[1])
+        del vectors
+
+    files = [VECTORS] + [
+        f"{name}{suffix}" for name in COLUMNS for suffix in (".bin", ".offsets.npy")
+    ]
+    manifest = {
+        "format": FORMAT,
+        "version": VERSION,
+        "count": total,
+        "dimension": dimension,
+        "embedder": embedder,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "files": {
+            name: {
+                "bytes": (target / name).stat().st_size,
+                "sha256": file_sha256(target / name),
+            }
+            for name in files
+        },
+    }
+    (target / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    logger.info(
+        f"Exported {total} records to {target} "
+        f"in {time.perf_counter() - start_time:.2f}s"
+    )
+    return manifest
+
+
+def import_snapshot(
+    directory: str | Path,
+    store: VectorStore,
+    embedder: str = "",
+    verify: bool = True,
+    force: bool = False,
+    page_size: int = 5000,
+) -> Snapshot:
+    """Bulk-insert a snapshot into ``store`` using its stored vectors.
+
+    Refuses snapshots made with a different embedder (vectors would live in
+    another space) unless ``force`` is set. Returns the opened snapshot.
+    """
+    snapshot = Snapshot(directory, verify=verify)
+    recorded = snapshot.manifest.get("embedder", "")
+    if recorded and embedder and recorded != embedder and not force:
+        raise SnapshotError(
+            f"Snapshot was embedded with {recorded!r}, active embedder is {embedder!r}"
+        )
+    start_time = time.perf_counter()
+    for page in snapshot.pages(page_size):
+        write_records(
+            store, page["ids"], page["documents"], page["metadatas"], page["embeddings"]
+        )
+    logger.info(
+        f"Imported {snapshot.count} records from {snapshot.directory} "
+        f"in {time.perf_counter() - start_time:.2f}s"
+    )
+    return snapshot
+
+
+__all__ = [
+    "Snapshot",
+    "SnapshotError",
+    "export_snapshot",
+    "file_sha256",
+    "import_snapshot",
+]
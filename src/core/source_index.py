@@ -0,0 +1,104 @@
+"""SQLite index from document source path to the chunk IDs stored for it.
+
+Maintained by ``embed_and_store`` so bulk deletes can resolve every chunk of
+many sources in one local query instead of one ``where`` scan per source in
+the vector store.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Sequence
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source);
+"""
+
+# SQLite limits the number of host parameters per statement
+_SQL_BATCH = 500
+
+
+def _batches(items: Sequence[str], size: int = _SQL_BATCH) -> Iterable[Sequence[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class SourceIndex:
+    """Source → chunk-ID mapping persisted next to a vector store collection."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def replace(self, ids_by_source: Mapping[str, Iterable[str]]) -> None:
+        """Make the given IDs the complete chunk set of each listed source."""
+        if not ids_by_source:
+            return
+        sources = list(ids_by_source)
+        with self._lock:
+            for batch in _batches(sources):
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(
+                    f"DELETE FROM chunks WHERE source IN ({placeholders})", tuple(batch)
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, source) VALUES (?, ?)",
+                [
+                    (chunk, source)
+                    for source, ids in ids_by_source.items()
+                    for chunk in ids
+                ],
+            )
+            self._conn.commit()
+
+    def lookup(self, sources: Iterable[str]) -> Dict[str, List[str]]:
+        """Chunk IDs per source; sources without indexed chunks are omitted."""
+        found: Dict[str, List[str]] = {}
+        unique = list(dict.fromkeys(sources))
+        with self._lock:
+            for batch in _batches(unique):
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT source, id FROM chunks WHERE source IN ({placeholders})",
+                    tuple(batch),
+                ).fetchall()
+                for source, chunk in rows:
+                    found.setdefault(source, []).append(chunk)
+        return found
+
+    def discard(self, sources: Iterable[str]) -> None:
+        unique = list(dict.fromkeys(sources))
+        if not unique:
+            return
+        with self._lock:
+            for batch in _batches(unique):
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(
+                    f"DELETE FROM chunks WHERE source IN ({placeholders})", tuple(batch)
+                )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return int(count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+__all__ = ["SourceIndex"]
@@ -0,0 +1,97 @@
+"""Provider-neutral bulk read/write of stored chunks with their vectors.
+
+Used by offline maintenance tools (rebalancing, snapshots) to move records
+between stores without calling the embedding service again, and by caches
+that keep chunk IDs to re-read the chunks.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+RECORD_FIELDS = ("documents", "metadatas", "embeddings")
+
+
+def iter_records(
+    store: VectorStore, page_size: int = 1000, embeddings: bool = True
+) -> Iterator[Dict[str, List[Any]]]:
+    """Yield ``get``-style pages (ids, documents, metadatas[, embeddings])."""
+    shards = getattr(store, "shards", None)
+    if shards is not None:
+        # Page each shard on its own; offsets over the merged view would rescan
+        for shard in shards:
+            yield from iter_records(shard, page_size, embeddings)
+        return
+    include = ["documents", "metadatas"] + (["embeddings"] if embeddings else [])
+    offset = 0
+    while True:
+        page = store.get(limit=page_size, offset=offset, include=include)  # type: ignore[attr-defined]
+        ids = list(page["ids"])
+        if not ids:
+            return
+        yield {
+            "ids": ids,
+            "documents": list(page["documents"]),
+            "metadatas": [dict(meta or {}) for meta in page["metadatas"]],
+            **({"embeddings": list(page["embeddings"])} if embeddings else {}),
+        }
+        offset += len(ids)
+
+
+def get_documents(store: VectorStore, ids: Sequence[str]) -> List[Document]:
+    """Stored chunks for ``ids`` in the given order; missing IDs are skipped."""
+    if not ids:
+        return []
+    # Chroma's get_by_ids rejects records stored without metadata
+    page = store.get(ids=list(ids), include=["documents", "metadatas"])  # type: ignore[attr-defined]
+    found = {
+        chunk: Document(id=chunk, page_content=text or "", metadata=dict(meta or {}))
+        for chunk, text, meta in zip(page["ids"], page["documents"], page["metadatas"])
+    }
+    return [found[chunk] for chunk in ids if chunk in found]
+
+
+def write_records(
+    store: VectorStore,
+    ids: Sequence[str],
+    texts: Sequence[str],
+    metadatas: Sequence[Dict[str, Any]],
+    embeddings: Optional[Sequence[Sequence[float]]] = None,
+) -> None:
+    """Upsert records, reusing ``embeddings`` where the store accepts vectors."""
+    if not ids:
+        return
+    shards = getattr(store, "shards", None)
+    if shards is not None:
+        route = store.shard_for  # type: ignore[attr-defined]
+        routed: Dict[int, List[int]] = {}
+        for row, meta in enumerate(metadatas):
+            routed.setdefault(route(str(meta.get("source", ""))), []).append(row)
+        for shard, rows in routed.items():
+            write_records(
+                shards[shard],
+                [ids[row] for row in rows],
+                [texts[row] for row in rows],
+                [metadatas[row] for row in rows],
+                None if embeddings is None else [embeddings[row] for row in rows],
+            )
+        return
+    if embeddings is not None and hasattr(store, "add_vectors"):
+        store.add_vectors(embeddings, texts, metadatas, ids)
+    elif embeddings is not None and hasattr(store, "_collection"):
+        # langchain_chroma: write straight to the collection; Chroma rejects
+        # empty metadata dicts, so those become None
+        store._collection.upsert(
+            ids=list(ids),
+            embeddings=[list(map(float, vector)) for vector in embeddings],
+            documents=list(texts),
+            metadatas=[dict(meta) if meta else None for meta in metadatas],
+        )
+    else:
+        store.add_texts(list(texts), [dict(meta) for meta in metadatas], ids=list(ids))
+
+
+__all__ = ["RECORD_FIELDS", "get_documents", "iter_records", "write_records"]
@@ -0,0 +1,89 @@
+"""Small thread-safe in-memory LRU cache with per-entry time-to-live."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """LRU mapping bounded by ``max_entries``; entries expire after ``ttl_seconds``.
+
+    ``ttl_seconds`` of ``None`` (or <= 0) disables expiry.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at >= self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: V) -> None:
+        expires_at = (
+            self._clock() + self.ttl_seconds if self.ttl_seconds else float("inf")
+        )
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            item = self._data.pop(key, None)
+        return None if item is None else item[1]
+
+    def discard_where(self, predicate: Callable[[V], bool]) -> int:
+        """Remove entries whose value matches ``predicate``; returns how many."""
+        with self._lock:
+            doomed = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in doomed:
+                del self._data[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+        }
+
+
+__all__ = ["TTLCache"]
@@ -1,131 +1,460 @@
+from __future__ import annotations
+
+import hashlib
 import logging
 import os
+import uuid
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
 
-import yaml
-from langchain_chroma import Chroma
 from langchain_core.documents import Document
 
-from src.core.embedder import get_embedder
+from src.core.config import load_config, load_profile
+from src.core.embedder import close_embedders, embedder_key, get_embedder
+from src.core.lazy import lazy_attr
+from src.core.lexical_index import LexicalIndex
+from src.core.pool import HandlePool, make_key
+from src.core.sharded_store import ShardedVectorStore, shard_name
+from src.core.source_index import SourceIndex
+from src.core.store_io import iter_records
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.vectorstores import VectorStore
 
 logger = logging.getLogger(__name__)
 
+# chromadb is imported when a Chroma profile is first opened (see src/core/lazy.py)
+_PROVIDERS = {
+    "Chroma": ("langchain_chroma", "Chroma"),
+    "FlatVectorStore": ("src.core.flat_store", "FlatVectorStore"),
+    "IVFVectorStore": ("src.core.ivf_store", "IVFVectorStore"),
+}
+# Chroma rejects very large single delete/add batches
+_DELETE_BATCH = 5000
+_IVF_OPTIONS = ("nlist", "nprobe", "min_train_size", "train_size", "retrain_growth")
+
+
+def __getattr__(name: str) -> Any:
+    return lazy_attr(globals(), _PROVIDERS, name)
+
+
+def _provider(name: str) -> Any:
+    return lazy_attr(globals(), _PROVIDERS, name)
+
+
+_STORES: HandlePool[VectorStore] = HandlePool("vector store")
+_SOURCE_INDEXES: HandlePool[SourceIndex] = HandlePool("source index")
+_LEXICAL_INDEXES: HandlePool[LexicalIndex] = HandlePool("lexical index")
+_STORE_LISTENERS: List[Callable[[], None]] = []
+_CHUNK_LISTENERS: List[Callable[[List[str]], None]] = []
+
+
+def add_store_listener(listener: Callable[[], None]) -> None:
+    """Call ``listener()`` after every write that changes stored chunks.
+
+    Caches of retrieval results use this to invalidate themselves on ingest,
+    delete and store refresh. Listeners only hear about writes made in this
+    process; see :func:`store_version_reader` for the others.
+    """
+    if listener not in _STORE_LISTENERS:
+        _STORE_LISTENERS.append(listener)
+
+
+def add_chunk_listener(listener: Callable[[List[str]], None]) -> None:
+    """Call ``listener(ids)`` with the IDs of chunks removed from the store.
+
+    Chunk IDs include the content hash, so an edited chunk is reported as
+    its old ID being removed. Caches keyed by chunk IDs use this to drop
+    entries built on chunks that no longer exist.
+    """
+    if listener not in _CHUNK_LISTENERS:
+        _CHUNK_LISTENERS.append(listener)
+
+
+def _notify_store_change(removed: Sequence[str] = (), written: bool = True) -> None:
+    if written:
+        _bump_store_version()
+    for listener in list(_STORE_LISTENERS):
+        try:
+            listener()
+        except Exception:
+            logger.exception("Vector store listener %r failed", listener)
+    if not removed:
+        return
+    for chunk_listener in list(_CHUNK_LISTENERS):
+        try:
+            chunk_listener(list(removed))
+        except Exception:
+            logger.exception("Chunk listener %r failed", chunk_listener)
+
 
 def _load_vs_cfg() -> dict:
     """Load vector store profile from YAML, fallback to 'local'."""
-    with open("configs/vector_store.yml") as f:
-        cfg = yaml.safe_load(f) or {}
-
-    default_profile = cfg.get("default", "local")
-    profile = os.getenv("VS_PROFILE", default_profile)
-    section = cfg.get(profile)
+    profile, section = load_profile("vector_store", "VS_PROFILE", "local")
     if section is None:
         raise KeyError(
             f"profile '{profile}' not found in vector_store.yml. "
-            f"Available keys: {list(cfg.keys())}"
+            f"Available keys: {list(load_config('vector_store').keys())}"
         )
     section.setdefault("provider", "chroma_local")
     return section
 
 
-def embed_and_store(docs: List[Document]) -> Chroma:
-    """
-    Embed chunks and store them (local persist or cloud) with LangChain's Chroma wrapper.
-    Returns the Chroma instance for immediate querying.
-    """
-    vcfg = _load_vs_cfg()
+def shard_configs(vcfg: dict, shards: Optional[int] = None) -> List[dict]:
+    """Per-shard profiles (one collection each) for ``shards`` or ``vcfg['shards']``."""
+    count = int(shards if shards is not None else vcfg.get("shards", 1))
+    if count < 1:
+        raise ValueError("shards must be >= 1")
+    collection = vcfg.get("collection_name", "default")
+    return [
+        {**vcfg, "shards": 1, "collection_name": shard_name(collection, index)}
+        for index in range(count)
+    ]
+
+
+def _build_store(vcfg: dict) -> VectorStore:
+    shards = shard_configs(vcfg)
+    if len(shards) == 1:
+        return _build_single_store(vcfg)
+    logger.info(
+        f"Loading {len(shards)} shards of {vcfg.get('collection_name', 'default')}"
+    )
+    return ShardedVectorStore(
+        [_build_single_store(shard) for shard in shards],
+        max_workers=vcfg.get("max_workers"),
+    )
+
+
+def _build_single_store(
+    vcfg: dict, embedding: Optional[Embeddings] = None
+) -> VectorStore:
     provider = vcfg.get("provider", "chroma_local")
     collection = vcfg.get("collection_name", "default")
 
-    emb = get_embedder()
+    emb = embedding if embedding is not None else get_embedder()
 
     if provider == "chroma_local":
         persist_dir = vcfg["persist_dir"]
-        logger.info(f"Embedding {len(docs)} docs -> {persist_dir} ({collection})")
-        db = Chroma.from_documents(
-            documents=docs,
-            embedding=emb,
+        logger.info(f"Loading Chroma @ {persist_dir} ({collection})")
+        return _provider("Chroma")(
             persist_directory=persist_dir,
             collection_name=collection,
+            embedding_function=emb,
         )
     elif provider == "chroma_cloud":
-        logger.info(f"Embedding {len(docs)} docs -> chroma_cloud ({collection})")
-        # No persist_directory when using cloud
-        db = Chroma.from_documents(
-            documents=docs,
-            embedding=emb,
+        logger.info(f"Loading Chroma Cloud ({collection})")
+        return _provider("Chroma")(
             collection_name=collection,
+            embedding_function=emb,
         )
+    elif provider == "numpy_mmap":
+        path = Path(vcfg["persist_dir"]) / collection
+        logger.info(f"Loading flat NumPy store @ {path}")
+        return _provider("FlatVectorStore")(persist_dir=path, embedding=emb)
+    elif provider == "ivf":
+        path = Path(vcfg["persist_dir"]) / collection
+        options = {key: vcfg[key] for key in _IVF_OPTIONS if vcfg.get(key) is not None}
+        logger.info(f"Loading IVF store @ {path} ({options})")
+        return _provider("IVFVectorStore")(persist_dir=path, embedding=emb, **options)
     else:
         raise ValueError(f"Unknown vector store provider: {provider}")
 
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source: str, ordinal: int, digest: str) -> str:
+    """Deterministic chunk ID from its source, position within it and content."""
+    key = f"{source}\x1f{ordinal}\x1f{digest}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def with_chunk_ids(docs: Iterable[Document]) -> List[Document]:
+    """Copy ``docs`` with deterministic IDs and a ``content_hash`` metadata field.
+
+    The ordinal counts chunks per ``source`` in the order given, so the same
+    file chunked the same way always yields the same IDs.
+    """
+    ordinals: Dict[str, int] = {}
+    out = []
+    for doc in docs:
+        source = str(doc.metadata.get("source", ""))
+        ordinal = ordinals.get(source, 0)
+        ordinals[source] = ordinal + 1
+        digest = content_hash(doc.page_content)
+        out.append(
+            Document(
+                id=chunk_id(source, ordinal, digest),
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "content_hash": digest},
+            )
+        )
+    return out
+
+
+def _stored_ids(db: VectorStore, sources: Iterable[str]) -> Set[str]:
+    """IDs currently stored for ``sources`` (one ``get`` round trip)."""
+    sources = sorted(set(sources))
+    if not sources:
+        return set()
+    result = db.get(where={"source": {"$in": sources}}, include=[])  # type: ignore[attr-defined]
+    return set(result["ids"])
+
+
+def embed_and_store(docs: List[Document]) -> VectorStore:
+    """
+    Upsert chunks into the active vector store profile.
+
+    Every source in ``docs`` is treated as complete: chunks already stored with
+    the same ID (same source, position and content) are skipped, new ones are
+    embedded and added, and stored chunks of those sources that are no longer
+    produced are removed. Returns the store instance for immediate querying.
+    """
+    db = load_vector_store()
+    chunks = with_chunk_ids(docs)
+    sources = {
+        str(doc.metadata["source"]) for doc in chunks if doc.metadata.get("source")
+    }
+    stored = _stored_ids(db, sources)
+
+    wanted = {doc.id for doc in chunks}
+    fresh = [doc for doc in chunks if doc.id not in stored]
+    stale = sorted(stored - wanted)
+
+    logger.info(
+        f"Upserting {len(chunks)} chunks from {len(sources)} sources: "
+        f"{len(fresh)} new, {len(chunks) - len(fresh)} unchanged, {len(stale)} stale"
+    )
+    lexical = load_lexical_index()
+    if fresh:
+        db.add_documents(fresh)
+        lexical.upsert(fresh)
+    # Remove stale chunks only once their replacements are stored
+    if stale:
+        db.delete(ids=stale)
+        lexical.delete(stale)
+    if fresh or stale:
+        _notify_store_change(stale)
+
+    by_source: Dict[str, List[str]] = {source: [] for source in sources}
+    for doc in chunks:
+        if doc.metadata.get("source") and doc.id:
+            by_source[str(doc.metadata["source"])].append(doc.id)
+    load_source_index().replace(by_source)
     logger.info("Embeddings stored.")
     return db
 
 
-def load_vector_store() -> Chroma:
+def vector_store_key() -> str:
+    """Pool key of the active vector store and embedding profiles."""
+    return make_key(_load_vs_cfg(), embedder_key())
+
+
+def load_vector_store() -> VectorStore:
     """
-    Re-open an existing Chroma store (local or cloud) using the same embedder.
+    Return the pooled store (Chroma local/cloud, flat or IVF NumPy) for the
+    active profiles.
+
+    Handles are keyed by the vector store and embedding profiles, so a config
+    change (or ``refresh_vector_stores``) yields a fresh handle.
     """
     vcfg = _load_vs_cfg()
-    provider = vcfg.get("provider", "chroma_local")
+    return _STORES.get(vector_store_key(), lambda: _build_store(vcfg))
+
+
+def _source_index_path(vcfg: dict) -> Path:
     collection = vcfg.get("collection_name", "default")
+    if vcfg.get("source_index_path"):
+        return Path(vcfg["source_index_path"])
+    if vcfg.get("persist_dir"):
+        return Path(vcfg["persist_dir"]) / f"{collection}.sources.sqlite"
+    return Path("data/cache") / f"sources-{collection}.sqlite"
 
-    emb = get_embedder()
 
-    if provider == "chroma_local":
-        persist_dir = vcfg["persist_dir"]
-        logger.info(f"Loading Chroma @ {persist_dir} ({collection})")
-        return Chroma(
-            persist_directory=persist_dir,
-            collection_name=collection,
-            embedding_function=emb,
-        )
-    elif provider == "chroma_cloud":
-        logger.info(f"Loading Chroma Cloud ({collection})")
-        return Chroma(
-            collection_name=collection,
-            embedding_function=emb,
-        )
-    else:
-        raise ValueError(f"Unknown vector store provider: {provider}")
+def _store_version_path(vcfg: dict) -> Path:
+    collection = vcfg.get("collection_name", "default")
+    if vcfg.get("persist_dir"):
+        return Path(vcfg["persist_dir"]) / f"{collection}.version"
+    return Path("data/cache") / f"version-{collection}"
 
 
-def delete_by_source(source_path: str) -> None:
-    """Remove documents from the vector store matching the given source path."""
-    if not source_path:
-        return
+def _read_store_version(path: Path) -> str:
+    try:
+        return path.read_text()
+    except OSError:
+        return ""
 
-    vcfg = _load_vs_cfg()
-    provider = vcfg.get("provider", "chroma_local")
+
+def store_version_reader() -> Callable[[], str]:
+    """Return a callable reading the active collection's version stamp.
+
+    The stamp is a file next to the store that every process rewrites after
+    changing the store, so caches in other processes (e.g. the API while
+    the UI ingests) can notice the write on their next lookup.
+    """
+    return partial(_read_store_version, _store_version_path(_load_vs_cfg()))
+
+
+def _bump_store_version() -> None:
+    try:
+        path = _store_version_path(_load_vs_cfg())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(uuid.uuid4().hex)
+        os.replace(tmp, path)
+    except Exception as exc:
+        logger.warning(f"Could not update the store version stamp: {exc}")
+
+
+def mark_store_changed() -> None:
+    """Announce a write made outside this module (e.g. by the CLI tools)."""
+    _notify_store_change()
+
+
+def load_source_index() -> SourceIndex:
+    """Return the pooled source → chunk-ID index of the active collection."""
+    path = _source_index_path(_load_vs_cfg())
+    return _SOURCE_INDEXES.get(str(path), lambda: SourceIndex(path))
+
+
+def _lexical_index_path(vcfg: dict) -> Path:
     collection = vcfg.get("collection_name", "default")
+    if vcfg.get("lexical_index_path"):
+        return Path(vcfg["lexical_index_path"])
+    if vcfg.get("persist_dir"):
+        return Path(vcfg["persist_dir"]) / f"{collection}.lexical.sqlite"
+    return Path("data/cache") / f"lexical-{collection}.sqlite"
 
-    emb = get_embedder()
 
-    if provider == "chroma_local":
-        persist_dir = vcfg["persist_dir"]
-        db = Chroma(
-            persist_directory=persist_dir,
-            collection_name=collection,
-            embedding_function=emb,
+def _backfill_lexical_index(index: LexicalIndex, page_size: int = 1000) -> None:
+    """Index the stored chunks into an empty keyword index.
+
+    Collections ingested before the keyword index existed would otherwise make
+    hybrid retrieval fall back to vector-only results without notice.
+    """
+    try:
+        added = 0
+        for page in iter_records(load_vector_store(), page_size, embeddings=False):
+            index.upsert(
+                Document(id=chunk, page_content=text, metadata=meta)
+                for chunk, text, meta in zip(
+                    page["ids"], page["documents"], page["metadatas"]
+                )
+            )
+            added += len(page["ids"])
+    except Exception as exc:
+        logger.warning(
+            f"Keyword index {index.path} is empty and could not be rebuilt ({exc}); "
+            "run `python -m src.tools.reindex`"
         )
-    elif provider == "chroma_cloud":
-        db = Chroma(
-            collection_name=collection,
-            embedding_function=emb,
+        return
+    if added:
+        logger.warning(
+            f"Keyword index {index.path} was empty; indexed {added} stored chunks"
         )
-    else:
-        raise ValueError(f"Unknown vector store provider: {provider}")
 
-    candidates = {source_path}
-    try:
-        candidates.add(str(Path(source_path).resolve()))
-    except Exception:
-        pass
 
+def _open_lexical_index(path: Path) -> LexicalIndex:
+    index = LexicalIndex(path)
+    if len(index) == 0:
+        _backfill_lexical_index(index)
+    return index
+
+
+def load_lexical_index() -> LexicalIndex:
+    """Return the pooled BM25 keyword index of the active collection.
+
+    An empty index next to a non-empty store is filled from the store when
+    it is first opened.
+    """
+    path = _lexical_index_path(_load_vs_cfg())
+    return _LEXICAL_INDEXES.get(str(path), lambda: _open_lexical_index(path))
+
+
+def refresh_vector_stores() -> None:
+    """Drop pooled store handles so the next access reopens them."""
+    _STORES.refresh()
+    _SOURCE_INDEXES.refresh()
+    _LEXICAL_INDEXES.refresh()
+    _notify_store_change()
+
+
+def close_vector_stores() -> None:
+    """Release pooled store handles and the embedders they were built with."""
+    _STORES.close()
+    _SOURCE_INDEXES.close()
+    _LEXICAL_INDEXES.close()
+    close_embedders()
+    _notify_store_change(written=False)
+
+
+def _source_candidates(source_paths: Iterable[str]) -> List[str]:
+    """Each path as given plus its resolved form, as either may be stored."""
+    candidates: Dict[str, None] = {}
+    for source_path in source_paths:
+        if not source_path:
+            continue
+        candidates[source_path] = None
+        try:
+            candidates[str(Path(source_path).resolve())] = None
+        except Exception:
+            pass
+    return list(candidates)
+
+
+def delete_sources(source_paths: Iterable[str]) -> int:
+    """
+    Remove every chunk of the given sources through one store handle.
+
+    Chunk IDs come from the source index in one pass (sources indexed before
+    it existed are resolved with a single store lookup) and are deleted in
+    batches. Returns the number of chunk IDs deleted.
+    """
+    candidates = _source_candidates(source_paths)
+    if not candidates:
+        return 0
+
+    deleted = 0
+    removed: List[str] = []
     try:
-        for candidate in candidates:
-            db.delete(where={"source": candidate})
+        db = load_vector_store()
+        index = load_source_index()
+        found = index.lookup(candidates)
+        ids = [chunk for source in candidates for chunk in found.get(source, [])]
+        unindexed = [source for source in candidates if source not in found]
+        if unindexed:
+            ids.extend(sorted(_stored_ids(db, unindexed)))
+        ids = list(dict.fromkeys(ids))
+
+        lexical = load_lexical_index()
+        for start in range(0, len(ids), _DELETE_BATCH):
+            batch = ids[start : start + _DELETE_BATCH]
+            db.delete(ids=batch)
+            lexical.delete(batch)
+            deleted += len(batch)
+            removed.extend(batch)
+        index.discard(candidates)
     except Exception:
-        logger.exception("Failed to delete documents for source %s", source_path)
+        logger.exception("Failed to delete documents for sources %s", candidates)
+    if deleted:
+        _notify_store_change(removed)
+    logger.info(f"Deleted {deleted} chunks for {len(candidates)} source paths")
+    return deleted
+
+
+def delete_by_source(source_path: str) -> None:
+    """Remove documents from the vector store matching the given source path."""
+    delete_sources([source_path])
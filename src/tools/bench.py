@@ -0,0 +1,420 @@
+"""Reproducible throughput/latency benchmarks for the RAG pipeline.
+
+By default runs fully offline: the ``offline`` embedding profile (feature
+hashing), the ``echo`` chat profile and the scratch ``bench`` vector store::
+
+    python -m src.tools.bench pipeline --docs 50 --questions 200 --concurrency 4
+
+Profiles can be overridden to benchmark real providers, e.g.
+``--embed-profile local --llm-profile openai``.
+
+``ivf`` compares the IVF index against exact flat search on synthetic
+clustered vectors, reporting recall@k and latency per ``nprobe``::
+
+    python -m src.tools.bench ivf --vectors 200000 --dim 384 --nprobe 4 8 16 32
+
+``mmr`` compares LangChain's Chroma MMR search with the vectorized MMR stage
+(src/core/mmr.py) on the same Chroma collection, and on the flat store::
+
+    python -m src.tools.bench mmr --vectors 20000 --fetch-k 20 100 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import numpy as np
+
+_WORDS = (
+    "vector index query chunk embedding retrieval answer context model latency "
+    "throughput cache shard token prompt source document pipeline search score "
+    "cluster centroid memory disk network batch worker thread replica snapshot "
+    "error timeout budget config profile provider store collection metadata"
+).split()
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile, ``q`` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: Sequence[float], wall_seconds: float) -> Dict[str, float]:
+    return {
+        "count": len(latencies),
+        "wall_s": round(wall_seconds, 4),
+        "throughput_per_s": round(len(latencies) / wall_seconds, 2)
+        if wall_seconds
+        else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def timed_map(
+    fn: Callable[[Any], Any], items: Sequence[Any], concurrency: int
+) -> Dict[str, float]:
+    """Run ``fn`` over ``items`` with a thread pool and summarize per-call latency."""
+
+    def call(item: Any) -> float:
+        start = time.perf_counter()
+        fn(item)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        latencies = list(pool.map(call, items))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def synthetic_corpus(directory: Path, docs: int, words: int, seed: int) -> List[Path]:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(docs):
+        sentences = []
+        for _ in range(max(words // 12, 1)):
+            sentence = " ".join(rng.choice(_WORDS) for _ in range(12))
+            sentences.append(f"{sentence.capitalize()} doc{i}.")
+        paragraphs = [
+            " ".join(sentences[j : j + 4]) for j in range(0, len(sentences), 4)
+        ]
+        path = directory / f"doc-{i:05d}.txt"
+        path.write_text("\n\n".join(paragraphs))
+        paths.append(path)
+    return paths
+
+
+def synthetic_questions(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed + 1)
+    return [
+        f"What about {' '.join(rng.choice(_WORDS) for _ in range(4))}?"
+        for _ in range(count)
+    ]
+
+
+def _use_profiles(args: argparse.Namespace) -> None:
+    os.environ["EMBED_PROFILE"] = args.embed_profile
+    os.environ["LLM_PROFILE"] = args.llm_profile
+    os.environ["VS_PROFILE"] = args.vs_profile
+
+
+def _reset_bench_store(args: argparse.Namespace) -> None:
+    """Wipe the scratch store; only ever touches the dedicated ``bench`` profile."""
+    from src.core.vector_store import _load_vs_cfg, close_vector_stores
+
+    close_vector_stores()
+    if args.vs_profile != "bench" or args.keep:
+        return
+    persist_dir = _load_vs_cfg().get("persist_dir")
+    if persist_dir:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+
+def run_pipeline(args: argparse.Namespace) -> Dict[str, Any]:
+    from src.core.ingestion import ingest_files
+    from src.core.rag import answer, answer_many, answer_stream, clear_answer_cache
+
+    _use_profiles(args)
+    _reset_bench_store(args)
+
+    report: Dict[str, Any] = {
+        "profiles": {
+            "embeddings": args.embed_profile,
+            "llm": args.llm_profile,
+            "vector_store": args.vs_profile,
+        }
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = synthetic_corpus(Path(tmp), args.docs, args.words, args.seed)
+        start = time.perf_counter()
+        summary = ingest_files(paths)
+        elapsed = time.perf_counter() - start
+        if summary.vector_store_error:
+            raise RuntimeError(f"Ingestion failed: {summary.vector_store_error}")
+        report["ingest"] = {
+            "documents": summary.total_documents,
+            "chunks": summary.total_chunks,
+            "wall_s": round(elapsed, 4),
+            "chunks_per_s": round(summary.total_chunks / elapsed, 2)
+            if elapsed
+            else 0.0,
+        }
+
+    questions = synthetic_questions(args.questions, args.seed)
+    clear_answer_cache()
+    report["answer"] = timed_map(
+        lambda q: answer(q, k=args.k), questions, args.concurrency
+    )
+    # Same questions again: served from the answer cache when it is enabled
+    report["answer_repeat"] = timed_map(
+        lambda q: answer(q, k=args.k), questions, args.concurrency
+    )
+    clear_answer_cache()
+    if args.stream:
+        # Latency until the first answer token (retrieval + LLM first token)
+        report["answer_stream_first_token"] = timed_map(
+            lambda q: next(answer_stream(q, k=args.k)), questions, args.concurrency
+        )
+    if args.batch:
+        clear_answer_cache()
+        start = time.perf_counter()
+        results = answer_many(questions, k=args.k, max_concurrency=args.concurrency)
+        elapsed = time.perf_counter() - start
+        report["answer_many"] = {
+            "count": len(results),
+            "errors": sum("error" in item for item in results),
+            "wall_s": round(elapsed, 4),
+            "throughput_per_s": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        }
+    return report
+
+
+def clustered_vectors(
+    count: int, dim: int, clusters: int, seed: int, noise: float = 0.35
+) -> "np.ndarray":
+    """Gaussian blobs around random centers, roughly like real embedding clusters."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=count)
+    points = centers[labels] + noise * rng.normal(size=(count, dim))
+    return points.astype(np.float32)
+
+
+def recall_at_k(
+    approx: Sequence[Sequence[int]], exact: Sequence[Sequence[int]]
+) -> float:
+    """Mean fraction of the exact top-k ids recovered by the approximate search."""
+    if not exact:
+        return 0.0
+    total = sum(
+        len(set(found) & set(truth)) / len(truth) if truth else 1.0
+        for found, truth in zip(approx, exact)
+    )
+    return total / len(exact)
+
+
+def run_ivf(args: argparse.Namespace) -> Dict[str, Any]:
+    import numpy as np
+
+    from src.core.flat_store import FlatVectorStore
+    from src.core.ivf_store import IVFVectorStore
+    from src.core.offline import HashingEmbeddings
+
+    vectors = clustered_vectors(args.vectors, args.dim, args.clusters, args.seed)
+    queries = clustered_vectors(args.queries, args.dim, args.clusters, args.seed)
+    # Same centers (same seed), fresh noise for the queries
+    queries += 0.1 * np.random.default_rng(args.seed + 1).normal(size=queries.shape)
+    texts = [""] * len(vectors)
+    emb = HashingEmbeddings(dimension=args.dim)  # unused: vectors are precomputed
+
+    report: Dict[str, Any] = {
+        "dataset": {
+            "vectors": args.vectors,
+            "dim": args.dim,
+            "clusters": args.clusters,
+            "queries": args.queries,
+            "k": args.k,
+        }
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = FlatVectorStore(Path(tmp) / "flat", emb)
+        ivf = IVFVectorStore(
+            Path(tmp) / "ivf", emb, nlist=args.nlist, min_train_size=args.vectors + 1
+        )
+        start = time.perf_counter()
+        flat.add_vectors(vectors, texts)
+        flat_s = time.perf_counter() - start
+        start = time.perf_counter()
+        ivf.add_vectors(vectors, texts)
+        ivf.train()
+        train_s = time.perf_counter() - start
+        report["build"] = {
+            "flat_s": round(flat_s, 4),
+            "ivf_s": round(train_s, 4),
+            **ivf.stats(),
+        }
+
+        def rows(store: Any, **kwargs: Any) -> List[List[int]]:
+            hits = store.search_vectors(queries, args.k, **kwargs)
+            return [[row for row, _ in query_hits] for query_hits in hits]
+
+        exact = rows(flat)
+        report["exact"] = timed_map(
+            lambda q: flat.search_vectors(q, args.k), list(queries), 1
+        )
+        for nprobe in args.nprobe:
+            approx = rows(ivf, nprobe=nprobe)
+            section = {"recall_at_k": round(recall_at_k(approx, exact), 4)}
+            probe = partial(ivf.search_vectors, k=args.k, nprobe=nprobe)
+            section.update(timed_map(probe, list(queries), 1))
+            report[f"ivf nprobe={nprobe}"] = section
+    return report
+
+
+def run_mmr(args: argparse.Namespace) -> Dict[str, Any]:
+    import numpy as np
+    from langchain_chroma import Chroma
+
+    from src.core.flat_store import FlatVectorStore
+    from src.core.mmr import max_marginal_relevance_search
+    from src.core.offline import HashingEmbeddings
+    from src.core.store_io import write_records
+
+    vectors = clustered_vectors(args.vectors, args.dim, args.clusters, args.seed)
+    queries = [
+        query.tolist()
+        for query in clustered_vectors(
+            args.queries, args.dim, args.clusters, args.seed + 1
+        )
+    ]
+    ids = [f"v{i}" for i in range(len(vectors))]
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    metadatas = [{"source": f"doc{i % 100}.txt"} for i in range(len(vectors))]
+    emb = HashingEmbeddings(dimension=args.dim)  # unused: vectors are precomputed
+
+    report: Dict[str, Any] = {
+        "dataset": {
+            "vectors": args.vectors,
+            "dim": args.dim,
+            "queries": args.queries,
+            "k": args.k,
+            "lambda_mult": args.lambda_mult,
+        }
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma = Chroma(
+            collection_name="bench-mmr", embedding_function=emb, persist_directory=tmp
+        )
+        flat = FlatVectorStore(Path(tmp) / "flat", emb)
+        for start in range(0, len(ids), 5000):
+            stop = start + 5000
+            write_records(
+                chroma,
+                ids[start:stop],
+                texts[start:stop],
+                metadatas[start:stop],
+                list(vectors[start:stop]),
+            )
+        flat.add_vectors(vectors, texts, metadatas, ids)
+
+        for fetch_k in args.fetch_k:
+            langchain = partial(
+                chroma.max_marginal_relevance_search_by_vector,
+                k=args.k,
+                fetch_k=fetch_k,
+                lambda_mult=args.lambda_mult,
+            )
+            ours = partial(
+                max_marginal_relevance_search,
+                k=args.k,
+                fetch_k=fetch_k,
+                lambda_mult=args.lambda_mult,
+            )
+            agree = [
+                {d.id for d in langchain(q)} == {d.id for d in ours(chroma, q)}
+                for q in queries
+            ]
+            report[f"chroma mmr fetch_k={fetch_k}"] = timed_map(langchain, queries, 1)
+            report[f"vectorized fetch_k={fetch_k}"] = {
+                "same_picks": round(float(np.mean(agree)), 4),
+                **timed_map(partial(ours, chroma), queries, 1),
+            }
+            report[f"vectorized flat fetch_k={fetch_k}"] = timed_map(
+                partial(ours, flat), queries, 1
+            )
+    return report
+
+
+def _print_report(report: Dict[str, Any], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    for section, values in report.items():
+        print(f"[{section}]")
+        if isinstance(values, dict):
+            for key, value in values.items():
+                print(f"  {key:>18}: {value}")
+        else:
+            print(f"  {values}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pipeline = sub.add_parser("pipeline", help="ingest a synthetic corpus and query it")
+    pipeline.add_argument("--docs", type=int, default=50)
+    pipeline.add_argument("--words", type=int, default=600, help="words per document")
+    pipeline.add_argument("--questions", type=int, default=100)
+    pipeline.add_argument("--concurrency", type=int, default=4)
+    pipeline.add_argument("--k", type=int, default=4)
+    pipeline.add_argument("--seed", type=int, default=7)
+    pipeline.add_argument("--embed-profile", default="offline")
+    pipeline.add_argument("--llm-profile", default="echo")
+    pipeline.add_argument("--vs-profile", default="bench")
+    pipeline.add_argument("--keep", action="store_true", help="keep the bench store")
+    pipeline.add_argument(
+        "--batch", action="store_true", help="also time answer_many over all questions"
+    )
+    pipeline.add_argument(
+        "--stream",
+        action="store_true",
+        help="also time the first token of answer_stream",
+    )
+    pipeline.set_defaults(run=run_pipeline)
+
+    ivf = sub.add_parser("ivf", help="IVF recall/latency against exact search")
+    ivf.add_argument("--vectors", type=int, default=100000)
+    ivf.add_argument("--dim", type=int, default=384)
+    ivf.add_argument("--clusters", type=int, default=200)
+    ivf.add_argument("--queries", type=int, default=200)
+    ivf.add_argument("--k", type=int, default=10)
+    ivf.add_argument("--nlist", type=int, default=None, help="default 4*sqrt(n)")
+    ivf.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    ivf.add_argument("--seed", type=int, default=7)
+    ivf.set_defaults(run=run_ivf)
+
+    mmr = sub.add_parser("mmr", help="Chroma MMR against the vectorized MMR stage")
+    mmr.add_argument("--vectors", type=int, default=20000)
+    mmr.add_argument("--dim", type=int, default=384)
+    mmr.add_argument("--clusters", type=int, default=50)
+    mmr.add_argument("--queries", type=int, default=100)
+    mmr.add_argument("--k", type=int, default=4)
+    mmr.add_argument("--fetch-k", type=int, nargs="+", default=[20, 100, 400])
+    mmr.add_argument("--lambda-mult", type=float, default=0.5)
+    mmr.add_argument("--seed", type=int, default=7)
+    mmr.set_defaults(run=run_mmr)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    _print_report(args.run(args), args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
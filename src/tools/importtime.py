@@ -0,0 +1,114 @@
+"""Cold-start import time report.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter and
+summarises the slowest imports, so regressions in API/UI startup are visible::
+
+    python -m src.tools.importtime --module src.api.app --budget-ms 1500
+
+Exits with status 1 when the total import time exceeds ``--budget-ms``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Parse the ``import time: self | cumulative | name`` lines of -X importtime."""
+    timings: List[ImportTiming] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        self_raw, cumulative_raw, name = parts
+        try:
+            self_us = int(self_raw.strip())
+            cumulative_us = int(cumulative_raw.strip())
+        except ValueError:
+            continue  # header line
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        timings.append(ImportTiming(name.strip(), self_us, cumulative_us, depth))
+    return timings
+
+
+def measure(module: str, python: str = sys.executable) -> List[ImportTiming]:
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def total_ms(timings: Sequence[ImportTiming], module: str) -> float:
+    for timing in timings:
+        if timing.module == module:
+            return timing.cumulative_us / 1000
+    return sum(t.self_us for t in timings) / 1000
+
+
+def top_level_packages(timings: Sequence[ImportTiming]) -> List[ImportTiming]:
+    """Aggregate self time per top-level package (e.g. ``langchain_core``)."""
+    totals: dict[str, int] = {}
+    for timing in timings:
+        root = timing.module.split(".")[0]
+        totals[root] = totals.get(root, 0) + timing.self_us
+    return [
+        ImportTiming(name, self_us, self_us, 0)
+        for name, self_us in sorted(
+            totals.items(), key=lambda item: (-item[1], item[0])
+        )
+    ]
+
+
+def format_report(timings: Sequence[ImportTiming], module: str, top: int) -> str:
+    lines = [f"Import time for {module}: {total_ms(timings, module):.1f} ms", ""]
+    lines.append("Slowest packages (self time):")
+    for timing in top_level_packages(timings)[:top]:
+        lines.append(f"  {timing.self_us / 1000:9.1f} ms  {timing.module}")
+    lines.append("")
+    lines.append("Slowest modules (cumulative):")
+    slowest = sorted(timings, key=lambda t: -t.cumulative_us)[:top]
+    for timing in slowest:
+        lines.append(f"  {timing.cumulative_us / 1000:9.1f} ms  {timing.module}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="src.api.app", help="module to import")
+    parser.add_argument("--top", type=int, default=15, help="rows per section")
+    parser.add_argument(
+        "--budget-ms", type=float, default=None, help="fail when total exceeds this"
+    )
+    args = parser.parse_args(argv)
+
+    timings = measure(args.module)
+    print(format_report(timings, args.module, args.top))
+
+    elapsed = total_ms(timings, args.module)
+    if args.budget_ms is not None and elapsed > args.budget_ms:
+        print(f"\nOver budget: {elapsed:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
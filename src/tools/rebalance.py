@@ -0,0 +1,120 @@
+"""Offline shard rebalancing for a vector store profile.
+
+Moves every chunk to the shard its source hashes to under the new shard count,
+reusing the stored vectors (no re-embedding)::
+
+    VS_PROFILE=local python -m src.tools.rebalance --shards 4
+    VS_PROFILE=local python -m src.tools.rebalance --shards 4 --dry-run
+
+Stop the API/UI first, run the command, then set ``shards:`` in
+configs/vector_store.yml to the new count. ``--from-shards`` overrides the
+current count when the config was already edited.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.core.sharded_store import shard_for
+from src.core.store_io import iter_records, write_records
+from src.core.vector_store import (
+    _DELETE_BATCH,
+    _build_single_store,
+    _load_vs_cfg,
+    close_vector_stores,
+    mark_store_changed,
+    shard_configs,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def rebalance(
+    vcfg: dict,
+    shards: int,
+    from_shards: Optional[int] = None,
+    page_size: int = 1000,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Redistribute chunks of ``vcfg`` from its current shard count to ``shards``."""
+    old = shard_configs(vcfg, from_shards)
+    new = shard_configs(vcfg, shards)
+    new_names = [cfg["collection_name"] for cfg in new]
+    stores = {cfg["collection_name"]: _build_single_store(cfg) for cfg in old + new}
+
+    report: Dict[str, Any] = {
+        "from_shards": len(old),
+        "to_shards": len(new),
+        "dry_run": dry_run,
+        "scanned": 0,
+        "moved": 0,
+        "dropped_collections": [],
+    }
+    for cfg in old:
+        name = cfg["collection_name"]
+        source_store = stores[name]
+        moved_ids: List[str] = []
+        for page in iter_records(source_store, page_size):
+            report["scanned"] += len(page["ids"])
+            targets: Dict[str, List[int]] = {}
+            for row, meta in enumerate(page["metadatas"]):
+                target = new_names[shard_for(str(meta.get("source", "")), len(new))]
+                if target != name:
+                    targets.setdefault(target, []).append(row)
+            for target, rows in targets.items():
+                if not dry_run:
+                    write_records(
+                        stores[target],
+                        [page["ids"][row] for row in rows],
+                        [page["documents"][row] for row in rows],
+                        [page["metadatas"][row] for row in rows],
+                        [page["embeddings"][row] for row in rows],
+                    )
+                moved_ids.extend(page["ids"][row] for row in rows)
+        report["moved"] += len(moved_ids)
+        logger.info(f"Shard {name}: {len(moved_ids)} chunks to move")
+        if dry_run:
+            continue
+        # Delete only after the whole shard was read, so paging offsets stay valid
+        for start in range(0, len(moved_ids), _DELETE_BATCH):
+            source_store.delete(ids=moved_ids[start : start + _DELETE_BATCH])
+        if name not in new_names and hasattr(source_store, "delete_collection"):
+            source_store.delete_collection()
+            report["dropped_collections"].append(name)
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, required=True, help="new shard count")
+    parser.add_argument(
+        "--from-shards", type=int, default=None, help="current count (default: config)"
+    )
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="only count moves")
+    args = parser.parse_args(argv)
+
+    vcfg = _load_vs_cfg()
+    try:
+        report = rebalance(
+            vcfg, args.shards, args.from_shards, args.page_size, args.dry_run
+        )
+        if not args.dry_run:
+            mark_store_changed()
+    finally:
+        close_vector_stores()
+    print(json.dumps(report, indent=2))
+    if not args.dry_run and int(vcfg.get("shards", 1)) != args.shards:
+        print(
+            f"Now set 'shards: {args.shards}' in the profile in "
+            "configs/vector_store.yml"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Rebuild the source and keyword indexes of the active vector store profile.
+
+    VS_PROFILE=local python -m src.tools.reindex
+
+Both indexes are maintained incrementally by ``embed_and_store`` and
+``delete_sources``; run this once for collections ingested before they
+existed, or after writing to the store directly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from src.core.store_io import iter_records
+from src.core.vector_store import (
+    close_vector_stores,
+    load_lexical_index,
+    load_source_index,
+    load_vector_store,
+    mark_store_changed,
+)
+
+
+def reindex(page_size: int = 1000) -> Dict[str, int]:
+    """Re-read every chunk (without vectors) into fresh indexes."""
+    lexical = load_lexical_index()
+    lexical.clear()
+    by_source: Dict[str, List[str]] = {}
+    chunks = 0
+    for page in iter_records(load_vector_store(), page_size, embeddings=False):
+        lexical.upsert(
+            Document(id=chunk, page_content=text, metadata=meta)
+            for chunk, text, meta in zip(
+                page["ids"], page["documents"], page["metadatas"]
+            )
+        )
+        for chunk, meta in zip(page["ids"], page["metadatas"]):
+            if meta.get("source"):
+                by_source.setdefault(str(meta["source"]), []).append(chunk)
+        chunks += len(page["ids"])
+    load_source_index().replace(by_source)
+    mark_store_changed()
+    return {"chunks": chunks, "sources": len(by_source)}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    try:
+        report = reindex(args.page_size)
+    finally:
+        close_vector_stores()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Export or restore a binary snapshot of the active vector store profile.
+
+    VS_PROFILE=local python -m src.tools.snapshot export snapshots/2024-06-01
+    VS_PROFILE=local python -m src.tools.snapshot import snapshots/2024-06-01
+
+Restoring reuses the stored vectors (no embedding calls) and then rebuilds the
+source and keyword indexes from the whole store (see src/tools/reindex.py), so
+chunks the store already held keep their entries and a fresh replica is
+query-ready as soon as the command exits.
+See src/core/snapshot.py for the on-disk format.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Dict, Optional, Sequence
+
+from src.core.embedder import embedder_namespace
+from src.core.snapshot import export_snapshot, import_snapshot
+from src.core.vector_store import close_vector_stores, load_vector_store
+from src.tools.reindex import reindex
+
+
+def run_export(args: argparse.Namespace) -> Dict[str, object]:
+    manifest = export_snapshot(
+        load_vector_store(), args.directory, embedder_namespace(), args.page_size
+    )
+    return {key: value for key, value in manifest.items() if key != "files"}
+
+
+def run_import(args: argparse.Namespace) -> Dict[str, object]:
+    snapshot = import_snapshot(
+        args.directory,
+        load_vector_store(),
+        embedder_namespace(),
+        verify=not args.no_verify,
+        force=args.force,
+        page_size=args.page_size,
+    )
+    indexed = reindex(args.page_size)
+    return {"imported": snapshot.count, **indexed}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser(
+        "export", help="write the store to a new snapshot directory"
+    )
+    export.add_argument("directory")
+    export.add_argument("--page-size", type=int, default=1000)
+    export.set_defaults(run=run_export)
+
+    restore = sub.add_parser("import", help="bulk-load a snapshot into the store")
+    restore.add_argument("directory")
+    restore.add_argument("--page-size", type=int, default=5000)
+    restore.add_argument("--no-verify", action="store_true", help="skip checksums")
+    restore.add_argument(
+        "--force", action="store_true", help="ignore an embedder mismatch"
+    )
+    restore.set_defaults(run=run_import)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        report = args.run(args)
+    finally:
+        close_vector_stores()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,7 @@ from dotenv import load_dotenv
 
 from src.core.ingestion import ingest_files, store_uploaded_file
 from src.core.rag import answer
-from src.core.vector_store import delete_by_source
+from src.core.vector_store import delete_sources
 
 load_dotenv()
 st.set_page_config(page_title="Naive RAG", layout="wide")
@@ -47,6 +47,7 @@ def _remove_missing_uploads(current_signatures: set[str]) -> None:
     removed = [
         signature for signature in stored_uploads if signature not in current_signatures
     ]
+    deleted_paths: List[str] = []
     for signature in removed:
         path_str = stored_uploads.get(signature)
         file_path = Path(path_str) if path_str else None
@@ -62,8 +63,11 @@ def _remove_missing_uploads(current_signatures: set[str]) -> None:
         else:
             stored_uploads.pop(signature, None)
             if file_path:
-                delete_by_source(str(file_path))
+                deleted_paths.append(str(file_path))
         processed.discard(signature)
+    if deleted_paths:
+        # One bulk delete through a single store handle for all removed files
+        delete_sources(deleted_paths)
 
 
 def _collect_upload_payloads(uploads) -> List[Dict[str, Any]]:
@@ -1,13 +1,19 @@
 import os
-import tempfile
 import shutil
+import tempfile
 from unittest.mock import patch
 import pytest
 from langchain_core.documents import Document
 
 from src.core.chunker import chunk_documents
+from src.core.ingestion import ingest_files
 from src.core.loader import load_documents
-from src.core.vector_store import embed_and_store, load_vector_store
+from src.core.rag import answer
+from src.core.vector_store import (
+    close_vector_stores,
+    embed_and_store,
+    load_vector_store,
+)
 
 
 def test_ingest_flow_loader_to_chunker(tmp_path):
@@ -42,7 +48,7 @@ def test_ingest_flow_loader_to_chunker(tmp_path):
         assert "A A A" in all_content  # Part of the repeated A's
         assert "Outro" in all_content
 
-
+    
 def test_ingest_flow_complete_pipeline(tmp_path):
     """Load file -> Documents -> chunk -> embed -> store -> verify retrieval."""
     # This test requires Ollama to be running locally
@@ -51,13 +57,13 @@ def test_ingest_flow_complete_pipeline(tmp_path):
     
     # Create a temporary directory for Chroma persistence
     temp_dir = tempfile.mkdtemp()
-    
+        
     try:
         # 1) Create test file
         content = "The quick brown fox jumps over the lazy dog. " * 20  # Repeated sentence
         fpath = tmp_path / "sample.txt"
         fpath.write_text(content)
-        
+
         # Override the persist directory to use our temporary directory
         with patch.dict(os.environ, {
             "EMBED_PROFILE": "local",
@@ -110,3 +116,32 @@ def test_ingest_flow_complete_pipeline(tmp_path):
     finally:
         # Clean up the temporary directory
         shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_offline_pipeline_ingest_and_answer(tmp_path):
+    """Ingest -> retrieve -> answer with the offline hashing/echo providers."""
+    fpath = tmp_path / "fox.txt"
+    fpath.write_text(
+        "The quick brown fox jumps over the lazy dog.\n\n"
+        + "Unrelated filler about databases and indexes. " * 20
+    )
+
+    with patch.dict(os.environ, {"EMBED_PROFILE": "offline", "LLM_PROFILE": "echo"}):
+        with patch("src.core.vector_store._load_vs_cfg") as mock_load_cfg:
+            mock_load_cfg.return_value = {
+                "provider": "chroma_local",
+                "persist_dir": str(tmp_path / "chroma"),
+                "collection_name": "offline_pipeline",
+            }
+            with patch("src.core.llm._load_llm_cfg") as mock_llm_cfg:
+                mock_llm_cfg.return_value = {"provider": "echo", "model_name": "echo"}
+                try:
+                    summary = ingest_files([fpath])
+                    assert summary.succeeded
+
+                    result = answer("quick brown fox", k=1)
+                finally:
+                    close_vector_stores()
+
+    assert result["answer"].startswith("Echo: quick brown fox")
+    assert result["sources"][0]["source"] == str(fpath)
@@ -0,0 +1,65 @@
+import asyncio
+
+from langchain_core.documents import Document
+
+from src.core.adaptive import AdaptiveRetriever, adaptive_cut
+from src.core.flat_store import FlatVectorStore
+from src.core.offline import HashingEmbeddings
+
+
+def _scored(*scores):
+    return [(Document(page_content=f"d{i}"), score) for i, score in enumerate(scores)]
+
+
+def _contents(pairs):
+    return [doc.page_content for doc, _ in pairs]
+
+
+def test_threshold_drops_low_scores():
+    hits = _scored(0.9, 0.6, 0.3)
+
+    assert _contents(adaptive_cut(hits, score_threshold=0.5)) == ["d0", "d1"]
+    assert adaptive_cut(hits, score_threshold=0.95) == []
+    assert adaptive_cut(hits) == hits
+
+
+def test_largest_gap_cut_needs_min_gap():
+    hits = _scored(0.82, 0.80, 0.41, 0.39)
+
+    assert _contents(adaptive_cut(hits, min_gap=0.1)) == ["d0", "d1"]
+    assert adaptive_cut(hits, min_gap=0.5) == hits
+    # A flat score profile is not cut
+    assert len(adaptive_cut(_scored(0.82, 0.80, 0.79), min_gap=0.05)) == 3
+
+
+def test_gap_cut_keeps_min_k():
+    hits = _scored(0.9, 0.3, 0.28, 0.1)
+
+    assert _contents(adaptive_cut(hits, min_gap=0.1)) == ["d0"]
+    assert _contents(adaptive_cut(hits, min_gap=0.1, min_k=2)) == ["d0", "d1", "d2"]
+    assert _contents(adaptive_cut(hits, score_threshold=0.2, min_gap=0.1)) == ["d0"]
+
+
+def test_retriever_returns_relevant_hits_only(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=256))
+    store.add_texts(
+        [
+            "reset your password from the account settings page",
+            "the password reset link expires after one hour",
+            "banana smoothie recipe with oats",
+            "quarterly revenue grew by four percent",
+        ],
+        [{"source": f"{i}.txt"} for i in range(4)],
+    )
+    retriever = AdaptiveRetriever(store=store, k=4, min_gap=0.1)
+
+    scored = retriever.scored("password reset")
+    docs = retriever.invoke("password reset")
+
+    assert [doc.metadata["source"] for doc in docs] == ["1.txt", "0.txt"]
+    assert all(0.0 <= score <= 1.0 for _, score in scored)
+    assert [score for _, score in scored] == sorted(
+        (s for _, s in scored), reverse=True
+    )
+    assert asyncio.run(retriever.ascored("password reset")) == scored
+    assert asyncio.run(retriever.ainvoke("password reset")) == docs
@@ -0,0 +1,96 @@
+import pytest
+from langchain_core.documents import Document
+
+from src.core.answer_cache import (
+    MemoryAnswerCache,
+    SQLiteAnswerCache,
+    answer_key,
+    build_answer_cache,
+    chunk_ref,
+)
+
+ANSWER = {
+    "answer": "42",
+    "sources": [{"source": "a.txt", "chunk": 0}],
+    "context_tokens": 3,
+}
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _caches(tmp_path, clock, **kwargs):
+    return [
+        MemoryAnswerCache(clock=clock, **kwargs),
+        SQLiteAnswerCache(tmp_path / "answers.sqlite", clock=clock, **kwargs),
+    ]
+
+
+def test_answer_key_normalizes_question_but_not_chunks_or_model():
+    key = answer_key("What is  RAG?", ["c1", "c2"], "model-a")
+    assert answer_key("what is rag?", ["c1", "c2"], "model-a") == key
+    assert answer_key("What is RAG?", ["c2", "c1"], "model-a") != key
+    assert answer_key("What is RAG?", ["c1", "c2"], "model-b") != key
+    assert answer_key("What is RAG?", ["c1", "c2"], "model-a", context_tokens=9) != key
+
+
+def test_chunk_ref_falls_back_to_content_hash():
+    assert chunk_ref(Document(id="c1", page_content="x")) == "c1"
+    assert chunk_ref(Document(page_content="x")) != chunk_ref(
+        Document(page_content="y")
+    )
+
+
+def test_backends_store_expire_and_evict(tmp_path):
+    clock = _Clock()
+    for cache in _caches(tmp_path, clock, max_entries=2, ttl_seconds=60):
+        cache.put("k1", ANSWER, ["c1"])
+        cache.put("k2", ANSWER, ["c2"])
+        assert cache.get("k1") == ANSWER  # k2 is now least recently used
+        cache.put("k3", ANSWER, ["c3"])
+        assert cache.get("k2") is None and len(cache) == 2
+
+        clock.now += 61
+        assert cache.get("k1") is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 2, 1)
+        cache.close()
+        clock.now = 1000.0
+
+
+def test_backends_invalidate_answers_built_on_removed_chunks(tmp_path):
+    for cache in _caches(tmp_path, _Clock()):
+        cache.put("k1", ANSWER, ["c1", "c2"])
+        cache.put("k2", ANSWER, ["c3"])
+        cache.put("k1", ANSWER, ["c1"])  # replacing an entry replaces its chunks
+
+        assert cache.invalidate(["c2"]) == 0
+        assert cache.invalidate(["c1", "missing"]) == 1
+        assert cache.get("k1") is None and cache.get("k2") == ANSWER
+        assert cache.stats()["invalidations"] == 1
+        cache.close()
+
+
+def test_sqlite_backend_survives_reopen(tmp_path):
+    path = tmp_path / "answers.sqlite"
+    cache = SQLiteAnswerCache(path)
+    cache.put("k1", ANSWER, ["c1"])
+    cache.close()
+
+    reopened = SQLiteAnswerCache(path)
+    assert reopened.get("k1") == ANSWER
+    reopened.close()
+
+
+def test_build_answer_cache_selects_backend(tmp_path):
+    assert isinstance(build_answer_cache({}), MemoryAnswerCache)
+    disk = build_answer_cache({"backend": "sqlite", "path": str(tmp_path / "a.sqlite")})
+    assert isinstance(disk, SQLiteAnswerCache)
+    disk.close()
+    with pytest.raises(ValueError):
+        build_answer_cache({"backend": "redis"})
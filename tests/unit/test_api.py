@@ -1,8 +1,12 @@
-from unittest.mock import patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+from langchain_core.documents import Document
 
-from src.api.app import app
+from src.api.app import QueryRequest, app, run_query
 
 
 client = TestClient(app)
@@ -14,7 +18,7 @@ def test_health_endpoint_returns_ok():
     assert resp.json() == {"status": "ok"}
 
 
-@patch("src.api.app.answer")
+@patch("src.api.app.aanswer")
 def test_query_endpoint_returns_rag_output(mock_answer):
     mock_answer.return_value = {
         "answer": "42",
@@ -32,9 +36,166 @@ def test_query_endpoint_returns_rag_output(mock_answer):
         "answer": "42",
         "sources": [{"source": "doc.txt", "chunk": 0}],
     }
-    mock_answer.assert_called_once_with("What is the answer?", k=2)
+    mock_answer.assert_awaited_once_with("What is the answer?", k=2)
+
+
+@patch("src.api.app._DISCONNECT_POLL_SECONDS", 0.01)
+@patch("src.api.app.aanswer")
+def test_query_is_cancelled_when_the_client_disconnects(mock_answer):
+    cancelled = []
+
+    async def slow_answer(question, k):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(question)
+            raise
+
+    mock_answer.side_effect = slow_answer
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(side_effect=[False, True])
+
+    async def main():
+        with pytest.raises(HTTPException) as err:
+            await run_query(QueryRequest(question="q"), request)
+        await asyncio.sleep(0.01)  # let the cancellation land
+        return err.value.status_code, list(cancelled)
+
+    assert asyncio.run(main()) == (499, ["q"])
+
+
+@patch("src.api.app.embedding_cache_stats")
+def test_stats_endpoint_reports_cache_counters(mock_stats):
+    mock_stats.return_value = [
+        {"namespace": "ollama:m", "hits": 3, "misses": 1, "entries": 1}
+    ]
+
+    resp = client.get("/stats")
+
+    assert resp.status_code == 200
+    assert resp.json()["embedding_cache"][0]["hits"] == 3
+
+
+@patch("src.api.app.aanswer_many")
+def test_batch_query_endpoint_reports_items_in_order(mock_answer_many):
+    mock_answer_many.return_value = [
+        {"answer": "A", "sources": [{"source": "doc.txt", "chunk": 1}]},
+        {"error": "rate limited"},
+    ]
+
+    resp = client.post("/query/batch", json={"questions": ["q1", "q2"], "top_k": 3})
+
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "results": [
+            {
+                "answer": "A",
+                "sources": [{"source": "doc.txt", "chunk": 1}],
+                "error": None,
+            },
+            {"answer": None, "sources": [], "error": "rate limited"},
+        ]
+    }
+    mock_answer_many.assert_awaited_once_with(["q1", "q2"], k=3)
+
+
+def test_batch_query_validation():
+    assert client.post("/query/batch", json={"questions": []}).status_code == 422
+    assert (
+        client.post("/query/batch", json={"questions": ["ok", ""]}).status_code == 422
+    )
+
+
+@patch("src.api.app.aretrieve_with_scores")
+@patch("src.api.app.aanswer")
+def test_retrieve_endpoint_returns_scored_chunks_without_llm(
+    mock_answer, mock_retrieve
+):
+    mock_retrieve.return_value = [
+        (
+            Document(
+                id="c1", page_content="text", metadata={"source": "a.txt", "chunk": 2}
+            ),
+            0.91,
+        ),
+        (Document(page_content="other", metadata={}), 0.5),
+    ]
+
+    resp = client.post("/retrieve", json={"question": "What?", "top_k": 5})
+
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "chunks": [
+            {
+                "id": "c1",
+                "content": "text",
+                "source": "a.txt",
+                "chunk": 2,
+                "score": 0.91,
+            },
+            {
+                "id": None,
+                "content": "other",
+                "source": "unknown",
+                "chunk": None,
+                "score": 0.5,
+            },
+        ]
+    }
+    mock_retrieve.assert_awaited_once_with("What?", k=5)
+    mock_answer.assert_not_called()
 
 
 def test_query_validation_for_missing_question():
     resp = client.post("/query", json={})
     assert resp.status_code == 422
+
+
+@patch("src.api.app.aanswer_stream")
+def test_query_stream_endpoint_sends_sse_events(mock_stream):
+    async def events(question, k):
+        yield {"event": "token", "text": "4"}
+        yield {"event": "token", "text": "2"}
+        yield {"event": "sources", "sources": [{"source": "doc.txt", "chunk": 0}]}
+        raise RuntimeError("connection reset")
+
+    mock_stream.side_effect = events
+
+    resp = client.post("/query/stream", json={"question": "What?", "top_k": 2})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text.split("\n\n")[:4] == [
+        'event: token\ndata: {"text": "4"}',
+        'event: token\ndata: {"text": "2"}',
+        'event: sources\ndata: {"sources": [{"source": "doc.txt", "chunk": 0}]}',
+        'event: error\ndata: {"error": "connection reset"}',
+    ]
+    mock_stream.assert_called_once_with("What?", k=2)
+
+
+@patch("src.api.app.aanswer_stream")
+def test_query_stream_setup_failure_returns_500(mock_stream):
+    async def events(question, k):
+        raise EnvironmentError("GOOGLE_API_KEY missing")
+        yield  # pragma: no cover - makes this a generator
+
+    mock_stream.side_effect = events
+
+    resp = client.post("/query/stream", json={"question": "What?"})
+
+    assert resp.status_code == 500
+    assert "GOOGLE_API_KEY" in resp.json()["detail"]
+
+
+@patch("src.api.app.aanswer_stream")
+def test_query_stream_setup_failure_closes_the_stream(mock_stream):
+    stream = MagicMock()
+    stream.__anext__ = AsyncMock(side_effect=RuntimeError("retriever down"))
+    stream.aclose = AsyncMock()
+    mock_stream.return_value = stream
+
+    resp = client.post("/query/stream", json={"question": "What?"})
+
+    assert resp.status_code == 500
+    stream.aclose.assert_awaited_once()
@@ -0,0 +1,64 @@
+import json
+
+from src.tools.bench import (
+    main,
+    percentile,
+    recall_at_k,
+    summarize,
+    synthetic_corpus,
+    synthetic_questions,
+)
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 100) == 4.0
+    assert percentile(values, 50) == 2.5
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_reports_throughput_and_percentiles():
+    report = summarize([0.1, 0.2, 0.3], wall_seconds=0.5)
+    assert report["count"] == 3
+    assert report["throughput_per_s"] == 6.0
+    assert report["p50_ms"] == 200.0
+
+
+def test_synthetic_inputs_are_reproducible(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first = synthetic_corpus(tmp_path / "a", docs=2, words=48, seed=3)
+    second = synthetic_corpus(tmp_path / "b", docs=2, words=48, seed=3)
+
+    assert [p.read_text() for p in first] == [p.read_text() for p in second]
+    assert synthetic_questions(3, seed=3) == synthetic_questions(3, seed=3)
+
+
+def test_recall_at_k():
+    assert recall_at_k([[1, 2], [3, 4]], [[1, 2], [3, 5]]) == 0.75
+    assert recall_at_k([], []) == 0.0
+
+
+def test_ivf_bench_reports_recall_per_nprobe(capsys):
+    main(
+        ["--json", "ivf", "--vectors", "500", "--dim", "16", "--clusters", "8"]
+        + ["--queries", "10", "--k", "5", "--nlist", "8", "--nprobe", "1", "8"]
+    )
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["build"]["nlist"] == 8
+    assert report["ivf nprobe=8"]["recall_at_k"] == 1.0
+    assert 0.0 < report["ivf nprobe=1"]["recall_at_k"] <= 1.0
+
+
+def test_mmr_bench_compares_with_chroma(capsys):
+    main(
+        ["--json", "mmr", "--vectors", "300", "--dim", "16", "--clusters", "5"]
+        + ["--queries", "5", "--fetch-k", "20"]
+    )
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["vectorized fetch_k=20"]["same_picks"] == 1.0
+    assert report["chroma mmr fetch_k=20"]["count"] == 5
+    assert report["vectorized flat fetch_k=20"]["count"] == 5
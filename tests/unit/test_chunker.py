@@ -13,7 +13,7 @@ DEFAULT_CFG = {
 }
 
 
-@patch("src.core.chunker.yaml.safe_load", return_value=DEFAULT_CFG)
+@patch("src.core.chunker.load_config", return_value=DEFAULT_CFG)
 def test_basic_chunking(mock_cfg):
     """A document is correctly split into multiple chunks with overlap."""
     text = "A" * 120  # 120 characters -> 3 chunks (50, 50, 20)
@@ -33,7 +33,7 @@ def test_basic_chunking(mock_cfg):
     assert "source_doc" in chunks[0].metadata
 
 
-@patch("src.core.chunker.yaml.safe_load", return_value=DEFAULT_CFG)
+@patch("src.core.chunker.load_config", return_value=DEFAULT_CFG)
 def test_multiple_documents(mock_cfg):
     """Multiple input documents are processed into a flat list of chunks."""
     d1 = Document(page_content="X" * 60, metadata={"source": "doc1"})
@@ -47,7 +47,7 @@ def test_multiple_documents(mock_cfg):
     assert {c.metadata["source_doc"] for c in chunks} == {0, 1}
 
 
-@patch("src.core.chunker.yaml.safe_load", return_value=DEFAULT_CFG)
+@patch("src.core.chunker.load_config", return_value=DEFAULT_CFG)
 def test_empty_document_returns_no_chunks(mock_cfg):
     """Empty content -> no chunks (current behavior of the splitter)."""
     docs = [Document(page_content="", metadata={"source": "empty"})]
@@ -55,7 +55,7 @@ def test_empty_document_returns_no_chunks(mock_cfg):
     assert chunks == []
 
 
-@patch("src.core.chunker.yaml.safe_load", return_value=DEFAULT_CFG)
+@patch("src.core.chunker.load_config", return_value=DEFAULT_CFG)
 def test_hard_cut_without_separators(mock_cfg):
     """No separator in text -> hard cut at chunk_size."""
     text = "A" * 130  # No whitespaces
@@ -65,7 +65,7 @@ def test_hard_cut_without_separators(mock_cfg):
     assert [len(c.page_content) for c in chunks] == [50, 50, 50]
 
 
-@patch("src.core.chunker.yaml.safe_load", return_value=DEFAULT_CFG)
+@patch("src.core.chunker.load_config", return_value=DEFAULT_CFG)
 def test_metadata_propagation(mock_cfg):
     """Original metadata is preserved and extended."""
     meta = {"source": "doc.pdf", "page": 3}
@@ -83,13 +83,13 @@ def test_metadata_propagation(mock_cfg):
 def test_bad_config_raises_keyerror():
     """Missing keys in the config currently lead to KeyError."""
     bad_cfg = {"chunk_overlap": 10}  # chunk_size is missing
-    with patch("src.core.chunker.yaml.safe_load", return_value=bad_cfg):
+    with patch("src.core.chunker.load_config", return_value=bad_cfg):
         d = Document(page_content="abc", metadata={})
         with pytest.raises(KeyError):
             chunk_documents([d])
 
 
-@patch("src.core.chunker.yaml.safe_load", return_value=DEFAULT_CFG)
+@patch("src.core.chunker.load_config", return_value=DEFAULT_CFG)
 def test_logging_messages(mock_cfg, caplog):
     """Important log messages appear."""
     d = Document(page_content="A" * 60, metadata={})
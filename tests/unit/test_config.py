@@ -0,0 +1,74 @@
+import os
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+from src.core.config import ConfigRegistry
+
+
+def _write(path, text):
+    path.write_text(text)
+    # Bump the mtime explicitly; some filesystems have coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_load_parses_once_and_serves_from_cache(tmp_path):
+    _write(tmp_path / "retriever.yml", "search_type: similarity\nk: 4\n")
+    registry = ConfigRegistry(tmp_path)
+
+    with patch("src.core.config.yaml.safe_load", wraps=yaml.safe_load) as spy:
+        first = registry.load("retriever")
+        second = registry.load("retriever")
+
+    assert first == {"search_type": "similarity", "k": 4}
+    assert second is first
+    assert spy.call_count == 1
+
+
+def test_load_reparses_after_file_change(tmp_path):
+    path = tmp_path / "retriever.yml"
+    _write(path, "k: 4\n")
+    registry = ConfigRegistry(tmp_path)
+    assert registry.load("retriever")["k"] == 4
+
+    _write(path, "k: 9\n")
+    assert registry.load("retriever")["k"] == 9
+
+
+def test_reload_drops_cached_entry(tmp_path):
+    path = tmp_path / "retriever.yml"
+    _write(path, "k: 4\n")
+    registry = ConfigRegistry(tmp_path)
+    registry.load("retriever")
+
+    with patch("src.core.config.yaml.safe_load", return_value={"k": 2}):
+        assert registry.load("retriever")["k"] == 4  # still cached
+        registry.reload()
+        assert registry.load("retriever")["k"] == 2
+
+
+def test_missing_file_required_and_optional(tmp_path):
+    registry = ConfigRegistry(tmp_path)
+    assert registry.load("llm", required=False) == {}
+    with pytest.raises(FileNotFoundError):
+        registry.load("llm")
+
+
+def test_profile_file_with_unknown_default_is_rejected(tmp_path):
+    _write(tmp_path / "llm.yml", "default: nope\nopenai:\n  provider: openai\n")
+    registry = ConfigRegistry(tmp_path)
+    with pytest.raises(ValueError, match="default profile 'nope'"):
+        registry.load("llm")
+
+
+def test_chunking_overlap_must_be_smaller_than_size(tmp_path):
+    _write(tmp_path / "chunking.yml", "chunk_size: 10\nchunk_overlap: 10\n")
+    registry = ConfigRegistry(tmp_path)
+    with pytest.raises(ValueError, match="chunk_overlap"):
+        registry.load("chunking")
+
+
+def test_repository_configs_are_valid():
+    ConfigRegistry().preload()
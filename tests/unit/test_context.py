@@ -0,0 +1,148 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from src.core.context import (
+    approx_tokens,
+    merge_chunks,
+    pack_context,
+    strip_overlap,
+    token_counter,
+)
+
+
+def _chunk(text, source="a.txt", chunk=0):
+    return Document(page_content=text, metadata={"source": source, "chunk": chunk})
+
+
+@pytest.fixture(autouse=True)
+def _fresh_counters():
+    token_counter.cache_clear()
+    yield
+    token_counter.cache_clear()
+
+
+def test_strip_overlap_removes_repeated_prefix_only():
+    assert strip_overlap("the quick brown fox", "brown fox jumps") == " jumps"
+    assert (
+        strip_overlap("the quick brown fox", "brown fox jumps", max_overlap=5)
+        == "brown fox jumps"
+    )
+    # Short coincidental matches are kept
+    assert strip_overlap("ends with a.", "a. begins") == "a. begins"
+
+
+def test_merge_chunks_joins_neighbours_of_same_source_in_rank_order():
+    docs = [
+        _chunk("zeta block", source="b.txt", chunk=4),
+        _chunk("one two three four", chunk=2),
+        _chunk("one two three four", chunk=2),  # duplicate hit
+        _chunk("three four five six", chunk=3),
+        _chunk("far away", chunk=9),
+        Document(page_content="no metadata"),
+    ]
+
+    blocks = merge_chunks(docs)
+
+    assert [text for text, _ in blocks] == [
+        "zeta block",
+        "one two three four five six",
+        "far away",
+        "no metadata",
+    ]
+    assert [len(members) for _, members in blocks] == [1, 2, 1, 1]
+
+
+def test_merge_chunks_without_overlap_keeps_both_texts():
+    blocks = merge_chunks(
+        [_chunk("first paragraph", chunk=0), _chunk("second one", chunk=1)]
+    )
+    assert blocks[0][0] == "first paragraph\nsecond one"
+
+
+def test_merge_chunks_keeps_pages_of_one_source_apart():
+    # The chunker numbers chunks per loaded document, i.e. per PDF page
+    def page(text, number, chunk):
+        return Document(
+            page_content=text,
+            metadata={
+                "source": "a.pdf",
+                "page": number,
+                "source_doc": number,
+                "chunk": chunk,
+            },
+        )
+
+    docs = [
+        page("page one start", 0, 0),
+        page("page two start", 1, 0),
+        page("page two more", 1, 1),
+        page("page four", 3, 2),
+    ]
+
+    blocks = merge_chunks(docs)
+    packed = pack_context(docs)
+
+    assert [text for text, _ in blocks] == [
+        "page one start",
+        "page two start\npage two more",
+        "page four",
+    ]
+    assert packed.dropped == 0 and len(packed.documents) == 4
+
+
+def test_pack_context_skips_blocks_over_budget_and_reports_tokens():
+    docs = [
+        _chunk("a" * 40, chunk=0),
+        _chunk("b" * 400, source="b.txt"),
+        _chunk("c" * 20, source="c.txt"),
+    ]
+
+    packed = pack_context(docs, budget=20, count=approx_tokens)
+
+    assert packed.text == "a" * 40 + "\n\n" + "c" * 20
+    assert [d.page_content[0] for d in packed.documents] == ["a", "c"]
+    assert packed.tokens == 10 + 1 + 5
+    assert packed.raw_tokens == approx_tokens("\n\n".join(d.page_content for d in docs))
+    assert packed.dropped == 1
+
+
+def test_pack_context_truncates_first_block_and_keeps_all_without_budget():
+    docs = [_chunk("x" * 100)]
+    assert pack_context(docs, budget=5).text == "x" * 20
+    assert pack_context(docs).tokens == 25
+
+
+def test_token_counter_uses_tiktoken_encoding():
+    encoding = MagicMock()
+    encoding.encode.side_effect = lambda text, **_: text.split()
+    with (
+        patch("tiktoken.encoding_for_model", side_effect=KeyError("llama")),
+        patch("tiktoken.get_encoding", return_value=encoding) as get_encoding,
+    ):
+        count = token_counter("llama")
+
+    assert count("three word text") == 3
+    get_encoding.assert_called_once_with("cl100k_base")
+
+
+def test_token_counter_falls_back_when_encoding_cannot_load():
+    with patch("tiktoken.get_encoding", side_effect=OSError("no network")):
+        count = token_counter("", "cl100k_base")
+    assert count is approx_tokens
+    assert token_counter("gpt-4o", "approx") is approx_tokens
+
+
+def test_pack_context_cuts_oversized_run_back_to_leading_chunks():
+    docs = [
+        _chunk("c" * 20, source="c.txt"),
+        _chunk("a" * 40, chunk=0),
+        _chunk("b" * 40, chunk=1),
+    ]
+
+    packed = pack_context(docs, budget=17, count=approx_tokens)
+
+    assert packed.text == "c" * 20 + "\n\n" + "a" * 40
+    assert packed.tokens == 5 + 1 + 10
+    assert packed.dropped == 1
@@ -2,7 +2,14 @@ import os
 from unittest.mock import patch, MagicMock
 import pytest
 
-from src.core.embedder import _load_embed_cfg, get_embedder
+from src.core.embedder import _load_embed_cfg, close_embedders, get_embedder
+
+
+@pytest.fixture(autouse=True)
+def _reset_embedder_pool():
+    close_embedders()
+    yield
+    close_embedders()
 
 
 def test_load_embed_cfg_default_local():
@@ -107,4 +114,21 @@ def test_get_embedder_ollama_default_values(mock_ollama):
             model="mxbai-embed-large",
             base_url="http://localhost:11434"
         )
-        assert embedder == mock_instance
\ No newline at end of file
+        assert embedder == mock_instance
+
+
+@patch("src.core.embedder.OllamaEmbeddings")
+def test_get_embedder_is_pooled_per_profile(mock_ollama):
+    """The same profile returns one shared client; a new profile builds another"""
+    mock_ollama.side_effect = lambda **kwargs: MagicMock()
+
+    with patch("src.core.embedder._load_embed_cfg") as mock_load_cfg:
+        mock_load_cfg.return_value = {"provider": "ollama", "model_name": "a"}
+        first = get_embedder()
+        again = get_embedder()
+        mock_load_cfg.return_value = {"provider": "ollama", "model_name": "b"}
+        other = get_embedder()
+
+    assert first is again
+    assert other is not first
+    assert mock_ollama.call_count == 2
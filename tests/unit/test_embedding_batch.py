@@ -0,0 +1,100 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.core.embedding_batch import BatchedEmbeddings, wrap_with_batching
+
+
+class _RecordingEmbedder:
+    def __init__(self, fail_first=None, delay=0.0):
+        self.calls = []
+        self.fail_first = dict(fail_first or {})
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            remaining = self.fail_first.get(texts[0], 0)
+            if remaining:
+                self.fail_first[texts[0]] = remaining - 1
+        try:
+            time.sleep(self.delay)
+            if remaining:
+                raise ConnectionError("flaky backend")
+            return [[float(t)] for t in texts]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def embed_query(self, text):
+        return [float(text)]
+
+
+def test_batches_preserve_order():
+    inner = _RecordingEmbedder(delay=0.01)
+    emb = BatchedEmbeddings(inner, batch_size=3, max_concurrency=4)
+    texts = [str(i) for i in range(10)]
+
+    vectors = emb.embed_documents(texts)
+
+    assert vectors == [[float(i)] for i in range(10)]
+    assert sorted(len(c) for c in inner.calls) == [1, 3, 3, 3]
+    emb.close()
+
+
+def test_concurrency_is_bounded():
+    inner = _RecordingEmbedder(delay=0.02)
+    emb = BatchedEmbeddings(inner, batch_size=1, max_concurrency=2)
+
+    emb.embed_documents([str(i) for i in range(8)])
+
+    assert inner.peak <= 2
+    emb.close()
+
+
+def test_only_failed_batch_is_retried():
+    inner = _RecordingEmbedder(fail_first={"3": 1})
+    emb = BatchedEmbeddings(inner, batch_size=3, max_concurrency=2, retry_backoff=0)
+
+    vectors = emb.embed_documents([str(i) for i in range(6)])
+
+    assert vectors == [[float(i)] for i in range(6)]
+    first_items = [c[0] for c in inner.calls]
+    assert first_items.count("3") == 2
+    assert first_items.count("0") == 1
+    emb.close()
+
+
+def test_gives_up_after_max_retries():
+    inner = _RecordingEmbedder(fail_first={"0": 5})
+    emb = BatchedEmbeddings(inner, batch_size=2, max_retries=2, retry_backoff=0)
+
+    with pytest.raises(ConnectionError):
+        emb.embed_documents(["0", "1"])
+    assert len(inner.calls) == 3
+
+
+def test_invalid_settings_rejected():
+    with pytest.raises(ValueError):
+        BatchedEmbeddings(MagicMock(), batch_size=0)
+
+
+def test_wrap_with_batching_only_when_configured():
+    inner = MagicMock()
+    assert wrap_with_batching(inner, {}) is inner
+    wrapped = wrap_with_batching(
+        inner, {"batch_size": 16, "max_concurrency": 3, "max_retries": 1}
+    )
+    assert isinstance(wrapped, BatchedEmbeddings)
+    assert (wrapped.batch_size, wrapped.max_concurrency, wrapped.max_retries) == (
+        16,
+        3,
+        1,
+    )
@@ -0,0 +1,147 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.core.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingStore,
+    QueryCachedEmbeddings,
+    cache_key,
+    embed_queries,
+    normalize_query,
+    wrap_with_cache,
+    wrap_with_query_cache,
+)
+from src.core.ttl_cache import TTLCache
+
+
+def _fake_inner():
+    inner = MagicMock()
+    inner.embed_documents.side_effect = lambda texts: [
+        [float(len(t)), 1.0] for t in texts
+    ]
+    return inner
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = EmbeddingStore(tmp_path / "emb.sqlite", max_entries=100)
+    yield s
+    s.close()
+
+
+def test_cache_key_depends_on_namespace_and_text():
+    assert cache_key("ollama:a", "x") == cache_key("ollama:a", "x")
+    assert cache_key("ollama:a", "x") != cache_key("ollama:b", "x")
+    assert cache_key("ollama:a", "x") != cache_key("ollama:a", "y")
+
+
+def test_only_misses_reach_inner_embedder(store):
+    inner = _fake_inner()
+    emb = CachedEmbeddings(inner, store, "ollama:m")
+
+    first = emb.embed_documents(["a", "bb", "a"])
+    second = emb.embed_documents(["bb", "ccc"])
+
+    assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert second == [[2.0, 1.0], [3.0, 1.0]]
+    # "a" is embedded once even though it repeats within the batch
+    assert inner.embed_documents.call_args_list[0].args == (["a", "bb"],)
+    assert inner.embed_documents.call_args_list[1].args == (["ccc"],)
+    assert emb.stats() == {"hits": 2, "misses": 3, "entries": 3}
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = tmp_path / "emb.sqlite"
+    first = CachedEmbeddings(_fake_inner(), EmbeddingStore(path), "ollama:m")
+    first.embed_documents(["hello"])
+    first.close()
+
+    inner = _fake_inner()
+    second = CachedEmbeddings(inner, EmbeddingStore(path), "ollama:m")
+    assert second.embed_documents(["hello"]) == [[5.0, 1.0]]
+    inner.embed_documents.assert_not_called()
+    second.close()
+
+
+def test_lru_eviction_drops_least_recently_used(tmp_path):
+    store = EmbeddingStore(tmp_path / "emb.sqlite", max_entries=2)
+    store.put_many({"a": [1.0]})
+    store.put_many({"b": [2.0]})
+    store.get_many(["a"])  # "a" is now more recent than "b"
+    store.put_many({"c": [3.0]})
+
+    assert set(store.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert len(store) == 2
+    store.close()
+
+
+def test_embed_query_is_not_cached(store):
+    inner = _fake_inner()
+    inner.embed_query.return_value = [9.0]
+    emb = CachedEmbeddings(inner, store, "ollama:m")
+    assert emb.embed_query("q") == [9.0]
+    assert len(store) == 0
+
+
+def test_wrap_with_cache_respects_config(tmp_path):
+    inner = _fake_inner()
+    assert wrap_with_cache(inner, {}, "ns") is inner
+    assert wrap_with_cache(inner, {"cache": {"enabled": False}}, "ns") is inner
+
+    wrapped = wrap_with_cache(
+        inner, {"cache": {"path": str(tmp_path / "c.sqlite"), "max_entries": 5}}, "ns"
+    )
+    assert isinstance(wrapped, CachedEmbeddings)
+    assert wrapped.store.max_entries == 5
+    wrapped.close()
+
+
+def test_normalize_query_collapses_case_and_whitespace():
+    assert normalize_query("  What  is\tRAG? ") == "what is rag?"
+
+
+def test_query_cache_skips_repeated_embedding():
+    inner = MagicMock()
+    inner.embed_query.return_value = [0.5, 0.5]
+    emb = QueryCachedEmbeddings(inner, TTLCache(max_entries=8), "ollama:m")
+
+    assert emb.embed_query("What is RAG?") == [0.5, 0.5]
+    assert emb.embed_query("what is  rag?") == [0.5, 0.5]
+
+    inner.embed_query.assert_called_once_with("What is RAG?")
+    assert emb.stats()["hits"] == 1
+    assert emb.stats()["misses"] == 1
+
+
+def test_query_cache_returns_copies():
+    inner = MagicMock()
+    inner.embed_query.return_value = [1.0]
+    emb = QueryCachedEmbeddings(inner, TTLCache(max_entries=8), "ns")
+
+    emb.embed_query("q").append(2.0)
+    assert emb.embed_query("q") == [1.0]
+
+
+def test_wrap_with_query_cache_respects_config():
+    inner = MagicMock()
+    assert wrap_with_query_cache(inner, {}, "ns") is inner
+    wrapped = wrap_with_query_cache(
+        inner, {"query_cache": {"max_entries": 3, "ttl_seconds": 5}}, "ns"
+    )
+    assert isinstance(wrapped, QueryCachedEmbeddings)
+    assert wrapped.cache.max_entries == 3
+    assert wrapped.cache.ttl_seconds == 5
+
+
+def test_embed_queries_skip_the_document_store(store):
+    inner = _fake_inner()
+    docs = CachedEmbeddings(inner, store, "ollama:m")
+    emb = QueryCachedEmbeddings(docs, TTLCache(max_entries=8), "ollama:m")
+
+    assert embed_queries(emb, ["ab", "c", "AB"]) == [[2.0, 1.0], [1.0, 1.0], [2.0, 1.0]]
+    assert embed_queries(emb, ["c"]) == [[1.0, 1.0]]
+
+    inner.embed_documents.assert_called_once_with(["ab", "c"])
+    assert len(store) == 0
+    assert emb.stats()["hits"] == 1
@@ -0,0 +1,204 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.core.flat_store import FlatVectorStore, matches_where, top_k
+from src.core.offline import HashingEmbeddings
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=64))
+
+
+def _texts():
+    return [
+        "vector index error code E1234",
+        "banana smoothie recipe with oats",
+        "retrieval augmented generation with a vector store",
+    ]
+
+
+def test_top_k_orders_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+
+    assert top_k(scores, 2).tolist() == [1, 3]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 0]
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_matches_where_supports_equality_and_in():
+    meta = {"source": "a.txt", "page": 2}
+
+    assert matches_where(meta, None)
+    assert matches_where(meta, {"source": "a.txt"})
+    assert not matches_where(meta, {"source": "b.txt"})
+    assert matches_where(meta, {"source": {"$in": ["a.txt", "b.txt"]}})
+    assert matches_where(meta, {"$and": [{"source": "a.txt"}, {"page": 2}]})
+
+
+def test_similarity_search_returns_closest_document(store):
+    store.add_texts(_texts(), [{"source": f"{i}.txt"} for i in range(3)])
+
+    docs = store.similarity_search("error code E1234 in the index", k=1)
+
+    assert len(docs) == 1
+    assert docs[0].metadata == {"source": "0.txt"}
+
+    scored = store.similarity_search_with_score("banana oats", k=3)
+    distances = [score for _, score in scored]
+    assert scored[0][0].page_content == "banana smoothie recipe with oats"
+    assert distances == sorted(distances)
+
+
+def test_batched_search_matches_single_queries(store):
+    store.add_texts(_texts(), [{"source": f"{i}.txt"} for i in range(3)])
+    queries = ["error code E1234", "banana oats", "vector store"]
+    vectors = store.embeddings.embed_documents(queries)
+
+    batched = store.similarity_search_by_vectors_with_score(vectors, k=2)
+
+    assert len(batched) == 3
+    for vector, hits in zip(vectors, batched):
+        single = store.similarity_search_by_vector_with_score(vector, k=2)
+        assert [(doc.id, score) for doc, score in hits] == [
+            (doc.id, score) for doc, score in single
+        ]
+    assert store.similarity_search_by_vectors_with_score([], k=2) == []
+
+
+def test_filter_restricts_candidates(store):
+    store.add_texts(
+        _texts(), [{"source": "a.txt"}, {"source": "b.txt"}, {"source": "b.txt"}]
+    )
+
+    docs = store.similarity_search(
+        "vector index error", k=3, filter={"source": "b.txt"}
+    )
+
+    assert {doc.metadata["source"] for doc in docs} == {"b.txt"}
+    assert len(docs) == 2
+
+
+def test_delete_by_where_and_ids(store):
+    ids = store.add_texts(
+        _texts(), [{"source": "a.txt"}, {"source": "b.txt"}, {"source": "a.txt"}]
+    )
+
+    store.delete(where={"source": "a.txt"})
+    assert len(store) == 1
+    assert store.get()["ids"] == [ids[1]]
+
+    store.delete(ids=[ids[1]])
+    assert len(store) == 0
+    assert store.similarity_search("anything") == []
+
+
+def test_add_with_existing_id_replaces_record(store):
+    store.add_texts(["old text"], ids=["doc-1"])
+    store.add_texts(["new text"], ids=["doc-1"])
+
+    assert len(store) == 1
+    assert [doc.page_content for doc in store.get_by_ids(["doc-1"])] == ["new text"]
+
+
+def test_store_persists_and_reopens(tmp_path):
+    emb = HashingEmbeddings(dimension=64)
+    first = FlatVectorStore(tmp_path / "flat", emb)
+    ids = first.add_texts(_texts(), [{"source": "a.txt"}] * 3)
+    first.delete(ids=[ids[0]])
+
+    reopened = FlatVectorStore(tmp_path / "flat", emb)
+
+    assert len(reopened) == 2
+    assert reopened.get(include=["documents"])["documents"] == _texts()[1:]
+    assert reopened.similarity_search("banana oats", k=1)[0].id == ids[1]
+
+
+def test_records_beyond_manifest_count_are_ignored(tmp_path):
+    emb = HashingEmbeddings(dimension=64)
+    store = FlatVectorStore(tmp_path / "flat", emb)
+    store.add_texts(_texts()[:2])
+    # Simulate a crash after the records append but before the manifest update
+    with (tmp_path / "flat" / "records.jsonl").open("a") as handle:
+        handle.write('{"id": "partial", "text": "x", "metadata": {}}\n')
+
+    reopened = FlatVectorStore(tmp_path / "flat", emb)
+
+    assert len(reopened) == 2
+    assert "partial" not in reopened.get()["ids"]
+
+
+def test_append_after_torn_append_commits_the_new_record(tmp_path):
+    emb = HashingEmbeddings(dimension=64)
+    store = FlatVectorStore(tmp_path / "flat", emb)
+    store.add_texts(["a", "b"], ids=["1", "2"])
+    with (tmp_path / "flat" / "records.jsonl").open("a") as handle:
+        handle.write('{"id": "ghost", "text": "x", "metadata": {}}\n{"id": "to')
+
+    reopened = FlatVectorStore(tmp_path / "flat", emb)
+    reopened.add_texts(["c"], ids=["3"])
+    final = FlatVectorStore(tmp_path / "flat", emb)
+
+    assert final.get()["ids"] == ["1", "2", "3"]
+    assert final.get_by_ids(["3"])[0].page_content == "c"
+    assert final.similarity_search("c", k=1)[0].id == "3"
+
+
+def test_crash_before_manifest_keeps_previous_delete_state(tmp_path):
+    emb = HashingEmbeddings(dimension=64)
+    store = FlatVectorStore(tmp_path / "flat", emb)
+    ids = store.add_texts(_texts())
+    # Simulate a crash after the compacted files are written, before the manifest
+    with patch.object(store, "_write_manifest", side_effect=OSError("crash")):
+        with pytest.raises(OSError):
+            store.delete(ids=[ids[0]])
+
+    reopened = FlatVectorStore(tmp_path / "flat", emb)
+
+    assert reopened.get()["ids"] == ids
+    assert reopened.similarity_search("banana oats", k=1)[0].id == ids[1]
+    # The unfinished compaction's files are removed on open
+    assert sorted(path.name for path in (tmp_path / "flat").iterdir()) == [
+        "manifest.json",
+        "records.jsonl",
+        "vectors.npy",
+    ]
+
+    reopened.delete(ids=[ids[0]])
+    assert len(FlatVectorStore(tmp_path / "flat", emb)) == 2
+
+
+def test_add_vectors_with_nothing_is_a_no_op(store):
+    assert store.add_vectors([], []) == []
+    assert len(store) == 0
+
+
+def test_capacity_grows_past_initial_allocation(store):
+    vectors = np.random.default_rng(0).normal(size=(1500, 64))
+    store.add_vectors(vectors, [f"t{i}" for i in range(1500)])
+
+    assert len(store) == 1500
+    hits = store.search_vectors(vectors[1234:1235], k=1)[0]
+    assert hits[0][0] == 1234
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_dimension_mismatch_raises(store):
+    store.add_vectors(np.ones((1, 64)), ["a"])
+
+    with pytest.raises(ValueError, match="dimension"):
+        store.add_vectors(np.ones((1, 32)), ["b"])
+
+
+def test_relevance_scores_via_retriever(store):
+    store.add_texts(_texts())
+
+    retriever = store.as_retriever(
+        search_type="similarity_score_threshold",
+        search_kwargs={"k": 3, "score_threshold": 0.5},
+    )
+    docs = retriever.invoke("vector index error code E1234")
+
+    assert [doc.page_content for doc in docs] == ["vector index error code E1234"]
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from src.core.hybrid import HybridRetriever, reciprocal_rank_fusion
+from src.core.lexical_index import LexicalIndex
+
+
+def _doc(chunk_id, text=""):
+    return Document(
+        id=chunk_id, page_content=text or chunk_id, metadata={"source": "a.txt"}
+    )
+
+
+def test_rrf_rewards_documents_ranked_by_both():
+    vector = [_doc("a"), _doc("b"), _doc("c")]
+    keyword = [_doc("c"), _doc("d")]
+
+    fused = reciprocal_rank_fusion([vector, keyword], rrf_k=60)
+
+    assert [doc.id for doc, _ in fused] == ["c", "a", "b", "d"]
+    assert fused[0][1] == pytest.approx(1 / 63 + 1 / 61)
+    assert [doc.id for doc, _ in reciprocal_rank_fusion([vector, keyword], k=2)] == [
+        "c",
+        "a",
+    ]
+
+
+def test_rrf_falls_back_to_content_key_without_ids():
+    first = Document(page_content="same", metadata={"source": "a.txt", "chunk": 0})
+    second = Document(page_content="same", metadata={"source": "a.txt", "chunk": 0})
+
+    fused = reciprocal_rank_fusion([[first], [second]])
+
+    assert len(fused) == 1
+
+
+def test_hybrid_retriever_surfaces_exact_keyword_hits(tmp_path):
+    lexical = LexicalIndex(tmp_path / "lex.sqlite")
+    lexical.upsert([_doc("err", "Fails with E1234 on startup"), _doc("x", "other")])
+    store = MagicMock(spec=VectorStore)
+    store.similarity_search.return_value = [_doc("near1"), _doc("near2"), _doc("err")]
+
+    retriever = HybridRetriever(store=store, lexical=lexical, k=2, fetch_k=10)
+    docs = retriever.invoke("what does E1234 mean")
+
+    assert [doc.id for doc in docs] == ["err", "near1"]
+    store.similarity_search.assert_called_once_with("what does E1234 mean", k=10)
+    lexical.close()
@@ -0,0 +1,43 @@
+from src.tools.importtime import (
+    format_report,
+    parse_importtime,
+    top_level_packages,
+    total_ms,
+)
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   yaml.error
+import time:       400 |        500 |   yaml
+import time:       200 |        200 |     fastapi.routing
+import time:       300 |        500 |   fastapi
+import time:        50 |       1050 | src.api.app
+"""
+
+
+def test_parse_importtime_skips_header_and_tracks_depth():
+    timings = parse_importtime(SAMPLE)
+    assert [t.module for t in timings] == [
+        "yaml.error",
+        "yaml",
+        "fastapi.routing",
+        "fastapi",
+        "src.api.app",
+    ]
+    assert timings[-1].depth == 0
+    assert timings[2].depth == 2
+
+
+def test_total_and_package_aggregation():
+    timings = parse_importtime(SAMPLE)
+    assert total_ms(timings, "src.api.app") == 1.05
+    packages = top_level_packages(timings)
+    assert [(p.module, p.self_us) for p in packages] == [
+        ("fastapi", 500),
+        ("yaml", 500),
+        ("src", 50),
+    ]
+
+
+def test_format_report_mentions_total():
+    report = format_report(parse_importtime(SAMPLE), "src.api.app", top=2)
+    assert "src.api.app: 1.1 ms" in report or "src.api.app: 1.0 ms" in report
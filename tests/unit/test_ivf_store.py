@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from src.core.flat_store import FlatVectorStore
+from src.core.ivf_store import IVFVectorStore, assign, kmeans
+from src.core.offline import HashingEmbeddings
+
+
+def _clustered(count, dim=16, clusters=8, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=count)
+    return (centers[labels] + 0.2 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+@pytest.fixture
+def emb():
+    return HashingEmbeddings(dimension=16)
+
+
+def test_kmeans_separates_clusters():
+    vectors = _clustered(400)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    centroids = kmeans(vectors, nlist=8, iterations=10)
+    labels = assign(vectors, centroids)
+
+    assert centroids.shape == (8, 16)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+    assert len(np.unique(labels)) >= 6
+
+
+def test_exact_search_until_trained(tmp_path, emb):
+    store = IVFVectorStore(tmp_path / "ivf", emb, min_train_size=1000)
+    vectors = _clustered(50)
+    store.add_vectors(vectors, [str(i) for i in range(50)])
+
+    assert not store.is_trained
+    assert store.search_vectors(vectors[7], k=1)[0][0][0] == 7
+
+
+def test_trains_on_threshold_and_matches_exact(tmp_path, emb):
+    vectors = _clustered(600)
+    texts = [str(i) for i in range(600)]
+    flat = FlatVectorStore(tmp_path / "flat", emb)
+    flat.add_vectors(vectors, texts)
+    ivf = IVFVectorStore(tmp_path / "ivf", emb, nlist=8, nprobe=8, min_train_size=500)
+    ivf.add_vectors(vectors[:500], texts[:500])
+    ivf.add_vectors(vectors[500:], texts[500:])
+
+    assert ivf.is_trained
+    assert ivf.stats()["nlist"] == 8
+    # nprobe == nlist scans every list, so results equal exact search
+    queries = vectors[:20]
+    exact = [[row for row, _ in hits] for hits in flat.search_vectors(queries, 5)]
+    approx = [[row for row, _ in hits] for hits in ivf.search_vectors(queries, 5)]
+    assert approx == exact
+    # A single probe still finds each stored vector itself
+    assert [hits[0][0] for hits in ivf.search_vectors(queries, 1, nprobe=1)] == list(
+        range(20)
+    )
+
+
+def test_retrains_after_growth(tmp_path, emb):
+    ivf = IVFVectorStore(
+        tmp_path / "ivf", emb, nlist=4, min_train_size=100, retrain_growth=2.0
+    )
+    vectors = _clustered(300)
+    ivf.add_vectors(vectors[:100], ["x"] * 100)
+    assert ivf._trained_count == 100
+
+    ivf.add_vectors(vectors[100:150], ["x"] * 50)
+    assert ivf._trained_count == 100
+    assert sum(len(rows) for rows in ivf._list_rows) == 150
+
+    ivf.add_vectors(vectors[150:], ["x"] * 150)
+    assert ivf._trained_count == 300
+
+
+def test_reopen_keeps_the_retrain_schedule(tmp_path, emb):
+    vectors = _clustered(250)
+    ivf = IVFVectorStore(tmp_path / "ivf", emb, nlist=4, min_train_size=100)
+    ivf.add_vectors(vectors[:100], ["x"] * 100)
+    ivf.add_vectors(vectors[100:150], ["x"] * 50)
+
+    reopened = IVFVectorStore(tmp_path / "ivf", emb, nlist=4, min_train_size=100)
+    assert reopened._trained_count == 100
+
+    reopened.add_vectors(vectors[150:], ["x"] * 100)
+    assert reopened._trained_count == 250
+
+
+def test_delete_and_reopen_keep_lists_consistent(tmp_path, emb):
+    vectors = _clustered(200)
+    ivf = IVFVectorStore(tmp_path / "ivf", emb, nlist=4, min_train_size=100)
+    ids = ivf.add_vectors(
+        vectors,
+        [str(i) for i in range(200)],
+        [{"source": f"s{i % 2}"} for i in range(200)],
+    )
+    ivf.delete(where={"source": "s0"})
+
+    reopened = IVFVectorStore(tmp_path / "ivf", emb, nlist=4, min_train_size=100)
+
+    assert reopened.is_trained
+    assert len(reopened) == 100
+    assert sorted(np.concatenate(reopened._list_rows).tolist()) == list(range(100))
+    hit = reopened.search_vectors(vectors[1], k=1, nprobe=4)[0][0][0]
+    assert reopened.get()["ids"][hit] == ids[1]
+
+
+def test_filter_applies_within_probed_lists(tmp_path, emb):
+    vectors = _clustered(200)
+    ivf = IVFVectorStore(tmp_path / "ivf", emb, nlist=4, nprobe=4, min_train_size=100)
+    ivf.add_vectors(vectors, ["t"] * 200, [{"source": f"s{i % 2}"} for i in range(200)])
+
+    hits = ivf.search_vectors(vectors[0], k=10, filter={"source": "s1"})[0]
+
+    assert len(hits) == 10
+    assert all(row % 2 == 1 for row, _ in hits)
+
+
+def test_append_leaves_earlier_snapshots_untouched(tmp_path, emb):
+    vectors = _clustered(300)
+    ivf = IVFVectorStore(tmp_path / "ivf", emb, nlist=4, nprobe=4, min_train_size=100)
+    ivf.add_vectors(vectors[:200], ["t"] * 200, [{"source": "s"}] * 200)
+    view = ivf._snapshot()
+
+    ivf.add_vectors(vectors[200:250], ["t"] * 50, [{"source": "s"}] * 50)
+
+    _, list_rows, _ = view.index
+    assert sum(len(rows) for rows in list_rows) == 200
+    hits = ivf._search(view, vectors[0], k=300, filter={"source": "s"})[0]
+    assert len(hits) == 200
+
+
+def test_invalid_settings_rejected(tmp_path, emb):
+    with pytest.raises(ValueError):
+        IVFVectorStore(tmp_path / "ivf", emb, retrain_growth=1.0)
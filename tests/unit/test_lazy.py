@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pytest
+
+from src.core.lazy import OPTIONAL, lazy_attr
+
+
+def test_lazy_attr_imports_and_caches_in_namespace():
+    namespace = {"__name__": "fake"}
+    table = {"dumps": ("json", "dumps")}
+
+    value = lazy_attr(namespace, table, "dumps")
+
+    import json
+
+    assert value is json.dumps
+    assert namespace["dumps"] is json.dumps
+
+
+def test_lazy_attr_prefers_existing_namespace_value():
+    sentinel = object()
+    namespace = {"dumps": sentinel}
+    assert lazy_attr(namespace, {"dumps": ("json", "dumps")}, "dumps") is sentinel
+
+
+def test_lazy_attr_optional_missing_package_resolves_to_none():
+    namespace: dict = {}
+    table = {"Missing": ("not_a_real_package_xyz", "Missing", OPTIONAL)}
+    assert lazy_attr(namespace, table, "Missing") is None
+
+
+def test_lazy_attr_required_missing_package_raises():
+    with pytest.raises(ImportError):
+        lazy_attr({}, {"Missing": ("not_a_real_package_xyz", "Missing")}, "Missing")
+
+
+def test_lazy_attr_unknown_name_raises_attribute_error():
+    with pytest.raises(AttributeError):
+        lazy_attr({"__name__": "fake"}, {}, "nope")
+
+
+def test_api_import_does_not_load_provider_sdks():
+    code = (
+        "import sys, src.api.app\n"
+        "heavy = ['langchain_openai', 'langchain_huggingface', 'langchain_chroma',"
+        " 'langchain_ollama', 'langchain_google_genai', 'chromadb']\n"
+        "print(','.join(m for m in heavy if m in sys.modules))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == ""
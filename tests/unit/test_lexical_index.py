@@ -0,0 +1,64 @@
+from langchain_core.documents import Document
+
+from src.core.lexical_index import LexicalIndex, match_expression
+
+
+def _doc(chunk_id, text, source="a.txt"):
+    return Document(id=chunk_id, page_content=text, metadata={"source": source})
+
+
+def test_match_expression_quotes_terms():
+    assert (
+        match_expression('Why "E1234" AND error?')
+        == '"why" OR "e1234" OR "and" OR "error"'
+    )
+    assert match_expression("  ?! ") == ""
+
+
+def test_search_ranks_by_bm25_and_keeps_identifiers_whole(tmp_path):
+    index = LexicalIndex(tmp_path / "lex.sqlite")
+    index.upsert(
+        [
+            _doc("1", "The connection failed with ERR_CONN_RESET after a retry."),
+            _doc("2", "Connection pooling keeps sockets warm."),
+            _doc("3", "Unrelated text about gardening.", source="b.txt"),
+        ]
+    )
+
+    hits = index.search("ERR_CONN_RESET", k=5)
+    assert [doc.id for doc, _ in hits] == ["1"]
+    assert hits[0][0].metadata == {"source": "a.txt"}
+    assert hits[0][1] > 0
+
+    ranked = index.search("connection retry", k=5)
+    assert [doc.id for doc, _ in ranked] == ["1", "2"]
+    assert index.search("ERR", k=5) == []
+    index.close()
+
+
+def test_upsert_replaces_and_delete_removes_postings(tmp_path):
+    index = LexicalIndex(tmp_path / "lex.sqlite")
+    index.upsert([_doc("1", "alpha beta"), _doc("2", "gamma")])
+    index.upsert([_doc("1", "delta")])
+
+    assert len(index) == 2
+    assert index.search("alpha") == []
+    assert [doc.id for doc, _ in index.search("delta")] == ["1"]
+
+    index.delete(["1", "missing"])
+    assert index.search("delta") == []
+    assert len(index) == 1
+
+    index.clear()
+    assert len(index) == 0
+    index.close()
+
+
+def test_index_persists_across_reopen(tmp_path):
+    index = LexicalIndex(tmp_path / "lex.sqlite")
+    index.upsert([_doc("1", "naïve café")])
+    index.close()
+
+    reopened = LexicalIndex(tmp_path / "lex.sqlite")
+    assert [doc.id for doc, _ in reopened.search("naive cafe")] == ["1"]
+    reopened.close()
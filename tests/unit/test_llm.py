@@ -2,14 +2,20 @@ from unittest.mock import patch, MagicMock
 import os
 import pytest
 
-from src.core.llm import _load_llm_cfg, get_llm
+from src.core.llm import _load_llm_cfg, close_llms, get_llm
+
+
+@pytest.fixture(autouse=True)
+def _reset_llm_pool():
+    close_llms()
+    yield
+    close_llms()
 
 
 def test_load_llm_cfg_defaults():
     with patch.dict(os.environ, {}, clear=True):
-        # Patch file IO and yaml parsing; we don't need the open-handle itself
-        with patch("builtins.open"), patch("yaml.safe_load") as mock_yaml:
-            mock_yaml.return_value = {
+        with patch("src.core.config.load_config") as mock_load:
+            mock_load.return_value = {
                 "default": "openai",
                 "openai": {"provider": "openai", "model_name": "gpt-5-nano"},
             }
@@ -27,7 +33,11 @@ def test_get_llm_openai(mock_openai):
         with patch("src.core.llm._load_llm_cfg") as mock_cfg:
             mock_cfg.return_value = {"provider": "openai", "model_name": "gpt-5-nano"}
             llm = get_llm()
-            mock_openai.assert_called_once_with(model="gpt-5-nano")
+            mock_openai.assert_called_once()
+            kwargs = mock_openai.call_args.kwargs
+            assert kwargs["model"] == "gpt-5-nano"
+            assert kwargs["http_client"] is not None
+            assert kwargs["http_async_client"] is not None
             assert llm == mock_instance
 
 
@@ -52,6 +62,21 @@ def test_get_llm_huggingface(mock_hf):
             assert llm == mock_instance
 
 
+@patch("src.core.llm.ChatHuggingFace")
+def test_pool_settings_outside_openai_are_reported_as_ignored(mock_hf, caplog):
+    with patch.dict(os.environ, {"HF_TOKEN": "y"}, clear=True):
+        with patch("src.core.llm._load_llm_cfg") as mock_cfg:
+            mock_cfg.return_value = {
+                "provider": "huggingface",
+                "model_name": "my-model",
+                "pool_size": 50,
+            }
+            get_llm()
+
+    mock_hf.assert_called_once_with(repo_id="my-model", token="y")
+    assert "apply to OpenAI only" in caplog.text
+
+
 def test_get_llm_huggingface_missing_key():
     with patch("src.core.llm._load_llm_cfg") as mock_cfg:
         mock_cfg.return_value = {"provider": "huggingface", "model_name": "my-model"}
@@ -78,3 +103,39 @@ def test_get_llm_gemini(mock_gemini):
             llm = get_llm()
             mock_gemini.assert_called_once_with(model="gemini-2.5-flash-lite")
             assert llm == mock_instance
+
+
+@patch("src.core.llm.ChatOpenAI")
+def test_get_llm_reuses_client_and_http_pool(mock_openai):
+    mock_openai.side_effect = lambda **kwargs: MagicMock(**kwargs)
+
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "x"}, clear=True):
+        with patch("src.core.llm._load_llm_cfg") as mock_cfg:
+            mock_cfg.return_value = {
+                "provider": "openai",
+                "model_name": "a",
+                "pool_size": 5,
+            }
+            first = get_llm()
+            again = get_llm()
+            other = get_llm(model="b")
+
+    assert first is again
+    assert other is not first
+    assert mock_openai.call_count == 2
+    # Both models share one HTTP connection pool
+    assert first.http_client is other.http_client
+
+
+@patch("src.core.llm.ChatOpenAI")
+def test_close_llms_closes_http_clients(mock_openai):
+    mock_openai.side_effect = lambda **kwargs: MagicMock(**kwargs)
+
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "x"}, clear=True):
+        with patch("src.core.llm._load_llm_cfg") as mock_cfg:
+            mock_cfg.return_value = {"provider": "openai", "model_name": "a"}
+            llm = get_llm()
+            close_llms()
+            assert llm.http_client.is_closed
+            assert llm.http_async_client.is_closed
+            assert get_llm() is not llm
@@ -0,0 +1,230 @@
+import asyncio
+import time
+from typing import Any, List, Optional
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+
+from src.core.llm import close_llms, get_llm, llm_router_stats
+from src.core.llm_router import (
+    CircuitBreaker,
+    LatencyHistogram,
+    Route,
+    RouterChatModel,
+)
+from src.core.offline import EchoChatModel
+
+
+class _Broken(BaseChatModel):
+    """Chat model whose every call fails."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "broken"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        raise RuntimeError("provider down")
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        raise RuntimeError("provider down")
+
+
+def _router(*models, timeout=5.0, hedge_delay=0.05, failure_threshold=5):
+    routes = [
+        Route(
+            name,
+            model,
+            timeout=timeout,
+            breaker=CircuitBreaker(
+                failure_threshold=failure_threshold, reset_timeout=60
+            ),
+        )
+        for name, model in models
+    ]
+    return RouterChatModel(routes=routes, hedge_delay=hedge_delay, hedge_min_samples=3)
+
+
+def _wins(router):
+    return {route.name: route.wins for route in router.routes}
+
+
+def test_histogram_percentiles_follow_observations():
+    hist = LatencyHistogram()
+    assert hist.percentile(95) is None
+
+    for _ in range(90):
+        hist.observe(0.1)
+    for _ in range(10):
+        hist.observe(2.0)
+
+    # Interpolated within a bucket, so accurate to one bucket width (1.5x)
+    assert 0.07 < hist.percentile(50) <= 0.15
+    assert 1.3 < hist.percentile(95) <= 3.0
+    assert hist.percentile(95, min_samples=200) is None
+    assert hist.snapshot()["count"] == 100
+
+
+def test_circuit_opens_then_lets_one_probe_through():
+    now = [0.0]
+    breaker = CircuitBreaker(
+        failure_threshold=2, reset_timeout=10, clock=lambda: now[0]
+    )
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.trips == 2
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_fast_primary_answers_without_hedging():
+    router = _router(("fast", EchoChatModel()), ("spare", EchoChatModel()))
+
+    assert router.invoke("Question: hi").content.startswith("Echo:")
+    assert _wins(router) == {"fast": 1, "spare": 0}
+    assert router.routes[1].requests == 0
+
+
+def test_slow_primary_is_hedged_and_the_faster_route_wins():
+    router = _router(("slow", EchoChatModel(latency=1.0)), ("fast", EchoChatModel()))
+
+    began = time.monotonic()
+    router.invoke("Question: hi")
+    assert time.monotonic() - began < 0.8
+    assert _wins(router) == {"slow": 0, "fast": 1}
+    assert router.routes[1].hedges == 1
+
+
+def test_async_hedge_cancels_the_slow_request():
+    router = _router(("slow", EchoChatModel(latency=1.0)), ("fast", EchoChatModel()))
+
+    async def main():
+        began = time.monotonic()
+        reply = await router.ainvoke("Question: hi")
+        return reply, time.monotonic() - began
+
+    reply, elapsed = asyncio.run(main())
+    assert reply.content.startswith("Echo:") and elapsed < 0.8
+    assert _wins(router) == {"slow": 0, "fast": 1}
+    # Cancelled, not failed: the slow route stays healthy
+    assert router.routes[0].failures == 0
+    assert router.routes[0].breaker.state == "closed"
+
+
+def test_failures_fail_over_and_open_the_circuit():
+    router = _router(
+        ("broken", _Broken()), ("spare", EchoChatModel()), failure_threshold=2
+    )
+
+    for _ in range(3):
+        assert router.invoke("Question: hi").content.startswith("Echo:")
+        asyncio.run(router.ainvoke("Question: hi"))
+
+    broken = router.routes[0]
+    assert broken.failures == 2  # skipped once its circuit opened
+    assert broken.breaker.state == "open"
+    assert router.routes[1].wins == 6
+
+
+def test_timeout_counts_as_failure():
+    router = _router(
+        ("stuck", EchoChatModel(latency=1.0)),
+        ("spare", EchoChatModel()),
+        timeout=0.1,
+        hedge_delay=10.0,
+    )
+
+    router.invoke("Question: hi")
+    asyncio.run(router.ainvoke("Question: hi"))
+
+    assert router.routes[0].timeouts == 2
+    assert router.routes[1].wins == 2
+
+
+def test_all_routes_failing_raises_the_last_error():
+    router = _router(("a", _Broken()), ("b", _Broken()))
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        router.invoke("Question: hi")
+    with pytest.raises(RuntimeError, match="provider down"):
+        asyncio.run(router.ainvoke("Question: hi"))
+
+
+def test_hedge_delay_comes_from_the_latency_histogram():
+    router = _router(("a", EchoChatModel()), ("b", EchoChatModel()), hedge_delay=7.0)
+    route = router.routes[0]
+    assert router._hedge_after(route, "invoke") == 7.0
+
+    for _ in range(3):
+        route.latency["invoke"].observe(0.2)
+    assert 0.13 < router._hedge_after(route, "invoke") <= 0.3
+
+
+def test_streams_hedge_on_the_first_chunk():
+    router = _router(
+        ("slow", EchoChatModel(latency=1.0)),
+        ("fast", EchoChatModel(tokens_per_second=1000)),
+    )
+
+    text = "".join(chunk.content for chunk in router.stream("Question: hi"))
+
+    async def collect():
+        return "".join(
+            [chunk.content async for chunk in router.astream("Question: hi")]
+        )
+
+    assert text.startswith("Echo: hi")
+    assert asyncio.run(collect()) == text
+    assert _wins(router) == {"slow": 0, "fast": 2}
+    assert router.routes[1].latency["stream"].count == 2
+
+
+def test_get_llm_builds_router_from_profiles():
+    profiles = {
+        "router": {
+            "provider": "router",
+            "model_name": "router",
+            "routes": ["missing_key", "echo"],
+            "hedge_delay": 1.5,
+        },
+        "missing_key": {"provider": "openai", "model_name": "gpt-5-nano"},
+        "echo": {"provider": "echo", "model_name": "echo"},
+    }
+
+    def load(profile=None):
+        return dict(profiles[profile or "router"])
+
+    close_llms()
+    try:
+        with patch("src.core.llm._load_llm_cfg", side_effect=load):
+            with patch.dict("os.environ", {}, clear=True):
+                llm = get_llm()
+                assert get_llm() is llm
+
+        assert [route.name for route in llm.routes] == ["echo"]
+        assert llm.hedge_delay == 1.5
+        assert llm_router_stats()[0]["routes"][0]["name"] == "echo"
+    finally:
+        close_llms()
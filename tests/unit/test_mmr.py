@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from src.core.flat_store import FlatVectorStore
+from src.core.mmr import (
+    MMRRetriever,
+    max_marginal_relevance_search,
+    mmr_select,
+    search_with_vectors,
+)
+from src.core.offline import HashingEmbeddings
+from src.core.sharded_store import ShardedVectorStore
+from src.core.store_io import write_records
+
+
+@pytest.fixture
+def emb():
+    return HashingEmbeddings(dimension=32)
+
+
+def _docs(count):
+    return [
+        Document(
+            id=f"id{i}",
+            page_content=f"chunk {i} about topic{i % 4} retrieval",
+            metadata={"source": f"doc{i % 5}.txt"},
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("lambda_mult", [0.0, 0.3, 0.5, 1.0])
+def test_mmr_select_matches_langchain(lambda_mult):
+    rng = np.random.default_rng(3)
+    for _ in range(20):
+        candidates = rng.normal(size=(40, 12)).astype(np.float32)
+        query = rng.normal(size=12).astype(np.float32)
+        expected = maximal_marginal_relevance(query, candidates, lambda_mult, k=6)
+        assert mmr_select(query, candidates, 6, lambda_mult) == expected
+
+
+def test_mmr_select_skips_duplicates_and_handles_small_inputs():
+    candidates = np.array([[1.0, 0.0], [1.0, 0.0], [0.6, 0.8]], dtype=np.float32)
+
+    assert mmr_select([1.0, 0.0], candidates, 2, 0.3) == [0, 2]
+    assert mmr_select([1.0, 0.0], candidates, 10, 0.3) == [0, 2, 1]
+    assert mmr_select([1.0, 0.0], candidates[:0], 3) == []
+
+
+def test_flat_search_with_vectors_returns_stored_rows(tmp_path, emb):
+    store = FlatVectorStore(tmp_path / "flat", emb)
+    store.add_documents(_docs(20))
+    query = emb.embed_query("topic2 retrieval")
+
+    pairs, vectors = search_with_vectors(store, query, 5)
+
+    assert [doc.id for doc, _ in pairs] == [
+        doc.id for doc, _ in store.similarity_search_by_vector_with_score(query, 5)
+    ]
+    assert vectors.shape == (5, 32)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+
+def test_sharded_candidates_merge_like_a_single_store(tmp_path, emb):
+    single = FlatVectorStore(tmp_path / "single", emb)
+    sharded = ShardedVectorStore(
+        [FlatVectorStore(tmp_path / f"s{i}", emb) for i in range(3)]
+    )
+    docs = _docs(30)
+    vectors = np.random.default_rng(5).normal(size=(30, 32)).astype(np.float32)
+    for store in (single, sharded):
+        write_records(
+            store,
+            [doc.id for doc in docs],
+            [doc.page_content for doc in docs],
+            [doc.metadata for doc in docs],
+            vectors,
+        )
+    query = vectors[7] + vectors[3]
+
+    pairs, _ = search_with_vectors(sharded, query, 12)
+    assert [doc.id for doc, _ in pairs] == [
+        doc.id for doc, _ in search_with_vectors(single, query, 12)[0]
+    ]
+    expected = max_marginal_relevance_search(single, query, k=4, fetch_k=12)
+    found = max_marginal_relevance_search(sharded, query, k=4, fetch_k=12)
+
+    assert [doc.id for doc in found] == [doc.id for doc in expected]
+    sharded.close()
+
+
+def test_mmr_retriever_returns_diverse_docs_nearest_first(tmp_path, emb):
+    store = FlatVectorStore(tmp_path / "flat", emb)
+    store.add_documents(_docs(20))
+
+    docs = MMRRetriever(store=store, k=3, fetch_k=10, lambda_mult=0.5).invoke("topic1")
+
+    assert len({doc.id for doc in docs}) == 3
+    distances = dict(
+        (doc.id, distance)
+        for doc, distance in store.similarity_search_with_score("topic1", k=10)
+    )
+    assert [distances[doc.id] for doc in docs] == sorted(
+        distances[doc.id] for doc in docs
+    )
@@ -0,0 +1,68 @@
+import asyncio
+import math
+
+import pytest
+
+from src.core.offline import EchoChatModel, HashingEmbeddings
+
+
+def _cos(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_hashing_embeddings_are_deterministic_and_normalized():
+    emb = HashingEmbeddings(dimension=64)
+    first = emb.embed_query("The quick brown fox")
+    second = emb.embed_documents(["The quick brown fox"])[0]
+
+    assert first == second
+    assert len(first) == 64
+    assert math.isclose(math.sqrt(sum(v * v for v in first)), 1.0, rel_tol=1e-5)
+
+
+def test_hashing_embeddings_reflect_word_overlap():
+    emb = HashingEmbeddings(dimension=512)
+    base = emb.embed_query("error code E1234 in the vector index")
+    close = emb.embed_query("vector index error code E1234")
+    far = emb.embed_query("banana smoothie recipe with oats")
+
+    assert _cos(base, close) > _cos(base, far)
+
+
+def test_hashing_embeddings_empty_text_is_zero_vector():
+    assert HashingEmbeddings(dimension=8).embed_query("") == [0.0] * 8
+
+
+def test_hashing_embeddings_reject_bad_dimension():
+    with pytest.raises(ValueError):
+        HashingEmbeddings(dimension=0)
+
+
+PROMPT = "Context:\nalpha beta gamma\n\nQuestion: what is alpha?\nAnswer:"
+
+
+def test_echo_model_invoke_echoes_question_and_context():
+    llm = EchoChatModel(max_tokens=6)
+    text = llm.invoke(PROMPT).content
+    assert text == "Echo: what is alpha? alpha beta"
+
+
+def test_echo_model_stream_concatenates_to_invoke_output():
+    llm = EchoChatModel(max_tokens=8)
+    streamed = "".join(chunk.content for chunk in llm.stream(PROMPT))
+    assert streamed == llm.invoke(PROMPT).content
+
+
+def test_echo_model_async_matches_sync():
+    llm = EchoChatModel(max_tokens=8)
+    result = asyncio.run(llm.ainvoke(PROMPT))
+    assert result.content == llm.invoke(PROMPT).content
+
+
+def test_echo_model_simulates_latency():
+    import time
+
+    llm = EchoChatModel(latency=0.05, tokens_per_second=1000, max_tokens=4)
+    start = time.perf_counter()
+    llm.invoke(PROMPT)
+    assert time.perf_counter() - start >= 0.05
@@ -0,0 +1,66 @@
+import threading
+from unittest.mock import MagicMock
+
+from src.core.pool import HandlePool, make_key
+
+
+def test_make_key_is_order_independent():
+    assert make_key({"a": 1, "b": 2}) == make_key({"b": 2, "a": 1})
+    assert make_key({"a": 1}) != make_key({"a": 2})
+
+
+def test_get_builds_once_per_key():
+    pool: HandlePool[object] = HandlePool("test")
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = pool.get("k", factory)
+    assert pool.get("k", factory) is first
+    assert pool.get("other", factory) is not first
+    assert factory.call_count == 2
+    assert len(pool) == 2
+
+
+def test_refresh_closes_and_rebuilds():
+    pool: HandlePool[MagicMock] = HandlePool("test")
+    handle = pool.get("k", MagicMock)
+
+    pool.refresh("k")
+
+    handle.close.assert_called_once()
+    assert pool.peek("k") is None
+    assert pool.get("k", MagicMock) is not handle
+
+
+def test_close_swallows_closer_errors():
+    pool: HandlePool[MagicMock] = HandlePool("test")
+    handle = pool.get("k", MagicMock)
+    handle.close.side_effect = RuntimeError("boom")
+
+    pool.close()
+
+    assert len(pool) == 0
+
+
+def test_concurrent_get_builds_single_handle():
+    pool: HandlePool[object] = HandlePool("test")
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        return object()
+
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(pool.get("k", factory))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
@@ -1,6 +1,36 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from src.core.rag import answer, _build_prompt, _format_sources
+import pytest
+from langchain_core.documents import Document
+
+from src.core.answer_cache import MemoryAnswerCache
+from src.core.rag import (
+    _build_prompt,
+    _format_sources,
+    aanswer,
+    aanswer_many,
+    aanswer_stream,
+    answer,
+    answer_many,
+    answer_stream,
+)
+
+
+@pytest.fixture(autouse=True)
+def _approx_tokens():
+    # Keep tiktoken (which may download encodings) out of the unit tests
+    settings = {"context_tokens": None, "model_name": "", "tokenizer": "approx"}
+    with patch("src.core.rag.llm_context_settings", return_value=settings):
+        yield settings
+
+
+@pytest.fixture(autouse=True)
+def _answer_cache():
+    # Tests that exercise the cache swap in their own instance
+    with patch("src.core.rag._answer_cache", return_value=None) as cache:
+        yield cache
 
 
 def test_build_prompt_contains_context_and_question():
@@ -55,3 +85,295 @@ def test_answer_no_docs_returns_message(mock_get_llm, mock_get_retriever):
     assert "No relevant information" in res["answer"]
     assert res["sources"] == []
     mock_get_llm.assert_not_called()
+
+
+@patch("src.core.rag.retrieve_many")
+@patch("src.core.rag.get_llm")
+def test_answer_many_reports_failures_per_item(mock_get_llm, mock_retrieve_many):
+    doc = MagicMock(page_content="foo", metadata={"source": "a.txt", "chunk": 0})
+    mock_retrieve_many.return_value = [[doc], [], RuntimeError("search down"), [doc]]
+    llm = MagicMock()
+    llm.batch.return_value = [MagicMock(content="A1"), TimeoutError("slow")]
+    mock_get_llm.return_value = llm
+
+    res = answer_many(["q1", "q2", "q3", "q4"], k=2, max_concurrency=3)
+
+    assert res == [
+        {
+            "answer": "A1",
+            "sources": [{"source": "a.txt", "chunk": 0}],
+            "context_tokens": 1,
+        },
+        {"answer": "No relevant information found.", "sources": []},
+        {"error": "search down"},
+        {"error": "slow"},
+    ]
+    mock_retrieve_many.assert_called_once_with(
+        ["q1", "q2", "q3", "q4"], k=2, max_concurrency=3
+    )
+    prompts = llm.batch.call_args.args[0]
+    assert len(prompts) == 2 and "q1" in prompts[0] and "q4" in prompts[1]
+    assert llm.batch.call_args.kwargs == {
+        "config": {"max_concurrency": 3},
+        "return_exceptions": True,
+    }
+
+
+@patch("src.core.rag.retrieve_many", side_effect=ConnectionError("store offline"))
+@patch("src.core.rag.get_llm")
+def test_answer_many_retrieval_failure_marks_every_item(mock_get_llm, _retrieve):
+    assert answer_many(["a", "b"], max_concurrency=2) == [
+        {"error": "store offline"},
+        {"error": "store offline"},
+    ]
+    assert answer_many([]) == []
+    mock_get_llm.assert_not_called()
+
+
+@patch("src.core.rag.get_retriever")
+@patch("src.core.rag.get_llm")
+def test_answer_packs_context_into_token_budget(
+    mock_get_llm, mock_get_retriever, _approx_tokens
+):
+    _approx_tokens["context_tokens"] = 12
+    docs = [
+        Document(
+            page_content="alpha beta gamma delta",
+            metadata={"source": "a.txt", "chunk": 1},
+        ),
+        Document(page_content="x" * 200, metadata={"source": "b.txt", "chunk": 0}),
+        Document(
+            page_content="gamma delta epsilon", metadata={"source": "a.txt", "chunk": 2}
+        ),
+    ]
+    mock_get_retriever.return_value.invoke.return_value = docs
+    mock_get_llm.return_value.invoke.return_value = MagicMock(content="ok")
+
+    res = answer("question?", k=3)
+
+    prompt = mock_get_llm.return_value.invoke.call_args.args[0]
+    assert "alpha beta gamma delta epsilon" in prompt and "xxxx" not in prompt
+    assert res["sources"] == [
+        {"source": "a.txt", "chunk": 1},
+        {"source": "a.txt", "chunk": 2},
+    ]
+    assert res["context_tokens"] == 8
+
+
+@patch("src.core.rag.get_retriever")
+@patch("src.core.rag.get_llm")
+def test_answer_stream_yields_tokens_then_sources(mock_get_llm, mock_get_retriever):
+    doc = Document(page_content="foo", metadata={"source": "a.txt", "chunk": 0})
+    mock_get_retriever.return_value.invoke.return_value = [doc]
+    mock_get_llm.return_value.stream.return_value = iter(
+        [MagicMock(content="An"), MagicMock(content=""), MagicMock(content="swer")]
+    )
+
+    events = list(answer_stream("question?", k=2))
+
+    assert events == [
+        {"event": "token", "text": "An"},
+        {"event": "token", "text": "swer"},
+        {
+            "event": "sources",
+            "sources": [{"source": "a.txt", "chunk": 0}],
+            "context_tokens": 1,
+        },
+    ]
+    assert "foo" in mock_get_llm.return_value.stream.call_args.args[0]
+
+
+@patch("src.core.rag.get_retriever")
+@patch("src.core.rag.get_llm")
+def test_answer_stream_without_docs_skips_llm(mock_get_llm, mock_get_retriever):
+    mock_get_retriever.return_value.invoke.return_value = []
+
+    events = list(answer_stream("question?"))
+
+    assert events[0]["text"] == "No relevant information found."
+    assert events[-1] == {"event": "sources", "sources": []}
+    mock_get_llm.assert_not_called()
+
+
+@patch("src.core.rag.get_retriever")
+@patch("src.core.rag.get_llm")
+def test_aanswer_awaits_retriever_and_llm(mock_get_llm, mock_get_retriever):
+    doc = Document(page_content="foo", metadata={"source": "a.txt", "chunk": 0})
+    mock_get_retriever.return_value.ainvoke = AsyncMock(return_value=[doc])
+    mock_get_llm.return_value.ainvoke = AsyncMock(return_value=MagicMock(content="A"))
+
+    res = asyncio.run(aanswer("question?", k=2))
+
+    assert res == {
+        "answer": "A",
+        "sources": [{"source": "a.txt", "chunk": 0}],
+        "context_tokens": 1,
+    }
+    mock_get_retriever.return_value.ainvoke.assert_awaited_once_with("question?")
+    mock_get_retriever.return_value.invoke.assert_not_called()
+    mock_get_llm.return_value.invoke.assert_not_called()
+
+
+@patch("src.core.rag.get_retriever")
+@patch("src.core.rag.get_llm")
+def test_aanswer_keeps_blocking_work_off_the_event_loop(
+    mock_get_llm, mock_get_retriever
+):
+    doc = Document(page_content="foo", metadata={"source": "a.txt", "chunk": 0})
+    retriever, llm = MagicMock(), MagicMock()
+    retriever.ainvoke = AsyncMock(return_value=[doc])
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="A"))
+    threads = []
+
+    def get_retriever(k):
+        threads.append(threading.get_ident())
+        return retriever
+
+    def get_llm():
+        threads.append(threading.get_ident())
+        return llm
+
+    mock_get_retriever.side_effect = get_retriever
+    mock_get_llm.side_effect = get_llm
+
+    def remember(result):
+        threads.append(threading.get_ident())
+
+    def cached_answer(question, packed):
+        threads.append(threading.get_ident())
+        return None, remember
+
+    async def main():
+        with patch("src.core.rag._cached_answer", side_effect=cached_answer):
+            await aanswer("question?")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+
+    # Retriever and LLM lookups, context packing and the cache write
+    assert len(threads) == 4 and loop_thread not in threads
+
+
+@patch("src.core.rag.get_retriever")
+@patch("src.core.rag.get_llm")
+def test_aanswer_stream_uses_astream(mock_get_llm, mock_get_retriever):
+    doc = Document(page_content="foo", metadata={"source": "a.txt", "chunk": 0})
+    mock_get_retriever.return_value.ainvoke = AsyncMock(return_value=[doc])
+
+    async def pieces(prompt):
+        for text in ("An", "swer"):
+            yield MagicMock(content=text)
+
+    mock_get_llm.return_value.astream.side_effect = pieces
+
+    async def collect():
+        return [event async for event in aanswer_stream("question?")]
+
+    events = asyncio.run(collect())
+
+    assert [e.get("text") for e in events[:-1]] == ["An", "swer"]
+    assert events[-1]["sources"] == [{"source": "a.txt", "chunk": 0}]
+
+
+@patch("src.core.rag.retrieve_many")
+@patch("src.core.rag.get_llm")
+def test_aanswer_many_uses_abatch(mock_get_llm, mock_retrieve_many):
+    doc = Document(page_content="foo", metadata={"source": "a.txt", "chunk": 0})
+    mock_retrieve_many.return_value = [[doc], RuntimeError("search down")]
+    mock_get_llm.return_value.abatch = AsyncMock(return_value=[MagicMock(content="A1")])
+
+    res = asyncio.run(aanswer_many(["q1", "q2"], k=2, max_concurrency=3))
+
+    assert res == [
+        {
+            "answer": "A1",
+            "sources": [{"source": "a.txt", "chunk": 0}],
+            "context_tokens": 1,
+        },
+        {"error": "search down"},
+    ]
+    assert mock_get_llm.return_value.abatch.await_args.kwargs == {
+        "config": {"max_concurrency": 3},
+        "return_exceptions": True,
+    }
+    mock_get_llm.return_value.batch.assert_not_called()
+
+
+@patch("src.core.rag.llm_cache_key", return_value="model-a")
+@patch("src.core.rag.get_retriever")
+@patch("src.core.rag.get_llm")
+def test_answer_cache_reuses_answers_until_chunks_or_model_change(
+    mock_get_llm, mock_get_retriever, mock_model_key, _answer_cache
+):
+    _answer_cache.return_value = MemoryAnswerCache()
+    doc = Document(
+        id="c1", page_content="foo", metadata={"source": "a.txt", "chunk": 0}
+    )
+    mock_get_retriever.return_value.invoke.return_value = [doc]
+    llm = mock_get_llm.return_value
+    llm.invoke.return_value = MagicMock(content="A")
+
+    first = answer("What is  foo?")
+    assert answer("what is foo?") == first
+    assert [
+        e["text"] for e in answer_stream("What is foo?") if e["event"] == "token"
+    ] == ["A"]
+    assert llm.invoke.call_count == 1
+    llm.stream.assert_not_called()
+
+    # A replaced chunk has a new ID (content hash), a new model a new key
+    edited = Document(
+        id="c2", page_content="foo!", metadata={"source": "a.txt", "chunk": 0}
+    )
+    mock_get_retriever.return_value.invoke.return_value = [edited]
+    answer("What is foo?")
+    mock_model_key.return_value = "model-b"
+    answer("What is foo?")
+    assert llm.invoke.call_count == 3
+
+
+@patch("src.core.rag.retrieve_many")
+@patch("src.core.rag.get_llm")
+def test_answer_many_only_generates_cache_misses(
+    mock_get_llm, mock_retrieve_many, _answer_cache
+):
+    _answer_cache.return_value = MemoryAnswerCache()
+    doc = Document(
+        id="c1", page_content="foo", metadata={"source": "a.txt", "chunk": 0}
+    )
+    mock_retrieve_many.return_value = [[doc], [doc]]
+    llm = mock_get_llm.return_value
+    llm.batch.side_effect = lambda prompts, **_: [
+        MagicMock(content=f"A{i}") for i in range(len(prompts))
+    ]
+
+    assert [r["answer"] for r in answer_many(["q1", "q2"])] == ["A0", "A1"]
+    assert [r["answer"] for r in answer_many(["q2", "q3"])] == ["A1", "A0"]
+    assert len(llm.batch.call_args.args[0]) == 1
+
+
+@patch("src.core.rag.get_retriever")
+@patch("src.core.rag.get_llm")
+def test_concurrent_identical_aanswer_calls_share_one_run(
+    mock_get_llm, mock_get_retriever
+):
+    doc = Document(page_content="foo", metadata={"source": "a.txt", "chunk": 0})
+    mock_get_retriever.return_value.ainvoke = AsyncMock(return_value=[doc])
+
+    async def slow_answer(prompt):
+        await asyncio.sleep(0.01)
+        return MagicMock(content="A")
+
+    mock_get_llm.return_value.ainvoke = AsyncMock(side_effect=slow_answer)
+
+    async def main():
+        return await asyncio.gather(
+            aanswer("What is foo?"),
+            aanswer("what is  foo?"),
+            aanswer("What is foo?", k=2),
+        )
+
+    first, second, other_k = asyncio.run(main())
+
+    assert first is second and other_k["answer"] == "A"
+    assert mock_get_llm.return_value.ainvoke.await_count == 2
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+import pytest
+from langchain_core.documents import Document
+
+from src.core.offline import HashingEmbeddings
+from src.core.sharded_store import shard_for
+from src.core.vector_store import _build_store, close_vector_stores
+from src.tools.rebalance import rebalance
+
+
+@pytest.fixture(autouse=True)
+def _offline_embedder():
+    with patch(
+        "src.core.vector_store.get_embedder", return_value=HashingEmbeddings(32)
+    ):
+        yield
+    close_vector_stores()
+
+
+def _cfg(tmp_path, shards):
+    return {
+        "provider": "numpy_mmap",
+        "persist_dir": str(tmp_path),
+        "collection_name": "col",
+        "shards": shards,
+    }
+
+
+def _docs():
+    return [
+        Document(
+            id=f"id{i}", page_content=f"text {i}", metadata={"source": f"s{i % 9}"}
+        )
+        for i in range(45)
+    ]
+
+
+def test_rebalance_grows_existing_collection_into_shards(tmp_path):
+    _build_store(_cfg(tmp_path, 1)).add_documents(_docs())
+
+    dry = rebalance(_cfg(tmp_path, 1), shards=3, dry_run=True)
+    assert dry["scanned"] == 45 and dry["moved"] > 0
+    assert len(_build_store(_cfg(tmp_path, 1))) == 45
+
+    report = rebalance(_cfg(tmp_path, 1), shards=3)
+    sharded = _build_store(_cfg(tmp_path, 3))
+
+    assert report["moved"] == dry["moved"]
+    assert sorted(sharded.get()["ids"]) == sorted(f"id{i}" for i in range(45))
+    for index, shard in enumerate(sharded.shards):
+        assert all(
+            shard_for(meta["source"], 3) == index for meta in shard.get()["metadatas"]
+        )
+    # Vectors moved as-is, so search still finds each chunk
+    assert sharded.similarity_search("text 7", k=1)[0].id == "id7"
+
+
+def test_rebalance_shrinks_shards(tmp_path):
+    _build_store(_cfg(tmp_path, 4)).add_documents(_docs())
+
+    rebalance(_cfg(tmp_path, 4), shards=2)
+
+    assert len(_build_store(_cfg(tmp_path, 2)).get()["ids"]) == 45
+    assert (
+        len(_build_store({**_cfg(tmp_path, 1), "collection_name": "col-shard3"})) == 0
+    )
@@ -0,0 +1,43 @@
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from src.core.flat_store import FlatVectorStore
+from src.core.lexical_index import LexicalIndex
+from src.core.offline import HashingEmbeddings
+from src.core.source_index import SourceIndex
+from src.tools.reindex import reindex
+
+
+def test_reindex_backfills_indexes_from_store(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+    store.add_documents(
+        [
+            Document(
+                id=f"{source}-{i}",
+                page_content=f"{source} E{i}",
+                metadata={"source": source},
+            )
+            for source in ("a.txt", "b.txt")
+            for i in range(3)
+        ]
+    )
+    lexical = LexicalIndex(tmp_path / "lex.sqlite")
+    lexical.upsert([Document(id="stale", page_content="E1", metadata={})])
+    sources = SourceIndex(tmp_path / "sources.sqlite")
+
+    with (
+        patch("src.tools.reindex.load_vector_store", return_value=store),
+        patch("src.tools.reindex.load_lexical_index", return_value=lexical),
+        patch("src.tools.reindex.load_source_index", return_value=sources),
+        patch("src.tools.reindex.mark_store_changed") as mark_changed,
+    ):
+        assert reindex(page_size=4) == {"chunks": 6, "sources": 2}
+
+    mark_changed.assert_called_once_with()
+
+    assert len(lexical) == 6
+    assert sorted(doc.id for doc, _ in lexical.search("E1")) == ["a.txt-1", "b.txt-1"]
+    assert sources.lookup(["b.txt"]) == {"b.txt": ["b.txt-0", "b.txt-1", "b.txt-2"]}
+    lexical.close()
+    sources.close()
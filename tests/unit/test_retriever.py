@@ -1,6 +1,22 @@
 from unittest.mock import MagicMock, patch
 
-from src.core.retriever import _load_retriever_cfg, get_retriever
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from src.core.adaptive import AdaptiveRetriever
+from src.core.flat_store import FlatVectorStore
+from src.core.hybrid import HybridRetriever
+from src.core.lexical_index import LexicalIndex
+from src.core.mmr import MMRRetriever
+from src.core.offline import HashingEmbeddings
+from src.core.retriever import (
+    _load_retriever_cfg,
+    get_retriever,
+    retrieve_many,
+    retrieve_with_scores,
+)
+from src.core.semantic_cache import SemanticCachedRetriever
 
 
 def test_load_retriever_cfg_defaults(tmp_path, monkeypatch):
@@ -48,3 +64,133 @@ def test_get_retriever_k_override(mock_load_vs):
         )
         assert r == mock_retriever
 
+
+@patch("src.core.retriever.load_lexical_index")
+@patch("src.core.retriever.load_vector_store")
+def test_get_retriever_hybrid(mock_load_vs, mock_load_lexical):
+    mock_load_vs.return_value = MagicMock(spec=VectorStore)
+    mock_load_lexical.return_value = MagicMock(spec=LexicalIndex)
+    with patch("src.core.retriever._load_retriever_cfg") as mock_cfg:
+        mock_cfg.return_value = {"search_type": "hybrid", "k": 3, "rrf_k": 10}
+
+        r = get_retriever()
+
+    assert isinstance(r, HybridRetriever)
+    assert (r.k, r.fetch_k, r.rrf_k) == (3, 20, 10)
+    assert r.lexical is mock_load_lexical.return_value
+    mock_load_vs.return_value.as_retriever.assert_not_called()
+
+
+@patch("src.core.retriever.load_vector_store")
+def test_get_retriever_mmr(mock_load_vs):
+    mock_load_vs.return_value = MagicMock(spec=VectorStore)
+    with patch("src.core.retriever._load_retriever_cfg") as mock_cfg:
+        mock_cfg.return_value = {
+            "search_type": "mmr",
+            "k": 4,
+            "fetch_k": 50,
+            "lambda_mult": 0.3,
+        }
+
+        r = get_retriever()
+
+    assert isinstance(r, MMRRetriever)
+    assert (r.k, r.fetch_k, r.lambda_mult) == (4, 50, 0.3)
+    mock_load_vs.return_value.as_retriever.assert_not_called()
+
+
+@patch("src.core.retriever.vector_store_key", return_value="store")
+@patch("src.core.retriever.load_vector_store")
+def test_get_retriever_wraps_with_semantic_cache(mock_load_vs, _key):
+    mock_load_vs.return_value = MagicMock(spec=VectorStore)
+    mock_load_vs.return_value.as_retriever.return_value = MagicMock(spec=BaseRetriever)
+    cache_cfg = {"threshold": 0.9, "max_entries": 16}
+    with patch("src.core.retriever._load_retriever_cfg") as mock_cfg:
+        mock_cfg.return_value = {
+            "search_type": "similarity",
+            "k": 4,
+            "semantic_cache": cache_cfg,
+        }
+        first = get_retriever()
+        second = get_retriever(k=2)
+        mock_cfg.return_value["semantic_cache"] = {**cache_cfg, "enabled": False}
+        plain = get_retriever()
+
+    assert isinstance(first, SemanticCachedRetriever)
+    assert first.cache is second.cache
+    assert first.cache.threshold == 0.9
+    assert first.scope != second.scope
+    assert first.inner is mock_load_vs.return_value.as_retriever.return_value
+    assert plain is mock_load_vs.return_value.as_retriever.return_value
+
+
+@patch("src.core.retriever.load_vector_store")
+def test_retrieve_many_embeds_once_and_searches_in_one_call(mock_load_vs, tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=32))
+    store.add_texts(["alpha beta", "gamma delta", "epsilon"], [{"source": "a.txt"}] * 3)
+    store.similarity_search_by_vectors_with_score = MagicMock(
+        wraps=store.similarity_search_by_vectors_with_score
+    )
+    mock_load_vs.return_value = store
+
+    with (
+        patch("src.core.retriever._load_retriever_cfg") as mock_cfg,
+        patch.object(
+            HashingEmbeddings, "embed_documents", wraps=store.embeddings.embed_documents
+        ) as embed,
+    ):
+        mock_cfg.return_value = {"search_type": "similarity", "k": 4}
+        found = retrieve_many(["alpha", "gamma delta", "zzz"], k=1)
+
+    embed.assert_called_once_with(["alpha", "gamma delta", "zzz"])
+    store.similarity_search_by_vectors_with_score.assert_called_once()
+    assert [docs[0].page_content for docs in found[:2]] == ["alpha beta", "gamma delta"]
+
+
+@patch("src.core.retriever.get_retriever")
+@patch("src.core.retriever.load_vector_store")
+def test_retrieve_many_batches_other_search_types(mock_load_vs, mock_get_retriever):
+    with patch("src.core.retriever._load_retriever_cfg") as mock_cfg:
+        mock_cfg.return_value = {"search_type": "mmr", "k": 4}
+        found = retrieve_many(["a", "b"], max_concurrency=2)
+
+    mock_get_retriever.assert_called_once_with(k=4)
+    mock_get_retriever.return_value.batch.assert_called_once_with(
+        ["a", "b"], config={"max_concurrency": 2}, return_exceptions=True
+    )
+    assert found is mock_get_retriever.return_value.batch.return_value
+
+
+@patch("src.core.retriever.load_vector_store")
+def test_get_retriever_adaptive(mock_load_vs):
+    mock_load_vs.return_value = MagicMock(spec=VectorStore)
+    with patch("src.core.retriever._load_retriever_cfg") as mock_cfg:
+        mock_cfg.return_value = {
+            "search_type": "adaptive",
+            "k": 8,
+            "score_threshold": 0.4,
+            "min_gap": 0.1,
+        }
+
+        r = get_retriever()
+
+    assert isinstance(r, AdaptiveRetriever)
+    assert (r.k, r.score_threshold, r.min_gap, r.min_k) == (8, 0.4, 0.1, 1)
+
+
+@patch("src.core.retriever.load_vector_store")
+def test_retrieve_with_scores_applies_cut_only_in_adaptive_mode(mock_load_vs):
+    docs = [Document(page_content=f"d{i}") for i in range(3)]
+    store = MagicMock(spec=VectorStore)
+    store.similarity_search_with_relevance_scores.return_value = list(
+        zip(docs, [0.9, 0.85, 0.2])
+    )
+    mock_load_vs.return_value = store
+
+    with patch("src.core.retriever._load_retriever_cfg") as mock_cfg:
+        mock_cfg.return_value = {"search_type": "similarity", "k": 4, "min_gap": 0.3}
+        assert len(retrieve_with_scores("q", k=3)) == 3
+        mock_cfg.return_value = {"search_type": "adaptive", "k": 4, "min_gap": 0.3}
+        assert [score for _, score in retrieve_with_scores("q")] == [0.9, 0.85]
+
+    store.similarity_search_with_relevance_scores.assert_called_with("q", k=4)
@@ -0,0 +1,175 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.core.flat_store import FlatVectorStore
+from src.core.offline import HashingEmbeddings
+from src.core.semantic_cache import SemanticCache, SemanticCachedRetriever
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lookup_hits_within_threshold_and_per_scope():
+    cache = SemanticCache(threshold=0.9)
+    cache.put([1.0, 0.0, 0.0], "a", ["c1", "c2"])
+
+    assert cache.lookup([0.95, 0.1, 0.0], "a") == ["c1", "c2"]
+    assert cache.lookup([0.6, 0.8, 0.0], "a") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "b") is None
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 2,
+        "evictions": 0,
+        "invalidations": 0,
+        "entries": 1,
+    }
+
+
+def test_near_duplicates_refresh_one_entry_and_lru_evicts():
+    cache = SemanticCache(threshold=0.99, max_entries=2)
+    cache.put([1.0, 0.0], "s", ["old"])
+    cache.put([1.0, 0.001], "s", ["new"])
+    assert len(cache) == 1
+    assert cache.lookup([1.0, 0.0], "s") == ["new"]
+
+    cache.put([0.0, 1.0], "s", ["y"])
+    cache.lookup([1.0, 0.0], "s")  # x becomes most recently used
+    cache.put([-1.0, 0.0], "s", ["z"])
+
+    assert cache.evictions == 1
+    assert cache.lookup([0.0, 1.0], "s") is None
+    assert cache.lookup([1.0, 0.0], "s") == ["new"]
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = SemanticCache(ttl_seconds=10, clock=clock)
+    cache.put([1.0, 0.0], "s", ["c"])
+
+    clock.now = 9.0
+    assert cache.lookup([1.0, 0.0], "s") == ["c"]
+    clock.now = 11.0
+    assert cache.lookup([1.0, 0.0], "s") is None
+    assert len(cache) == 0
+
+
+def test_clear_invalidates_and_rejects_puts_from_older_generation():
+    cache = SemanticCache()
+    generation = cache.generation
+    cache.put([1.0, 0.0], "s", ["c"], generation)
+
+    cache.clear()
+
+    assert cache.lookup([1.0, 0.0], "s") is None
+    assert cache.put([1.0, 0.0], "s", ["stale"], generation) is False
+    assert cache.put([1.0, 0.0], "s", ["fresh"], cache.generation) is True
+    assert cache.lookup([1.0, 0.0], "s") == ["fresh"]
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        SemanticCache(threshold=0.0)
+    with pytest.raises(ValueError):
+        SemanticCache(max_entries=0)
+
+
+def test_cached_retriever_reuses_ids_for_paraphrases(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=64))
+    store.add_documents(
+        [
+            Document(id=f"id{i}", page_content=text, metadata={"source": "a.txt"})
+            for i, text in enumerate(["reset your password here", "billing", "other"])
+        ]
+    )
+    inner = MagicMock(spec=BaseRetriever)
+    inner.invoke.side_effect = lambda query, config=None: store.similarity_search(
+        query, k=2
+    )
+    cache = SemanticCache(threshold=0.9)
+    retriever = SemanticCachedRetriever(
+        inner=inner, store=store, cache=cache, scope="s"
+    )
+
+    first = retriever.invoke("how do i reset my password")
+    second = retriever.invoke("how do I reset my password, please?")
+
+    assert inner.invoke.call_count == 1
+    assert [doc.id for doc in second] == [doc.id for doc in first]
+    assert second[0].page_content == first[0].page_content
+
+    # A chunk that disappeared forces a fresh retrieval
+    store.delete(ids=[first[0].id])
+    retriever.invoke("how do i reset my password")
+    assert inner.invoke.call_count == 2
+
+
+def test_cached_retriever_async_path_shares_the_cache(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=64))
+    store.add_documents(
+        [
+            Document(id=f"id{i}", page_content=text, metadata={"source": "a.txt"})
+            for i, text in enumerate(["reset your password here", "billing"])
+        ]
+    )
+    inner = MagicMock(spec=BaseRetriever)
+    inner.ainvoke = AsyncMock(
+        side_effect=lambda query, config=None: store.similarity_search(query, k=1)
+    )
+    retriever = SemanticCachedRetriever(
+        inner=inner, store=store, cache=SemanticCache(threshold=0.9), scope="s"
+    )
+
+    first = asyncio.run(retriever.ainvoke("how do i reset my password"))
+    second = retriever.invoke("how do I reset my password, please?")
+
+    assert inner.ainvoke.await_count == 1
+    inner.invoke.assert_not_called()
+    assert [doc.id for doc in second] == [doc.id for doc in first]
+
+
+def test_cached_retriever_clears_when_the_store_version_changes(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=64))
+    store.add_documents(
+        [Document(id="id0", page_content="reset your password here", metadata={})]
+    )
+    inner = MagicMock(spec=BaseRetriever)
+    inner.invoke.side_effect = lambda query, config=None: store.similarity_search(
+        query, k=1
+    )
+    # Stands in for the version stamp another process rewrites on ingest
+    version = ["v1"]
+    retriever = SemanticCachedRetriever(
+        inner=inner,
+        store=store,
+        cache=SemanticCache(threshold=0.9),
+        scope="s",
+        version=lambda: version[0],
+    )
+
+    retriever.invoke("how do i reset my password")
+    retriever.invoke("how do i reset my password")
+    assert inner.invoke.call_count == 1
+
+    version[0] = "v2"
+    retriever.invoke("how do i reset my password")
+    assert inner.invoke.call_count == 2
+    assert retriever.cache.stats()["invalidations"] == 1
+
+
+def test_dimension_change_resets_matrix():
+    cache = SemanticCache()
+    cache.put(np.ones(4), "s", ["a"])
+    cache.put(np.ones(8), "s", ["b"])
+
+    assert cache.lookup(np.ones(8), "s") == ["b"]
+    assert cache.lookup(np.ones(4), "s") is None
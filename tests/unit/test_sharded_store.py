@@ -0,0 +1,190 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from src.core.flat_store import FlatVectorStore
+from src.core.offline import HashingEmbeddings
+from src.core.sharded_store import (
+    ShardedVectorStore,
+    search_by_vectors,
+    shard_for,
+    shard_name,
+)
+from src.core.vector_store import close_vector_stores, load_vector_store
+
+
+@pytest.fixture
+def emb():
+    return HashingEmbeddings(dimension=64)
+
+
+@pytest.fixture
+def sharded(tmp_path, emb):
+    shards = [FlatVectorStore(tmp_path / f"s{i}", emb) for i in range(3)]
+    store = ShardedVectorStore(shards)
+    yield store
+    store.close()
+
+
+def _docs(count):
+    return [
+        Document(
+            id=f"id{i}",
+            page_content=f"chunk {i} about topic{i % 5} vector search",
+            metadata={"source": f"doc{i % 7}.txt"},
+        )
+        for i in range(count)
+    ]
+
+
+def test_shard_for_is_stable_and_in_range():
+    assert shard_for("a.txt", 4) == shard_for("a.txt", 4)
+    assert {shard_for(f"doc{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+    assert shard_name("default", 0) == "default"
+    assert shard_name("default", 2) == "default-shard2"
+
+
+def test_writes_are_routed_by_source(sharded):
+    ids = sharded.add_documents(_docs(30))
+
+    assert ids == [f"id{i}" for i in range(30)]
+    assert sum(len(shard) for shard in sharded.shards) == 30
+    for index, shard in enumerate(sharded.shards):
+        sources = {meta["source"] for meta in shard.get()["metadatas"]}
+        assert all(shard_for(source, 3) == index for source in sources)
+
+
+def test_search_merges_shards_like_a_single_store(tmp_path, emb, sharded):
+    docs = _docs(40)
+    single = FlatVectorStore(tmp_path / "single", emb)
+    single.add_documents(docs)
+    sharded.add_documents(docs)
+
+    for query in ["chunk 3 topic3", "vector search topic1", "chunk 17"]:
+        expected = single.similarity_search_with_score(query, k=6)
+        merged = sharded.similarity_search_with_score(query, k=6)
+        # Same distances in the same order (IDs may differ only among ties)
+        assert [score for _, score in merged] == pytest.approx(
+            [score for _, score in expected]
+        )
+        assert merged[0][0].id == expected[0][0].id
+
+
+def test_batched_search_merges_per_query(tmp_path, emb, sharded):
+    docs = _docs(40)
+    single = FlatVectorStore(tmp_path / "single", emb)
+    single.add_documents(docs)
+    sharded.add_documents(docs)
+    vectors = emb.embed_documents(["chunk 3 topic3", "vector search topic1"])
+
+    merged = search_by_vectors(sharded, vectors, 5)
+    expected = search_by_vectors(single, vectors, 5)
+
+    for got, want in zip(merged, expected):
+        assert [score for _, score in got] == pytest.approx(
+            [score for _, score in want]
+        )
+
+
+def test_chroma_batched_search_uses_one_collection_query():
+    store = MagicMock(spec=["_collection"])
+    store._collection.query.return_value = {
+        "ids": [["a", "b"], []],
+        "documents": [["A", "B"], []],
+        "metadatas": [[{"source": "x"}, None], []],
+        "distances": [[0.1, 0.4], []],
+    }
+
+    hits = search_by_vectors(store, [[1.0, 0.0], [0.0, 1.0]], 2)
+
+    store._collection.query.assert_called_once()
+    assert [(doc.id, doc.metadata, score) for doc, score in hits[0]] == [
+        ("a", {"source": "x"}, 0.1),
+        ("b", {}, 0.4),
+    ]
+    assert hits[1] == []
+
+
+def test_get_delete_and_filters_fan_out(sharded):
+    sharded.add_documents(_docs(21))
+
+    assert len(sharded.get()["ids"]) == 21
+    assert len(sharded.get(limit=5, offset=18)["ids"]) == 3
+    assert {d.id for d in sharded.get_by_ids(["id0", "id20", "nope"])} == {
+        "id0",
+        "id20",
+    }
+
+    sharded.delete(where={"source": "doc0.txt"})
+    sharded.delete(ids=["id1"])
+
+    remaining = sharded.get()["metadatas"]
+    assert len(remaining) == 21 - 3 - 1
+    assert all(meta["source"] != "doc0.txt" for meta in remaining)
+    hits = sharded.similarity_search("chunk", k=30, filter={"source": "doc2.txt"})
+    assert {doc.metadata["source"] for doc in hits} == {"doc2.txt"}
+
+
+@patch("src.core.vector_store.get_embedder")
+def test_load_vector_store_builds_sharded_profile(mock_get_embedder, tmp_path, emb):
+    mock_get_embedder.return_value = emb
+    mock_cfg = {
+        "provider": "numpy_mmap",
+        "persist_dir": str(tmp_path),
+        "collection_name": "col",
+        "shards": 3,
+    }
+    try:
+        with patch("src.core.vector_store._load_vs_cfg", return_value=mock_cfg):
+            db = load_vector_store()
+    finally:
+        close_vector_stores()
+
+    assert isinstance(db, ShardedVectorStore)
+    assert [shard.persist_dir.name for shard in db.shards] == [
+        "col",
+        "col-shard1",
+        "col-shard2",
+    ]
+
+
+def test_from_texts_builds_the_profile_shards(tmp_path, emb):
+    docs = _docs(20)
+    profile = {
+        "provider": "numpy_mmap",
+        "persist_dir": str(tmp_path),
+        "collection_name": "col",
+        "shards": 3,
+    }
+    store = ShardedVectorStore.from_texts(
+        [doc.page_content for doc in docs],
+        emb,
+        [doc.metadata for doc in docs],
+        ids=[doc.id for doc in docs],
+        profile=profile,
+    )
+    try:
+        assert [shard.persist_dir.name for shard in store.shards] == [
+            "col",
+            "col-shard1",
+            "col-shard2",
+        ]
+        assert sorted(store.get()["ids"]) == sorted(doc.id for doc in docs)
+        for index, shard in enumerate(store.shards):
+            for meta in shard.get()["metadatas"]:
+                assert shard_for(meta["source"], 3) == index
+    finally:
+        store.close()
+
+
+def test_chroma_shards_are_searched_by_vector():
+    shard = MagicMock(
+        spec=["similarity_search_by_vector_with_relevance_scores", "embeddings"]
+    )
+    shard.similarity_search_by_vector_with_relevance_scores.return_value = [
+        (Document(page_content="a"), 0.2)
+    ]
+    store = ShardedVectorStore([shard])
+
+    assert store.similarity_search_by_vector_with_score([0.1], k=1)[0][1] == 0.2
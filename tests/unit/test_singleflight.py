@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    group: SingleFlight[int] = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(group.do, "k", work) for _ in range(4)]
+        while group.coalesced < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        results = [future.result(5) for future in futures]
+
+    assert results == [42] * 4 and len(calls) == 1
+    assert group.stats() == {
+        "name": "test",
+        "executions": 1,
+        "coalesced": 3,
+        "in_flight": 0,
+    }
+    # Nothing is cached once the call is finished
+    assert group.do("k", lambda: 7) == 7
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    group: SingleFlight[int] = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+
+    def boom():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("llm down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(group.do, "k", boom)
+        started.wait(5)
+        follower = pool.submit(group.do, "k", lambda: 1)
+        while group.coalesced < 1:
+            threading.Event().wait(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="llm down"):
+                future.result(5)
+
+    assert group.do("k", lambda: 1) == 1
+
+
+def test_async_calls_share_one_execution_per_key():
+    group: AsyncSingleFlight[str] = AsyncSingleFlight("test")
+    runs = []
+
+    async def work(key):
+        runs.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    async def main():
+        return await asyncio.gather(
+            *(group.do(key, lambda key=key: work(key)) for key in "aaab")
+        )
+
+    assert asyncio.run(main()) == ["A", "A", "A", "B"]
+    assert sorted(runs) == ["a", "b"]
+    assert (group.executions, group.coalesced, group.stats()["in_flight"]) == (2, 2, 0)
+
+
+def test_async_cancelled_caller_does_not_cancel_others_until_last_leaves():
+    group: AsyncSingleFlight[str] = AsyncSingleFlight("test")
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(0.05)
+            return "done"
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        first = asyncio.ensure_future(group.do("k", work))
+        second = asyncio.ensure_future(group.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+
+        # Every waiter gone: the shared run is cancelled too
+        third = asyncio.ensure_future(group.do("k", work))
+        await asyncio.sleep(0)
+        third.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await third
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [True]
@@ -0,0 +1,164 @@
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from src.core.flat_store import FlatVectorStore
+from src.core.lexical_index import LexicalIndex
+from src.core.offline import HashingEmbeddings
+from src.core.sharded_store import ShardedVectorStore
+from src.core.snapshot import Snapshot, SnapshotError, export_snapshot, import_snapshot
+from src.tools.snapshot import main
+
+
+@pytest.fixture
+def emb():
+    return HashingEmbeddings(dimension=32)
+
+
+def _store(path, emb, count=25):
+    store = FlatVectorStore(path, emb)
+    store.add_documents(
+        [
+            Document(
+                id=f"id{i}",
+                page_content=f"chunk {i} – naïve ✓",
+                metadata={"source": f"doc{i % 4}.txt", "page": i},
+            )
+            for i in range(count)
+        ]
+    )
+    return store
+
+
+def test_round_trip_preserves_records_and_vectors(tmp_path, emb):
+    source = _store(tmp_path / "src", emb)
+    manifest = export_snapshot(
+        source, tmp_path / "snap", "hashing:hashing-32", page_size=7
+    )
+
+    assert manifest["count"] == 25
+    assert manifest["dimension"] == 32
+    assert set(manifest["files"]) >= {"vectors.npy", "texts.bin", "ids.offsets.npy"}
+
+    target = FlatVectorStore(tmp_path / "dst", emb)
+    with patch.object(
+        emb, "embed_documents", side_effect=AssertionError("re-embedded")
+    ):
+        import_snapshot(tmp_path / "snap", target, "hashing:hashing-32", page_size=10)
+
+    original = source.get(include=["documents", "metadatas", "embeddings"])
+    restored = target.get(include=["documents", "metadatas", "embeddings"])
+    assert restored["ids"] == original["ids"]
+    assert restored["documents"] == original["documents"]
+    assert restored["metadatas"] == original["metadatas"]
+    assert np.allclose(restored["embeddings"], original["embeddings"])
+    assert target.similarity_search("chunk 7", k=1)[0].id == "id7"
+
+
+def test_snapshot_is_memory_mapped_and_paged(tmp_path, emb):
+    export_snapshot(_store(tmp_path / "src", emb), tmp_path / "snap")
+
+    snapshot = Snapshot(tmp_path / "snap")
+    pages = list(snapshot.pages(page_size=10))
+
+    assert isinstance(snapshot.vectors, np.memmap)
+    assert [len(page["ids"]) for page in pages] == [10, 10, 5]
+    assert pages[0]["documents"][3] == "chunk 3 – naïve ✓"
+
+
+def test_corrupted_file_fails_checksum(tmp_path, emb):
+    export_snapshot(_store(tmp_path / "src", emb), tmp_path / "snap")
+    blob = tmp_path / "snap" / "texts.bin"
+    data = bytearray(blob.read_bytes())
+    data[0] ^= 0xFF
+    blob.write_bytes(bytes(data))
+
+    with pytest.raises(SnapshotError, match="texts.bin"):
+        Snapshot(tmp_path / "snap")
+    Snapshot(tmp_path / "snap", verify=False)
+
+
+def test_embedder_mismatch_requires_force(tmp_path, emb):
+    export_snapshot(
+        _store(tmp_path / "src", emb), tmp_path / "snap", "hashing:hashing-32"
+    )
+    target = FlatVectorStore(tmp_path / "dst", emb)
+
+    with pytest.raises(SnapshotError, match="embedded with"):
+        import_snapshot(tmp_path / "snap", target, "ollama:mxbai-embed-large")
+    import_snapshot(tmp_path / "snap", target, "ollama:mxbai-embed-large", force=True)
+    assert len(target) == 25
+
+
+def test_export_refuses_existing_snapshot_and_handles_empty_store(tmp_path, emb):
+    empty = FlatVectorStore(tmp_path / "empty", emb)
+    manifest = export_snapshot(empty, tmp_path / "snap")
+    assert manifest["count"] == 0
+    with pytest.raises(SnapshotError, match="already contains"):
+        export_snapshot(empty, tmp_path / "snap")
+    assert list(Snapshot(tmp_path / "snap").pages()) == []
+
+
+def test_import_into_sharded_store_routes_by_source(tmp_path, emb):
+    export_snapshot(_store(tmp_path / "src", emb), tmp_path / "snap")
+    sharded = ShardedVectorStore(
+        [FlatVectorStore(tmp_path / f"s{i}", emb) for i in range(3)]
+    )
+
+    import_snapshot(tmp_path / "snap", sharded)
+
+    assert len(sharded.get()["ids"]) == 25
+    for index, shard in enumerate(sharded.shards):
+        assert all(
+            sharded.shard_for(meta["source"]) == index
+            for meta in shard.get()["metadatas"]
+        )
+    sharded.close()
+
+
+def test_cli_import_rebuilds_indexes_from_whole_store(tmp_path, emb, capsys):
+    export_snapshot(
+        _store(tmp_path / "src", emb), tmp_path / "snap", "hashing:hashing-32"
+    )
+    target = FlatVectorStore(tmp_path / "dst", emb)
+    # Chunks the store held before the import keep their index entries
+    target.add_documents(
+        [Document(id="old", page_content="kept", metadata={"source": "old.txt"})]
+    )
+    lexical = LexicalIndex(tmp_path / "lexical.sqlite")
+
+    with (
+        patch("src.tools.snapshot.load_vector_store", return_value=target),
+        patch("src.tools.reindex.load_vector_store", return_value=target),
+        patch(
+            "src.tools.snapshot.embedder_namespace", return_value="hashing:hashing-32"
+        ),
+        patch("src.tools.reindex.load_source_index") as mock_index,
+        patch("src.tools.reindex.load_lexical_index", return_value=lexical),
+        patch("src.tools.reindex.mark_store_changed") as mark_changed,
+    ):
+        assert main(["import", str(tmp_path / "snap")]) == 0
+
+    # Caches in other processes (the API) see the import
+    mark_changed.assert_called_once_with()
+
+    assert json.loads(capsys.readouterr().out) == {
+        "imported": 25,
+        "chunks": 26,
+        "sources": 5,
+    }
+    by_source = mock_index.return_value.replace.call_args.args[0]
+    assert sorted(by_source) == [
+        "doc0.txt",
+        "doc1.txt",
+        "doc2.txt",
+        "doc3.txt",
+        "old.txt",
+    ]
+    assert len(by_source["doc0.txt"]) == 7
+    assert len(lexical) == 26
+    assert [doc.id for doc, _ in lexical.search("kept")] == ["old"]
+    lexical.close()
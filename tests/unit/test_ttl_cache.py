@@ -0,0 +1,56 @@
+import pytest
+
+from src.core.ttl_cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_put_and_stats():
+    cache: TTLCache[int] = TTLCache(max_entries=2)
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 1}
+
+
+def test_lru_eviction_order():
+    cache: TTLCache[int] = TTLCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = _Clock()
+    cache: TTLCache[int] = TTLCache(max_entries=4, ttl_seconds=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_zero_ttl_disables_expiry():
+    clock = _Clock()
+    cache: TTLCache[int] = TTLCache(ttl_seconds=0, clock=clock)
+    cache.put("a", 1)
+    clock.now = 1e9
+    assert cache.get("a") == 1
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        TTLCache(max_entries=0)
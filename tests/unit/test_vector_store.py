@@ -1,16 +1,50 @@
 import os
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 import pytest
 from langchain_core.documents import Document
 
-from src.core.vector_store import _load_vs_cfg, embed_and_store, load_vector_store
+from src.core.flat_store import FlatVectorStore
+from src.core.offline import HashingEmbeddings
+from src.core.vector_store import (
+    _CHUNK_LISTENERS,
+    _STORE_LISTENERS,
+    _load_vs_cfg,
+    add_chunk_listener,
+    add_store_listener,
+    close_vector_stores,
+    delete_by_source,
+    delete_sources,
+    embed_and_store,
+    load_lexical_index,
+    load_source_index,
+    load_vector_store,
+    refresh_vector_stores,
+    store_version_reader,
+    with_chunk_ids,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_store_pool(tmp_path):
+    close_vector_stores()
+    index_path = tmp_path / "sources.sqlite"
+    lexical_path = tmp_path / "lexical.sqlite"
+    version_path = tmp_path / "store.version"
+    with (
+        patch("src.core.vector_store._source_index_path", return_value=index_path),
+        patch("src.core.vector_store._lexical_index_path", return_value=lexical_path),
+        patch("src.core.vector_store._store_version_path", return_value=version_path),
+    ):
+        yield
+    close_vector_stores()
 
 
 def test_load_vs_cfg_default_local():
     """Test loading default local vector store config"""
     with patch.dict(os.environ, {}, clear=True):
-        with patch("builtins.open", MagicMock()), patch("yaml.safe_load") as mock_yaml:
-            mock_yaml.return_value = {
+        with patch("src.core.config.load_config") as mock_load:
+            mock_load.return_value = {
                 "default": "local",
                 "local": {
                     "provider": "chroma_local",
@@ -27,8 +61,8 @@ def test_load_vs_cfg_default_local():
 def test_load_vs_cfg_with_env_profile():
     """Test loading vector store config with environment profile override"""
     with patch.dict(os.environ, {"VS_PROFILE": "cloud"}):
-        with patch("builtins.open", MagicMock()), patch("yaml.safe_load") as mock_yaml:
-            mock_yaml.return_value = {
+        with patch("src.core.config.load_config") as mock_load:
+            mock_load.return_value = {
                 "default": "local",
                 "cloud": {
                     "provider": "chroma_cloud",
@@ -46,8 +80,8 @@ def test_load_vs_cfg_with_env_profile():
 def test_load_vs_cfg_missing_profile():
     """Test loading vector store config with missing profile"""
     with patch.dict(os.environ, {"VS_PROFILE": "nonexistent"}):
-        with patch("builtins.open", MagicMock()), patch("yaml.safe_load") as mock_yaml:
-            mock_yaml.return_value = {
+        with patch("src.core.config.load_config") as mock_load:
+            mock_load.return_value = {
                 "default": "local",
                 "local": {
                     "provider": "chroma_local",
@@ -68,9 +102,10 @@ def test_embed_and_store_chroma_local(mock_get_embedder, mock_chroma):
     mock_embedder = MagicMock()
     mock_get_embedder.return_value = mock_embedder
 
-    # Mock the Chroma instance
+    # Mock the Chroma instance (empty collection)
     mock_db = MagicMock()
-    mock_chroma.from_documents.return_value = mock_db
+    mock_db.get.return_value = {"ids": []}
+    mock_chroma.return_value = mock_db
 
     # Mock config
     mock_cfg = {
@@ -88,13 +123,19 @@ def test_embed_and_store_chroma_local(mock_get_embedder, mock_chroma):
     with patch("src.core.vector_store._load_vs_cfg", return_value=mock_cfg):
         result = embed_and_store(docs)
 
-        # Verify the Chroma.from_documents was called with correct parameters
-        mock_chroma.from_documents.assert_called_once_with(
-            documents=docs,
-            embedding=mock_embedder,
+        # Verify the pooled Chroma handle was opened and the docs added to it
+        mock_chroma.assert_called_once_with(
             persist_directory="test/chroma",
             collection_name="test_collection",
+            embedding_function=mock_embedder,
         )
+        added = mock_db.add_documents.call_args.args[0]
+        assert [doc.page_content for doc in added] == [
+            "Test content 1",
+            "Test content 2",
+        ]
+        assert all(doc.id and doc.metadata["content_hash"] for doc in added)
+        mock_db.delete.assert_not_called()
 
         # Verify the result is the mock db
         assert result == mock_db
@@ -108,9 +149,10 @@ def test_embed_and_store_chroma_cloud(mock_get_embedder, mock_chroma):
     mock_embedder = MagicMock()
     mock_get_embedder.return_value = mock_embedder
 
-    # Mock the Chroma instance
+    # Mock the Chroma instance (empty collection)
     mock_db = MagicMock()
-    mock_chroma.from_documents.return_value = mock_db
+    mock_db.get.return_value = {"ids": []}
+    mock_chroma.return_value = mock_db
 
     # Mock config
     mock_cfg = {"provider": "chroma_cloud", "collection_name": "test_collection"}
@@ -124,10 +166,11 @@ def test_embed_and_store_chroma_cloud(mock_get_embedder, mock_chroma):
     with patch("src.core.vector_store._load_vs_cfg", return_value=mock_cfg):
         result = embed_and_store(docs)
 
-        # Verify the Chroma.from_documents was called with correct parameters (no persist_directory)
-        mock_chroma.from_documents.assert_called_once_with(
-            documents=docs, embedding=mock_embedder, collection_name="test_collection"
+        # Verify the Chroma handle was opened without persist_directory
+        mock_chroma.assert_called_once_with(
+            collection_name="test_collection", embedding_function=mock_embedder
         )
+        assert len(mock_db.add_documents.call_args.args[0]) == 2
 
         # Verify the result is the mock db
         assert result == mock_db
@@ -211,6 +254,49 @@ def test_load_vector_store_chroma_cloud(mock_get_embedder, mock_chroma):
         assert result == mock_db
 
 
+@patch("src.core.vector_store.FlatVectorStore")
+@patch("src.core.vector_store.get_embedder")
+def test_load_vector_store_numpy_mmap(mock_get_embedder, mock_flat):
+    """Test loading the flat NumPy store under persist_dir/collection_name"""
+    mock_embedder = MagicMock()
+    mock_get_embedder.return_value = mock_embedder
+    mock_cfg = {
+        "provider": "numpy_mmap",
+        "persist_dir": "test/flat",
+        "collection_name": "test_collection",
+    }
+
+    with patch("src.core.vector_store._load_vs_cfg", return_value=mock_cfg):
+        result = load_vector_store()
+
+    mock_flat.assert_called_once()
+    kwargs = mock_flat.call_args.kwargs
+    assert str(kwargs["persist_dir"]).replace("\\", "/") == "test/flat/test_collection"
+    assert kwargs["embedding"] is mock_embedder
+    assert result is mock_flat.return_value
+
+
+@patch("src.core.vector_store.IVFVectorStore")
+@patch("src.core.vector_store.get_embedder")
+def test_load_vector_store_ivf_passes_index_options(mock_get_embedder, mock_ivf):
+    """Test the IVF provider receives the tuning keys of its profile"""
+    mock_cfg = {
+        "provider": "ivf",
+        "persist_dir": "test/ivf",
+        "collection_name": "c",
+        "nprobe": 16,
+        "min_train_size": 500,
+    }
+
+    with patch("src.core.vector_store._load_vs_cfg", return_value=mock_cfg):
+        load_vector_store()
+
+    kwargs = mock_ivf.call_args.kwargs
+    assert kwargs["nprobe"] == 16
+    assert kwargs["min_train_size"] == 500
+    assert "nlist" not in kwargs
+
+
 @patch("src.core.vector_store.get_embedder")
 def test_load_vector_store_unknown_provider(mock_get_embedder):
     """Test loading vector store with unknown provider"""
@@ -224,3 +310,245 @@ def test_load_vector_store_unknown_provider(mock_get_embedder):
     with patch("src.core.vector_store._load_vs_cfg", return_value=mock_cfg):
         with pytest.raises(ValueError, match="Unknown vector store provider"):
             load_vector_store()
+
+
+@patch("src.core.vector_store.Chroma")
+@patch("src.core.vector_store.get_embedder")
+def test_load_vector_store_reuses_pooled_handle(mock_get_embedder, mock_chroma):
+    """Repeated loads share one Chroma handle until the pool is refreshed"""
+    mock_chroma.side_effect = lambda **kwargs: MagicMock()
+    mock_cfg = {
+        "provider": "chroma_local",
+        "persist_dir": "test/chroma",
+        "collection_name": "test_collection",
+    }
+
+    with patch("src.core.vector_store._load_vs_cfg", return_value=mock_cfg):
+        first = load_vector_store()
+        second = load_vector_store()
+        assert first is second
+        assert mock_chroma.call_count == 1
+
+        refresh_vector_stores()
+        third = load_vector_store()
+        assert third is not first
+        assert mock_chroma.call_count == 2
+
+
+@patch("src.core.vector_store.Chroma")
+@patch("src.core.vector_store.get_embedder")
+def test_load_vector_store_keys_by_collection(mock_get_embedder, mock_chroma):
+    """Different collections get different pooled handles"""
+    mock_chroma.side_effect = lambda **kwargs: MagicMock()
+
+    with patch("src.core.vector_store._load_vs_cfg") as mock_load_cfg:
+        mock_load_cfg.return_value = {
+            "provider": "chroma_cloud",
+            "collection_name": "a",
+        }
+        first = load_vector_store()
+        mock_load_cfg.return_value = {
+            "provider": "chroma_cloud",
+            "collection_name": "b",
+        }
+        second = load_vector_store()
+
+    assert first is not second
+
+
+@patch("src.core.vector_store.Chroma")
+@patch("src.core.vector_store.get_embedder")
+def test_delete_by_source_uses_pooled_handle(mock_get_embedder, mock_chroma):
+    """delete_by_source deletes through the shared handle"""
+    mock_db = MagicMock()
+    mock_db.get.return_value = {"ids": ["a", "b"]}
+    mock_chroma.return_value = mock_db
+    mock_cfg = {"provider": "chroma_cloud", "collection_name": "test_collection"}
+
+    with patch("src.core.vector_store._load_vs_cfg", return_value=mock_cfg):
+        load_vector_store()
+        delete_by_source("doc.txt")
+
+    assert mock_chroma.call_count == 1
+    # Not in the source index yet: IDs resolved with one lookup covering both path forms
+    where = mock_db.get.call_args.kwargs["where"]
+    assert "doc.txt" in where["source"]["$in"]
+    assert str(Path("doc.txt").resolve()) in where["source"]["$in"]
+    mock_db.delete.assert_called_once_with(ids=["a", "b"])
+
+
+def _chunks(source, *texts):
+    return [Document(page_content=text, metadata={"source": source}) for text in texts]
+
+
+def test_chunk_ids_are_deterministic_per_source_and_position():
+    first = with_chunk_ids(_chunks("a.txt", "one", "two") + _chunks("b.txt", "one"))
+    second = with_chunk_ids(_chunks("a.txt", "one", "two") + _chunks("b.txt", "one"))
+
+    assert [doc.id for doc in first] == [doc.id for doc in second]
+    assert len({doc.id for doc in first}) == 3
+    assert first[0].metadata["content_hash"] == first[2].metadata["content_hash"]
+    # Repeated identical chunks in one source still get distinct IDs
+    repeated = with_chunk_ids(_chunks("a.txt", "same", "same"))
+    assert repeated[0].id != repeated[1].id
+
+
+def test_embed_and_store_is_idempotent_and_drops_vanished_chunks(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+    store.add_documents = MagicMock(wraps=store.add_documents)
+
+    with patch("src.core.vector_store.load_vector_store", return_value=store):
+        embed_and_store(_chunks("a.txt", "one", "two", "three") + _chunks("b.txt", "x"))
+        embed_and_store(_chunks("a.txt", "one", "two", "three"))
+        assert len(store) == 4
+        assert len(store.add_documents.call_args_list) == 1
+
+        # "three" vanished from a.txt, "two" changed; b.txt untouched
+        embed_and_store(_chunks("a.txt", "one", "TWO"))
+
+    texts = sorted(store.get(include=["documents"])["documents"])
+    assert texts == ["TWO", "one", "x"]
+    added = store.add_documents.call_args_list[-1].args[0]
+    assert [doc.page_content for doc in added] == ["TWO"]
+
+
+def test_delete_sources_uses_index_and_one_handle(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+    store.delete = MagicMock(wraps=store.delete)
+    docs = [
+        chunk
+        for i in range(5)
+        for chunk in _chunks(f"doc{i}.txt", f"first {i}", f"second {i}")
+    ]
+
+    with patch("src.core.vector_store.load_vector_store", return_value=store):
+        embed_and_store(docs)
+        assert len(load_source_index()) == 10
+
+        deleted = delete_sources(["doc0.txt", "doc3.txt", "missing.txt"])
+
+    assert deleted == 4
+    assert store.delete.call_count == 1
+    assert sorted({m["source"] for m in store.get()["metadatas"]}) == [
+        "doc1.txt",
+        "doc2.txt",
+        "doc4.txt",
+    ]
+    assert load_source_index().lookup(["doc0.txt", "doc1.txt"]) == {
+        "doc1.txt": store.get(where={"source": "doc1.txt"})["ids"]
+    }
+
+
+def test_lexical_index_follows_upserts_and_deletes(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+
+    with patch("src.core.vector_store.load_vector_store", return_value=store):
+        embed_and_store(_chunks("a.txt", "retry on ERR_CONN_RESET", "two"))
+        embed_and_store(_chunks("b.txt", "unrelated"))
+        assert [d.id for d, _ in load_lexical_index().search("ERR_CONN_RESET")] == [
+            store.get(where={"source": "a.txt"})["ids"][0]
+        ]
+
+        embed_and_store(_chunks("a.txt", "no error here", "two"))
+        assert load_lexical_index().search("ERR_CONN_RESET") == []
+
+        delete_sources(["a.txt"])
+
+    assert len(load_lexical_index()) == 1
+
+
+def test_empty_lexical_index_is_backfilled_from_existing_store(tmp_path):
+    # A collection ingested before the keyword index existed
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+    store.add_documents(
+        [Document(id="old-1", page_content="retry on ERR_CONN_RESET", metadata={})]
+    )
+
+    with patch("src.core.vector_store.load_vector_store", return_value=store):
+        lexical = load_lexical_index()
+
+    assert [doc.id for doc, _ in lexical.search("ERR_CONN_RESET")] == ["old-1"]
+
+
+def test_store_listeners_fire_only_on_changes(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+    listener = MagicMock()
+    add_store_listener(listener)
+    add_store_listener(listener)
+
+    try:
+        with patch("src.core.vector_store.load_vector_store", return_value=store):
+            embed_and_store(_chunks("a.txt", "one"))
+            embed_and_store(_chunks("a.txt", "one"))
+            assert listener.call_count == 1
+            delete_sources(["missing.txt"])
+            assert listener.call_count == 1
+            delete_sources(["a.txt"])
+            assert listener.call_count == 2
+        refresh_vector_stores()
+        assert listener.call_count == 3
+    finally:
+        _STORE_LISTENERS.remove(listener)
+
+
+def test_writes_update_the_version_stamp_other_processes_read(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+    version = store_version_reader()
+    before = version()
+
+    with patch("src.core.vector_store.load_vector_store", return_value=store):
+        embed_and_store(_chunks("a.txt", "one"))
+        after_ingest = version()
+        embed_and_store(_chunks("a.txt", "one"))
+        assert version() == after_ingest  # nothing changed
+        delete_sources(["a.txt"])
+    after_delete = version()
+    close_vector_stores()
+
+    assert len({before, after_ingest, after_delete}) == 3
+    assert version() == after_delete  # closing handles is not a write
+
+
+def test_chunk_listeners_receive_replaced_and_deleted_ids(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+    listener = MagicMock()
+    add_chunk_listener(listener)
+
+    try:
+        with patch("src.core.vector_store.load_vector_store", return_value=store):
+            first = with_chunk_ids(_chunks("a.txt", "one", "two"))
+            embed_and_store(_chunks("a.txt", "one", "two"))
+            listener.assert_not_called()
+            embed_and_store(_chunks("a.txt", "one", "TWO"))
+            listener.assert_called_once_with([first[1].id])
+            delete_sources(["a.txt"])
+        assert len(listener.call_args.args[0]) == 2
+    finally:
+        _CHUNK_LISTENERS.remove(listener)
+
+
+def test_delete_sources_falls_back_to_store_for_unindexed_sources(tmp_path):
+    store = FlatVectorStore(tmp_path / "flat", HashingEmbeddings(dimension=16))
+    # Written directly, e.g. by an older version without the source index
+    store.add_documents(_chunks("legacy.txt", "a", "b") + _chunks("keep.txt", "c"))
+
+    with patch("src.core.vector_store.load_vector_store", return_value=store):
+        assert delete_sources(["legacy.txt"]) == 2
+
+    assert store.get(include=["documents"])["documents"] == ["c"]
+
+
+def test_delete_sources_batches_large_deletes():
+    mock_db = MagicMock()
+    index = MagicMock()
+    index.lookup.return_value = {"big.txt": [f"id{i}" for i in range(12)]}
+
+    with (
+        patch("src.core.vector_store.load_vector_store", return_value=mock_db),
+        patch("src.core.vector_store.load_source_index", return_value=index),
+        patch("src.core.vector_store._DELETE_BATCH", 5),
+    ):
+        assert delete_sources(["big.txt"]) == 12
+
+    assert [len(c.kwargs["ids"]) for c in mock_db.delete.call_args_list] == [5, 5, 2]
+    index.discard.assert_called_once()